@@ -1,6 +1,10 @@
-from sqlalchemy import create_engine
+import logging
+
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = "sqlite:///./terminal_os.db"
 
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
@@ -14,3 +18,30 @@ def get_db():
     finally:
         db.close()
 
+
+
+def add_missing_columns():
+    """
+    create_all() never alters existing tables: add nullable columns declared
+    on the models but missing from the SQLite file (ALTER TABLE ADD COLUMN).
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type}'))
+                logger.info(f"🛠️ Added column {table.name}.{column.name}")
+
+
+def add_missing_indexes():
+    """create_all() only indexes the tables it creates: add model indexes missing from existing tables"""
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
@@ -0,0 +1,50 @@
+"""
+Request Deadline - One time budget shared by every LLM and tool call of a chat request
+Timeouts are clamped to what is left of the budget, so in-flight work is
+cancelled when the request expires instead of running to its own timeout.
+"""
+import asyncio
+import time
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised when the request budget ran out before the awaited work finished"""
+
+
+class Deadline:
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.started = time.monotonic()
+        self.expires_at = self.started + budget
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def clamp(self, timeout: Optional[float] = None) -> float:
+        """Per-call timeout bounded by the remaining budget"""
+        remaining = self.remaining()
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def scope(self):
+        """Async context manager cancelling its body when the budget runs out (never hold it across a yield)"""
+        return asyncio.timeout(self.remaining())
+
+    async def run(self, aw: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Await under min(timeout, remaining), cancelling the work on expiry"""
+        limit = self.clamp(timeout)
+        try:
+            return await asyncio.wait_for(aw, timeout=limit)
+        except asyncio.TimeoutError:
+            if self.expired:
+                raise DeadlineExceeded(f"request deadline of {self.budget:.0f}s exceeded") from None
+            raise
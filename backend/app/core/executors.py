@@ -0,0 +1,132 @@
+"""
+Executor Pools - Bounded thread pools for blocking work reached from async code
+One named pool per workload class so a slow job never starves the others:
+  db          SQLAlchemy sessions and JSON/file stores
+  cpu         embeddings, tokenization, image resizing
+  subprocess  streamed sandbox shell output
+  dns         DNS resolution, WHOIS and other blocking network clients (web3)
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config import EXECUTOR_POOL_SIZES, EXECUTOR_MAX_QUEUE
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorPool:
+    """ThreadPoolExecutor with a bounded backlog and queue-depth metrics"""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"pool-{name}")
+        self._slots: Optional[asyncio.Semaphore] = None  # Backlog admission, bound to the running loop
+        self._slots_loop = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.total_wait = 0.0
+
+    def _admission(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_queue)
+            self._slots_loop = loop
+        return self._slots
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        # Backpressure: wait on the loop when the backlog is full (cancellable)
+        slots = self._admission()
+        await slots.acquire()
+        loop = asyncio.get_running_loop()
+
+        submitted = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+
+        def job():
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.total_wait += time.perf_counter() - submitted
+            try:
+                result = fn(*args, **kwargs)
+                with self._lock:
+                    self.completed += 1
+                return result
+            except Exception:
+                with self._lock:
+                    self.failed += 1
+                raise
+            finally:
+                with self._lock:
+                    self.active -= 1
+
+        def finished(future):
+            # Runs when the job is over, or cancelled before it started: only then is the slot free
+            if future.cancelled():
+                with self._lock:
+                    self.queued -= 1
+            try:
+                loop.call_soon_threadsafe(slots.release)
+            except RuntimeError:
+                pass  # Loop closed
+
+        try:
+            future = self._executor.submit(job)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(finished)
+        # A cancelled caller cancels the job if it has not started; a running job keeps its slot until it returns
+        return await asyncio.wrap_future(future)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "workers": self.max_workers,
+                "queued": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "failed": self.failed,
+                "max_queue_depth": self.max_queue_depth,
+                "avg_wait_ms": round(self.total_wait / finished * 1000, 2) if finished else 0.0,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pools: Dict[str, ExecutorPool] = {
+    name: ExecutorPool(name, size, EXECUTOR_MAX_QUEUE) for name, size in EXECUTOR_POOL_SIZES.items()
+}
+
+
+async def run_blocking(kind: str, fn: Callable, *args, **kwargs) -> Any:
+    """Run a blocking callable in the pool dedicated to its workload class"""
+    pool = _pools.get(kind)
+    if pool is None:
+        raise ValueError(f"Unknown executor pool '{kind}' (expected one of: {', '.join(_pools)})")
+    return await pool.run(fn, *args, **kwargs)
+
+
+def executor_metrics() -> Dict[str, Dict[str, Any]]:
+    """Queue depth and throughput counters for every pool"""
+    return {name: pool.metrics() for name, pool in _pools.items()}
+
+
+def shutdown_executors():
+    for pool in _pools.values():
+        pool.shutdown()
+    logger.info("🧵 Executor pools shut down")
@@ -0,0 +1,75 @@
+"""
+HTTP Client Registry - One pooled keep-alive client per upstream
+Created in main.py's lifespan and closed on shutdown.
+"""
+import logging
+from typing import Dict
+
+import httpx
+
+from config import DEFAULT_TIMEOUT, DEFAULT_THREADS, HTTP_KEEPALIVE_EXPIRY, HTTP2_ENABLED
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401 - required by httpx for HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HttpClientRegistry:
+    """Shared httpx.AsyncClient instances, keyed by upstream name"""
+
+    # Default timeout (seconds) per upstream, requests can still override it
+    UPSTREAMS = {
+        "mistral": 120.0,
+        "playwright": 40.0,
+        "openweather": float(DEFAULT_TIMEOUT),
+        "generic": float(DEFAULT_TIMEOUT),
+    }
+
+    _clients: Dict[str, httpx.AsyncClient] = {}
+
+    @classmethod
+    def _build_client(cls, name: str) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=DEFAULT_THREADS,
+            max_keepalive_connections=DEFAULT_THREADS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        )
+        return httpx.AsyncClient(
+            timeout=cls.UPSTREAMS[name],
+            limits=limits,
+            http2=HTTP2_ENABLED and HTTP2_AVAILABLE,
+        )
+
+    @classmethod
+    async def start(cls):
+        """Open one client per upstream"""
+        for name in cls.UPSTREAMS:
+            if name not in cls._clients:
+                cls._clients[name] = cls._build_client(name)
+        logger.info(f"🔌 HTTP clients ready ({', '.join(cls._clients)}, http2={HTTP2_ENABLED and HTTP2_AVAILABLE})")
+
+    @classmethod
+    def get(cls, name: str = "generic") -> httpx.AsyncClient:
+        """Return the pooled client for an upstream (created lazily outside the app lifespan)"""
+        if name not in cls.UPSTREAMS:
+            name = "generic"
+        client = cls._clients.get(name)
+        if client is None or client.is_closed:
+            client = cls._build_client(name)
+            cls._clients[name] = client
+        return client
+
+    @classmethod
+    async def close(cls):
+        """Close every pooled client"""
+        for name, client in list(cls._clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close HTTP client '{name}': {e}")
+        cls._clients.clear()
+        logger.info("🔌 HTTP clients closed")
@@ -0,0 +1,220 @@
+"""
+LLM Gateway - Process-wide admission control for Mistral requests
+- Concurrency semaphore (LLM_MAX_CONCURRENCY) with a fair queue: waiting
+  sessions are served round-robin, so one busy conversation cannot starve
+  the others.
+- 429/5xx and connection errors are retried, honouring the full Retry-After,
+  otherwise with jittered exponential backoff, within the request deadline
+  (a wait that does not fit returns the error at once).
+- Circuit breaker: after LLM_BREAKER_THRESHOLD consecutive failures, calls
+  fail fast for LLM_BREAKER_COOLDOWN seconds, then one probe is let through.
+  429s are rate limiting, not failures: they never open the circuit.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Deque, Dict, Optional
+
+import httpx
+
+from config import (
+    LLM_MAX_CONCURRENCY, LLM_MAX_RETRIES, LLM_BACKOFF_BASE, LLM_BACKOFF_MAX,
+    LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN,
+)
+from .deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Mistral is failing repeatedly, requests are rejected until the cooldown ends"""
+    def __init__(self, retry_in: float):
+        self.retry_in = retry_in
+        super().__init__(f"LLM circuit open, retry in {retry_in:.0f}s")
+
+
+class LLMGateway:
+    _active = 0
+    _waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    # Circuit breaker
+    _failures = 0
+    _opened_at: Optional[float] = None
+    _probe_in_flight = False
+
+    # Metrics
+    _wait_ms: Deque[float] = deque(maxlen=500)
+    _counters: Dict[str, int] = {"requests": 0, "queued": 0, "retries": 0, "rate_limited": 0, "failures": 0, "rejected": 0}
+
+    # ==================== ADMISSION ====================
+
+    @classmethod
+    async def _acquire(cls, session_id: str):
+        if cls._active < LLM_MAX_CONCURRENCY and not cls._waiters:
+            cls._active += 1
+            cls._wait_ms.append(0.0)
+            return
+
+        cls._counters["queued"] += 1
+        fut = asyncio.get_running_loop().create_future()
+        cls._waiters.setdefault(session_id, deque()).append(fut)
+        started = time.perf_counter()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # The slot was handed over as we were cancelled: pass it on
+                cls._release()
+            else:
+                cls._discard_waiter(session_id, fut)
+            raise
+        cls._wait_ms.append((time.perf_counter() - started) * 1000)
+
+    @classmethod
+    def _release(cls):
+        """Hand the slot to the next session in round-robin order, or free it"""
+        while cls._waiters:
+            session_id, queue = next(iter(cls._waiters.items()))
+            fut = queue.popleft()
+            del cls._waiters[session_id]
+            if queue:
+                cls._waiters[session_id] = queue  # back of the line
+            if not fut.done():
+                fut.set_result(None)
+                return
+        cls._active -= 1
+
+    @classmethod
+    def _discard_waiter(cls, session_id: str, fut: asyncio.Future):
+        queue = cls._waiters.get(session_id)
+        if queue and fut in queue:
+            queue.remove(fut)
+            if not queue:
+                del cls._waiters[session_id]
+
+    # ==================== CIRCUIT BREAKER ====================
+
+    @classmethod
+    def _check_circuit(cls) -> bool:
+        """Raise when open, returns True when this call is the half-open probe"""
+        if cls._opened_at is None:
+            return False
+        elapsed = time.monotonic() - cls._opened_at
+        if elapsed < LLM_BREAKER_COOLDOWN or cls._probe_in_flight:
+            cls._counters["rejected"] += 1
+            raise CircuitOpenError(max(0.0, LLM_BREAKER_COOLDOWN - elapsed))
+        cls._probe_in_flight = True  # half-open: let one request through
+        return True
+
+    @classmethod
+    def _record(cls, success: bool):
+        cls._probe_in_flight = False
+        if success:
+            if cls._opened_at is not None:
+                logger.info("🟢 LLM circuit closed")
+            cls._failures = 0
+            cls._opened_at = None
+            return
+        cls._failures += 1
+        cls._counters["failures"] += 1
+        if cls._failures >= LLM_BREAKER_THRESHOLD and (cls._opened_at is None or time.monotonic() - cls._opened_at >= LLM_BREAKER_COOLDOWN):
+            cls._opened_at = time.monotonic()
+            logger.warning(f"🔴 LLM circuit open after {cls._failures} consecutive failures ({LLM_BREAKER_COOLDOWN:.0f}s cooldown)")
+
+    # ==================== REQUESTS ====================
+
+    @staticmethod
+    def _retry_delay(response: Optional[httpx.Response], attempt: int) -> float:
+        """Retry-After when given (uncapped, the caller checks it against the deadline), else full-jitter exponential backoff"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return max(0.0, float(retry_after))
+                except ValueError:
+                    try:
+                        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+                    except (TypeError, ValueError):
+                        pass
+        return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+
+    @classmethod
+    @asynccontextmanager
+    async def request(cls, client: httpx.AsyncClient, url: str, *, session_id: Optional[str] = None,
+                      deadline: Optional[Deadline] = None, stream: bool = False, **kwargs):
+        """
+        POST through the gateway, yields the final httpx.Response (streamed when stream=True).
+        The concurrency slot is held until the block exits; the caller checks the status.
+        """
+        session_id = session_id or "anonymous"
+        cls._counters["requests"] += 1
+        attempt = 0
+        while True:
+            probe = cls._check_circuit()
+            try:
+                await cls._acquire(session_id)
+            except asyncio.CancelledError:
+                if probe:
+                    cls._probe_in_flight = False
+                raise
+            try:
+                try:
+                    response = await client.send(client.build_request("POST", url, **kwargs), stream=stream)
+                except (httpx.TransportError, asyncio.TimeoutError) as e:
+                    cls._record(success=False)
+                    delay = cls._retry_delay(None, attempt)
+                    if attempt >= LLM_MAX_RETRIES or (deadline is not None and delay >= deadline.remaining()):
+                        raise
+                    outcome = type(e).__name__
+                else:
+                    retryable = response.status_code in RETRYABLE_STATUS
+                    if response.status_code == 429:
+                        # Mistral is up and shedding load: not a breaker failure
+                        cls._counters["rate_limited"] += 1
+                    else:
+                        cls._record(success=not retryable)
+                    delay = cls._retry_delay(response, attempt) if retryable else 0.0
+                    # Give up when out of retries or when the deadline cannot fit the wait
+                    if not retryable or attempt >= LLM_MAX_RETRIES or (deadline is not None and delay >= deadline.remaining()):
+                        try:
+                            yield response
+                        finally:
+                            await response.aclose()
+                        return
+                    await response.aclose()
+                    outcome = str(response.status_code)
+            finally:
+                if probe:
+                    # Probe cancelled before an outcome was recorded: allow another one
+                    cls._probe_in_flight = False
+                cls._release()
+
+            # Back off outside the slot
+            attempt += 1
+            cls._counters["retries"] += 1
+            logger.warning(f"🔁 Mistral {outcome}, retry {attempt}/{LLM_MAX_RETRIES} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    @classmethod
+    def stats(cls) -> Dict:
+        waits = sorted(cls._wait_ms)
+        return {
+            "max_concurrency": LLM_MAX_CONCURRENCY,
+            "active": cls._active,
+            "queued_now": sum(len(q) for q in cls._waiters.values()),
+            "sessions_waiting": len(cls._waiters),
+            "queue_wait_ms": {
+                "avg": round(sum(waits) / len(waits), 1) if waits else 0.0,
+                "p95": round(waits[int(len(waits) * 0.95) - 1], 1) if waits else 0.0,
+                "max": round(waits[-1], 1) if waits else 0.0,
+            },
+            "circuit": "closed" if cls._opened_at is None else ("half_open" if cls._probe_in_flight else "open"),
+            "consecutive_failures": cls._failures,
+            **cls._counters,
+        }
@@ -0,0 +1,163 @@
+"""
+Turn Tracing - Lightweight spans around each phase of a chat turn
+Spans nest through a ContextVar, so tool tasks started with asyncio.create_task
+inherit the step span as parent. Finished turns are kept in a ring buffer and
+exported as Chrome trace-event JSON (chrome://tracing, Perfetto).
+"""
+import asyncio
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from config import TRACE_BUFFER_SIZE
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    parent: Optional["Span"] = None
+    end: Optional[float] = None
+    lane: int = 0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    @property
+    def depth(self) -> int:
+        return 0 if self.parent is None else self.parent.depth + 1
+
+
+class Trace:
+    """All spans of one chat turn"""
+
+    def __init__(self, session_id: Optional[str], name: str = "chat_turn"):
+        self.session_id = session_id or "anonymous"
+        self.turn_id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.spans: List[Span] = []
+        self._lanes: Dict[int, int] = {}
+
+    def _lane(self) -> int:
+        """One Chrome 'thread' per asyncio task so parallel spans do not overlap"""
+        try:
+            task_id = id(asyncio.current_task())
+        except RuntimeError:
+            task_id = threading.get_ident()
+        return self._lanes.setdefault(task_id, len(self._lanes))
+
+    def finish(self):
+        self.end = time.perf_counter()
+
+    @property
+    def total_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def timing(self) -> Dict[str, Any]:
+        """Payload of the NDJSON `timing` event"""
+        return {
+            "type": "timing",
+            "turn_id": self.turn_id,
+            "total_ms": round(self.total_ms, 1),
+            "spans": [
+                {
+                    "name": s.name,
+                    "start_ms": round((s.start - self.start) * 1000, 1),
+                    "duration_ms": round(s.duration_ms, 1),
+                    "depth": s.depth,
+                    **s.attrs,
+                }
+                for s in self.spans
+            ],
+        }
+
+    def chrome_events(self) -> List[Dict[str, Any]]:
+        """Complete ('X') trace events, timestamps in microseconds since the epoch"""
+        origin = self.wall_start * 1e6
+        events = [{
+            "name": self.name, "cat": "turn", "ph": "X", "pid": 1, "tid": 0,
+            "ts": origin, "dur": self.total_ms * 1000,
+            "args": {"session_id": self.session_id, "turn_id": self.turn_id},
+        }]
+        for s in self.spans:
+            events.append({
+                "name": s.name, "cat": "span", "ph": "X", "pid": 1, "tid": s.lane,
+                "ts": origin + (s.start - self.start) * 1e6, "dur": s.duration_ms * 1000,
+                "args": {"turn_id": self.turn_id, **s.attrs},
+            })
+        return events
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Record a span in the current turn trace (no-op outside a traced turn)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    current = Span(name=name, start=time.perf_counter(), parent=_current_span.get(), lane=trace._lane(), attrs=attrs)
+    trace.spans.append(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    finally:
+        current.end = time.perf_counter()
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Closed from another context (generator finalized elsewhere)
+            _current_span.set(current.parent)
+
+
+@contextmanager
+def traced_turn(session_id: Optional[str]):
+    """Activate a new Trace for the enclosed turn and store it in the ring buffer"""
+    trace = Trace(session_id)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        trace.finish()
+        TraceStore.add(trace)
+        try:
+            _current_trace.reset(token)
+        except ValueError:
+            _current_trace.set(None)
+
+
+class TraceStore:
+    """Ring buffer of the last TRACE_BUFFER_SIZE turn traces"""
+
+    _traces: Deque[Trace] = deque(maxlen=TRACE_BUFFER_SIZE)
+    _lock = threading.Lock()
+
+    @classmethod
+    def add(cls, trace: Trace):
+        with cls._lock:
+            cls._traces.append(trace)
+
+    @classmethod
+    def for_session(cls, session_id: str) -> List[Trace]:
+        with cls._lock:
+            return [t for t in cls._traces if t.session_id == session_id]
+
+    @classmethod
+    def chrome_export(cls, session_id: str) -> Dict[str, Any]:
+        """Chrome trace-event JSON object for every buffered turn of a session"""
+        events = []
+        for trace in cls.for_session(session_id):
+            events.extend(trace.chrome_events())
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, LargeBinary
 from sqlalchemy.sql import func
 from ..core.database import Base
 
@@ -9,12 +9,21 @@ class ChatSession(Base):
     title = Column(String, default="New Chat")
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
+    # Rolling summary of the messages evicted from the context, written by ConversationSummarizer
+    summary = Column(Text, nullable=True)
+    summary_upto_id = Column(Integer, nullable=True)  # Last ChatMessage.id folded into the summary
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # Newest-first scans of one session (token-budget history fetch)
+        Index("ix_chat_messages_session_id_id", "session_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     session_id = Column(String, ForeignKey("chat_sessions.id"))
     role = Column(String) 
     content = Column(Text)
+    token_count = Column(Integer, nullable=True)  # Set at write time, NULL for rows older than the column
+    embedding = Column(LargeBinary, nullable=True)  # Normalized float32 vector (MessageIndex), NULL without the embedding model
     timestamp = Column(DateTime, server_default=func.now())
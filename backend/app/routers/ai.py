@@ -33,7 +33,7 @@ async def chat_endpoint(request: ChatRequest, db: Session = Depends(get_db)):
              HistoryService.create_session(db, request.session_id)
 
     return StreamingResponse(
-        AIService.get_chat_response_stream(request.message, request.session_id, db, request.context),
+        AIService.get_chat_response_stream(request.message, request.session_id, db, request.context, use_cache=not request.bypass_cache),
         media_type="text/event-stream"
     )
 
@@ -42,7 +42,7 @@ async def chat_endpoint(request: ChatRequest, db: Session = Depends(get_db)):
 async def scrape_endpoint(request: ScrapeRequest):
     """Scrape content from URL"""
     try:
-        content = ScrapingService.scrape_url(request.url)
+        content = await ScrapingService.scrape_url(request.url)
         return {"title": "Scraped Content", "extracted_data": content}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,106 @@
+"""
+Metrics Router - Runtime counters for performance tuning
+"""
+
+from fastapi import APIRouter
+from ..core.executors import executor_metrics
+from ..core.llm_gateway import LLMGateway
+from ..services.tool_cache import ToolResultCache
+from ..services.observation_compressor import ObservationCompressor
+from ..services.answer_cache import SemanticAnswerCache
+from ..services.tool_call_parser import ToolCallStats
+from ..services.intent_router import IntentRouter
+from ..services.tool_selector import ToolSelector
+from ..services.summary_service import ConversationSummarizer
+from ..services.message_index import MessageIndex
+from ..services.tokenizers import TokenizerCalibration
+from ..services.ai_service import AIService
+
+router = APIRouter()
+
+
+@router.get("/executors")
+def get_executor_metrics():
+    """Queue depth and throughput of the blocking-work pools"""
+    return executor_metrics()
+
+
+@router.get("/llm")
+def get_llm_metrics():
+    """Mistral gateway: concurrency, queue wait, retries and circuit state"""
+    return LLMGateway.stats()
+
+
+@router.get("/tool-calls")
+def get_tool_call_metrics():
+    """Native vs fallback tool-call parsing, and parse failures per 100 ReAct steps"""
+    return ToolCallStats.stats()
+
+
+@router.get("/fast-path")
+def get_fast_path_metrics():
+    """Requests answered locally by the intent router, per intent"""
+    return IntentRouter.stats()
+
+
+@router.get("/tool-selection")
+def get_tool_selection_metrics():
+    """Per-request tool library pruning: tools sent, prompt tokens saved, fallbacks to the full list"""
+    return ToolSelector.stats()
+
+
+@router.get("/tokens")
+def get_token_count_metrics():
+    """Hit rate of the memoized token counter, and local vs Mistral-reported prompt tokens per model"""
+    return {**AIService.get_context_manager().token_cache_stats(), "calibration": TokenizerCalibration.stats()}
+
+
+@router.get("/summaries")
+def get_summary_metrics():
+    """Background rolling summaries: refreshes, skips below the threshold, failures"""
+    return ConversationSummarizer.stats()
+
+
+@router.get("/message-index")
+def get_message_index_metrics():
+    """Per-session message embeddings: sessions cached, searches, relevant messages added to contexts"""
+    return MessageIndex.stats()
+
+
+@router.get("/vector-memory")
+def get_vector_memory_metrics():
+    """Vector memory log: records since the last snapshot, fsyncs, snapshots, torn records dropped at load"""
+    vector_memory = AIService.get_vector_memory()
+    return vector_memory.persistence_stats() if vector_memory else {"available": False}
+
+
+@router.get("/tool-cache")
+def get_tool_cache_metrics():
+    """Hit/miss counters of the tool result cache"""
+    return ToolResultCache.stats()
+
+
+@router.delete("/tool-cache")
+def clear_tool_cache():
+    """Drop every cached tool result"""
+    ToolResultCache.clear()
+    return {"status": "cleared"}
+
+
+@router.get("/observations")
+def get_observation_metrics():
+    """Token budgets and tokens dropped by the observation compressor, per tool"""
+    return ObservationCompressor.stats()
+
+
+@router.get("/answer-cache")
+def get_answer_cache_metrics():
+    """Hit/miss counters of the semantic answer cache"""
+    return SemanticAnswerCache.stats()
+
+
+@router.delete("/answer-cache")
+def clear_answer_cache():
+    """Drop every cached answer"""
+    SemanticAnswerCache.clear()
+    return {"status": "cleared"}
@@ -7,6 +7,7 @@ from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import json
 from ..services.sandbox_service import SandboxService
+from ..core.executors import run_blocking
 
 router = APIRouter()
 
@@ -20,11 +21,11 @@ class SandboxRequest(BaseModel):
 async def run_in_sandbox(request: SandboxRequest):
     """Execute code or command in the sandbox (non-streaming)"""
     if request.code:
-        result = SandboxService.execute_code(request.code)
+        result = await SandboxService.execute_code(request.code)
         return {"type": "code_execution", "output": result}
     
     if request.command:
-        result = SandboxService.execute_command(request.command)
+        result = await SandboxService.execute_command(request.command)
         return {"type": "shell_execution", "output": result}
         
     raise HTTPException(status_code=400, detail="No code or command provided")
@@ -37,7 +38,9 @@ async def stream_command(command: str):
     Usage: GET /api/sandbox/stream?command=ping%20google.com%20-c%205
     """
     async def generate():
-        for line in SandboxService.execute_command_stream(command):
+        lines = SandboxService.execute_command_stream(command)
+        # Each readline blocks, pull them from the subprocess pool
+        while (line := await run_blocking("subprocess", next, lines, None)) is not None:
             yield f"data: {json.dumps({'line': line})}\n\n"
         yield f"data: {json.dumps({'done': True})}\n\n"
     
@@ -0,0 +1,22 @@
+"""
+Traces Router - Per-turn span traces as Chrome trace-event JSON
+Open the downloaded file in chrome://tracing or https://ui.perfetto.dev
+"""
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from ..core.tracing import TraceStore
+
+router = APIRouter()
+
+
+@router.get("/{session_id}")
+def get_session_traces(session_id: str):
+    """Buffered turn traces of a session (most recent TRACE_BUFFER_SIZE turns overall)"""
+    export = TraceStore.chrome_export(session_id)
+    if not export["traceEvents"]:
+        raise HTTPException(status_code=404, detail="No trace buffered for this session")
+    return JSONResponse(
+        export,
+        headers={"Content-Disposition": f'attachment; filename="trace-{session_id}.json"'}
+    )
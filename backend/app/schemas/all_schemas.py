@@ -16,6 +16,7 @@ class ChatRequest(BaseModel):
     message: str
     context: list = []
     session_id: str | None = None
+    bypass_cache: bool = False  # Skip the semantic answer cache for this message
 
 class ToolStep(BaseModel):
     tool: str
@@ -0,0 +1,134 @@
+"""
+Tool argument models - one pydantic model per agent tool.
+Validators are compiled once when this module is imported; the tool
+registry derives validation, dispatch and the prompt from these models.
+"""
+import re
+from pydantic import BaseModel, ConfigDict, Field, AliasChoices, field_validator, model_validator
+from typing import Literal, Optional
+
+URL_PATTERN = re.compile(
+    r'^https?://'
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'
+    r'localhost|'
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'
+    r'(?::\d+)?'
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+
+DANGEROUS_COMMANDS = ["rm -rf", "sudo ", "dd ", "> /", ":(){ :|:& };:"]
+
+
+class ToolArgs(BaseModel):
+    """Root-level tool parameters ('tool' and 'private' keys are ignored)"""
+    model_config = ConfigDict(extra="ignore", populate_by_name=True)
+
+
+class SearchArgs(ToolArgs):
+    query: str = Field(..., min_length=3, max_length=200)
+
+
+class ScrapeArgs(ToolArgs):
+    url: str
+
+    @field_validator("url")
+    @classmethod
+    def check_url(cls, v: str) -> str:
+        if not URL_PATTERN.match(v):
+            raise ValueError("Provide a valid HTTP or HTTPS URL")
+        return v
+
+
+class SandboxArgs(ToolArgs):
+    code: str = Field(..., min_length=1, max_length=5000)
+
+
+class CommandArgs(ToolArgs):
+    command: str = Field(..., min_length=1)
+
+    @field_validator("command")
+    @classmethod
+    def check_dangerous(cls, v: str) -> str:
+        if any(cmd in v for cmd in DANGEROUS_COMMANDS):
+            raise ValueError("Potentially dangerous command detected. Restricted command, try a different approach")
+        return v
+
+
+class ManageNotesArgs(ToolArgs):
+    action: Literal["create", "search", "update", "delete", "categories"]
+    title: Optional[str] = None
+    content: Optional[str] = None
+    category: str = "General"
+    tags: str = ""
+    query: Optional[str] = None
+    id: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_action(self):
+        if self.action in ("update", "delete") and self.id is None:
+            raise ValueError(f"'id' is required to {self.action} a note")
+        return self
+
+
+class ManageCalendarArgs(ToolArgs):
+    action: Literal["add", "list", "remove", "update"]
+    title: Optional[str] = None
+    start: Optional[str] = Field(None, description="YYYY-MM-DD HH:MM")
+    end: Optional[str] = None
+    description: Optional[str] = None
+    id: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_action(self):
+        if self.action == "add" and not (self.title and self.start):
+            raise ValueError("'title' and 'start' are required to add an event")
+        if self.action in ("remove", "update") and not self.id:
+            raise ValueError(f"'id' is required to {self.action} an event")
+        return self
+
+
+class ManageWalletArgs(ToolArgs):
+    action: Literal["balance", "history", "prepare_transfer"]
+    address: Optional[str] = None
+    to: Optional[str] = None
+    amount: Optional[float] = None
+
+    @model_validator(mode="after")
+    def check_action(self):
+        if self.action in ("balance", "history") and not self.address:
+            raise ValueError(f"'address' is required for {self.action}")
+        if self.action == "prepare_transfer" and not (self.address and self.to and self.amount):
+            raise ValueError("'address' (sender), 'to' and 'amount' are required for prepare_transfer")
+        return self
+
+
+class GetTimeArgs(ToolArgs):
+    pass
+
+
+class GetWeatherArgs(ToolArgs):
+    city: str = Field(..., min_length=1, validation_alias=AliasChoices("city", "location"))
+
+
+class ImageSearchArgs(ToolArgs):
+    query: str = Field(..., min_length=2)
+
+
+class VideoSearchArgs(ToolArgs):
+    query: str = Field(..., min_length=2)
+
+
+class VisionAnalyzeArgs(ToolArgs):
+    image_path: Optional[str] = None
+    image_url: Optional[str] = None
+    prompt: str = "Describe this image in detail."
+
+    @model_validator(mode="after")
+    def check_source(self):
+        if not (self.image_path or self.image_url):
+            raise ValueError("Provide 'image_path' or 'image_url'")
+        return self
+
+
+class OsintLookupArgs(ToolArgs):
+    target: str = Field(..., min_length=1)
+    type: Literal["username", "domain", "email"]
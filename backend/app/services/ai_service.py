@@ -1,10 +1,11 @@
 import httpx
 import logging
 import json
-import sys
 import os
 import time
 import re
+import asyncio
+from contextlib import aclosing
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
 
@@ -13,10 +14,36 @@ logger = logging.getLogger(__name__)
 
 MISTRAL_API_URL = "https://api.mistral.ai/v1/chat/completions"
 MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
+# Consume Mistral's SSE deltas instead of waiting for the full completion
+MISTRAL_STREAMING = os.getenv("MISTRAL_STREAMING", "true").lower() == "true"
+
+# Corrections fed back to the model, worded for the tool-call protocol in use
+PARSE_ERROR_TEXT = "PARSE ERROR: Your tool call is not valid JSON (unbalanced braces or bad escaping). Send it again as one valid JSON object."
+PARSE_ERROR_NATIVE = "PARSE ERROR: Your tool call arguments are not a valid JSON object. Call the tool again with valid arguments."
+MISSING_CALL_TEXT = "SYSTEM ALERT: You announced an action but forgot the JSON tool call. DO NOT TALK. USE THE TOOL NOW."
+MISSING_CALL_NATIVE = "SYSTEM ALERT: You announced an action but did not call the tool. DO NOT TALK. CALL THE TOOL NOW."
 
 from .loop_detector import LoopDetector
 from .reflection_layer import ReflectionLayer
-from .context_manager import ContextManager
+from .context_manager import ContextManager, RunningContext, BudgetProfile
+from .tokenizers import TokenizerCalibration
+from .model_router import ModelRouter
+from .tool_call_parser import IncrementalJSONScanner, NativeToolCalls, ToolCallStats
+from .tool_registry import ToolRegistry
+from .tool_cache import ToolResultCache
+from .prompt_builder import SystemPrompt
+from .observation_compressor import ObservationCompressor
+from .answer_cache import SemanticAnswerCache
+from .intent_router import IntentRouter
+from .tool_selector import ToolSelector
+from .summary_service import ConversationSummarizer
+from .message_index import MessageIndex
+from ..core.http_clients import HttpClientRegistry
+from ..core.executors import run_blocking
+from ..core.deadline import Deadline, DeadlineExceeded
+from ..core.llm_gateway import LLMGateway, CircuitOpenError
+from ..core.tracing import span, traced_turn
+from config import CHAT_DEADLINE_SECONDS, PREFETCH_TIMEOUTS, MISTRAL_FUNCTION_CALLING, FAST_PATH_ENABLED, HISTORY_TOKEN_BUDGET, HISTORY_MAX_MESSAGES, RELEVANT_HISTORY_TOP_K, MISTRAL_LARGE_MODEL
 try:
     from .vector_memory import VectorMemory
     VECTOR_MEMORY_AVAILABLE = True
@@ -24,6 +51,14 @@ except ImportError:
     VECTOR_MEMORY_AVAILABLE = False
     logger.warning("⚠️ Vector Memory not available (install sentence-transformers + faiss-cpu)")
 
+
+class MistralAPIError(Exception):
+    """Non-200 answer from the Mistral API"""
+    def __init__(self, status_code: int):
+        super().__init__(f"Mistral API returned {status_code}")
+        self.status_code = status_code
+
+
 class AIService:
     # Instances globales (singleton pattern)
     _vector_memory = None
@@ -40,63 +75,98 @@ class AIService:
     def get_context_manager():
         """Lazy initialization du gestionnaire de contexte"""
         if AIService._context_manager is None:
-            AIService._context_manager = ContextManager(max_tokens=30000)
+            # Budgeted for the large model, which writes the syntheses and final answers
+            AIService._context_manager = ContextManager(model=MISTRAL_LARGE_MODEL)
+            SystemPrompt.warmup(AIService._context_manager._count_tokens)
         return AIService._context_manager
     
     @staticmethod
-    async def get_chat_response_stream(message: str, session_id: str, db: Session, context: list = None, is_discord: bool = False):
-        import re
-        import time
-        from .scraping_service import ScrapingService
-        from .search_service import SearchService
-        from .sandbox_service import SandboxService
-        from .account_service import AccountService
+    async def get_chat_response_stream(message: str, session_id: str, db: Session, context: list = None, is_discord: bool = False, use_cache: bool = True):
+        """NDJSON event stream of one chat turn, closed by a `timing` event"""
+        with traced_turn(session_id) as trace:
+            async with aclosing(AIService._chat_turn(message, session_id, db, context, is_discord, use_cache)) as events:
+                async for event in events:
+                    yield event
+        yield json.dumps(trace.timing()) + "\n"
+
+    @staticmethod
+    async def _chat_turn(message: str, session_id: str, db: Session, context: list = None, is_discord: bool = False, use_cache: bool = True):
         from .memory_service import MemoryService
-        from .calendar_service import CalendarService
-        from .crypto_service import CryptoService
-        from .realtime_service import RealtimeService
-        from .image_search_service import ImageSearchService
-        from .video_search_service import VideoSearchService
-        from .osint_service import OSINTService
-        from .time_service import TimeService
-        from .weather_service import WeatherService
-        from .notes_service import NotesService
-        from .vision_service import VisionService
-        from ..schemas.notes import NoteCreate, NoteUpdate, NoteResponse
-        from ..schemas.notes import NoteCreate, NoteUpdate, NoteResponse
-        from ..core.database import SessionLocal
         from ..services.history_service import HistoryService
-        from sqlalchemy.orm import Session
         
-        start_time = time.time()
-        TIMEOUT_SECONDS = 60 # Extended for complex reasoning
+        deadline = Deadline(CHAT_DEADLINE_SECONDS)
+        vector_memory = AIService.get_vector_memory()
+
+        # The question is embedded once (cpu pool, next to the DB write and the fast path rules),
+        # every semantic lookup of the turn awaits that single vector
+        query_vector = None
+        if vector_memory is not None and getattr(vector_memory, "model", None) is not None:
+            query_vector = asyncio.ensure_future(AIService._embed_query(vector_memory, message))
         
-        # 0. PERSISTENCE LAYER - SAVE USER MESSAGE
+        # 0. PERSISTENCE LAYER - SAVE USER MESSAGE (its embedding is indexed in the background)
+        saved_message = None
         if session_id and db:
              try:
-                 HistoryService.add_message(db, session_id, "user", message)
+                 with span("history.save_user"):
+                     saved_message = await run_blocking("db", HistoryService.add_message, db, session_id, "user", message)
+                 HistoryService.schedule_index(saved_message, query_vector)
              except Exception as e:
                  logger.error(f"Failed to save user message: {e}")
 
         # 1. INITIALISER LES SYSTÈMES INTELLIGENTS
         loop_detector = LoopDetector(max_history=12, max_repeats=2)
+        model_router = ModelRouter()
         context_manager = AIService.get_context_manager()
-        vector_memory = AIService.get_vector_memory()
         
-        # 2. RECHERCHE SÉMANTIQUE DANS LA MÉMOIRE
+        # 1a. LOCAL FAST PATH (time, date, arithmetic, events, weather: no LLM round trip)
+        if FAST_PATH_ENABLED:
+            with span("fast_path") as fast_span:
+                fast = await IntentRouter.try_answer(message, vector_memory, query_vector)
+                if fast_span:
+                    fast_span.attrs["intent"] = fast.intent if fast else None
+            if fast:
+                yield json.dumps({"type": "step_start", "tool": fast.tool, "input": fast.input}) + "\n"
+                yield json.dumps({"type": "step_end", "tool": fast.tool, "input": fast.input, "output": fast.output, "status": "success"}) + "\n"
+                if session_id and db:
+                    try:
+                        HistoryService.schedule_index(await run_blocking("db", HistoryService.add_message, db, session_id, "assistant", fast.answer))
+                    except Exception as e:
+                        logger.error(f"Failed to save assistant response: {e}")
+                yield json.dumps({"type": "final", "content": fast.answer, "fast_path": fast.intent}) + "\n"
+                return
+
+        # 1b. SEMANTIC ANSWER CACHE (opt-in, skipped with bypass_cache)
+        # Standalone questions only: a follow-up ("et en Python ?") means something else in another conversation
+        answer_embedding = None
+        if use_cache and SemanticAnswerCache.enabled(vector_memory) and await AIService._is_standalone(session_id, saved_message, context):
+            with span("answer_cache.lookup") as cache_span:
+                cached, answer_embedding = await run_blocking("cpu", SemanticAnswerCache.lookup, vector_memory, message, await query_vector)
+                if cache_span:
+                    cache_span.attrs["hit"] = cached is not None
+            if cached:
+                logger.info(f"⚡ Answer cache hit ({cached['score']:.3f}): {cached['question'][:60]}")
+                if session_id and db:
+                    try:
+                        HistoryService.schedule_index(await run_blocking("db", HistoryService.add_message, db, session_id, "assistant", cached["answer"]))
+                    except Exception as e:
+                        logger.error(f"Failed to save assistant response: {e}")
+                yield json.dumps({"type": "final", "content": cached["answer"], "cached": True, "score": round(cached["score"], 3)}) + "\n"
+                return
+        tools_used = set()
+        tool_failed = False
+        
+        # 2. PRE-FETCH STAGE (memories, stats, history run concurrently)
+        prefetched = await AIService._prefetch_context(message, session_id, db, vector_memory, deadline, query_vector)
+        
         memory_context = ""
-        if vector_memory:
-            relevant_memories = vector_memory.search(message, top_k=3, min_score=0.45)
-            if relevant_memories:
-                memory_texts = [f"- {mem['text'][:150]}" for mem in relevant_memories]
-                memory_context = f"\nRELEVANT_MEMORIES_FROM_PAST:\n" + "\n".join(memory_texts)
-                logger.info(f"🧠 Found {len(relevant_memories)} relevant memories")
+        relevant_memories = prefetched.get("vector")
+        if relevant_memories:
+            memory_texts = [f"- {mem['text'][:150]}" for mem in relevant_memories]
+            memory_context = f"\nRELEVANT_MEMORIES_FROM_PAST:\n" + "\n".join(memory_texts)
+            logger.info(f"🧠 Found {len(relevant_memories)} relevant memories")
         
-        # 3. GATHER SYSTEM STATS
-        memory_summary = MemoryService.build_context_summary()
+        # 3. SYSTEM STATS
         current_entities = MemoryService.extract_entities(message)
-        
-        system_stats = {}
         connected_wallet = "NONE"
         
         # Use provided context only for system state extraction (legacy frontend context)
@@ -107,18 +177,15 @@ class AIService:
                     connected_wallet = content.split("CONNECTED_WALLET:")[1].strip()
                     break
 
-        try:
-            sessions = AccountService.list_accounts()
-            system_stats = {
-                "active_sessions": sessions,
-                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "recent_topics": MemoryService.get_recent_topics(limit=5),
-                "memory_summary": memory_summary,
-                "connected_wallet": connected_wallet
-            }
-        except Exception as e:
-            logger.warning(f"Warmup pre-fetch failed: {e}")
-            system_stats = {"error": "Stats incomplete", "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")}
+        # Dropped sources are left out rather than delaying the turn
+        system_stats = {
+            "active_sessions": prefetched.get("accounts"),
+            "timestamp": time.strftime("%Y-%m-%d %H:%M"),
+            "recent_topics": prefetched.get("recent_topics"),
+            "memory_summary": prefetched.get("memory_summary"),
+            "connected_wallet": connected_wallet
+        }
+        system_stats = {k: v for k, v in system_stats.items() if v is not None}
         
         yield json.dumps({"type": "info", "content": "Eveline initializing context & neural memory..."}) + "\n"
 
@@ -131,322 +198,497 @@ class AIService:
             "Content-Type": "application/json",
         }
         
-        # 4. ADVANCED SYSTEM PROMPT
-        system_prompt_content = (
-            "You are Eveline, a personal AI assistant. You help with EVERYDAY tasks.\n"
-            "Date: {{currentDateTime}}.\n\n"
-            "<directives>\n"
-            "- LANGUAGE: You MUST answer in FRENCH (Français) unless explicitly asked otherwise.\n"
-            "- BE USEFUL: Help with daily tasks: reminders, calculations, research, planning, organization.\n"
-            "- SPEED AND ACTION: Use tools immediately. Do not announce them.\n"
-            "- DIRECT RESPONSES: Be concise and helpful. No fluff.\n"
-            "- PERSISTENCE: If research is needed, use search/scrape as a chain.\n"
-            "- NO CHATTER: Do not say 'I will search...'. Just output the JSON Action.\n"
-            "- PROACTIVE: Suggest improvements, remind about upcoming events, be anticipatory.\n"
-            "- LEARN FROM COMMANDS: Remember command outputs for future reference.\n"
-            "</directives>\n\n"
-            
-            "<everyday_capabilities>\n"
-            "You can help with:\n"
-            "- Quick calculations (use sandbox for math)\n"
-            "- Setting reminders and calendar events\n"
-            "- Research and web lookups\n"
-            "- File and system management (via command tool)\n"
-            "- Note taking and organization\n"
-            "- Weather and time information\n"
-            "- Crypto portfolio monitoring\n"
-            "- Image analysis and search\n"
-            "- Learning and remembering Linux commands\n"
-            "</everyday_capabilities>\n\n"
-        )
-        
-        if memory_context:
-            system_prompt_content += memory_context + "\n\n"
-
-        if is_discord:
-            system_prompt_content += "\n<discord_mode>You are on Discord. Be cool, use emojis, keep it crisp.</discord_mode>\n"
-
-        system_prompt_content += (
-            "<tools_library>\n"
-            "Format: {\"tool\": \"name\", \"parameter_key\": \"value\", \"private\": boolean} \n"
-            "- Add \"private\": true to ANY tool call if you want to execute it without showing the output to the user.\n"
-            "- Root level parameters only, NO nesting under 'param'.\n\n"
-            "EVERYDAY TOOLS:\n"
-            "1. search: {\"query\": \"...\"} - Web search\n"
-            "2. scrape: {\"url\": \"...\"} - Extract text from URL\n"
-            "3. sandbox: {\"code\": \"...\"} - Execute Python (calculations, scripts). Use print() for output.\n"
-            "4. command: {\"command\": \"...\"} - Shell/Linux commands. LEARN from results.\n"
-            "5. manage_notes: {\"action\": \"create|search|update|delete\", \"title\": \"...\", \"content\": \"...\", \"category\": \"General\"}\n"
-            "6. manage_calendar: {\"action\": \"add|list|remove\", \"title\": \"...\", \"start\": \"YYYY-MM-DD HH:MM\", \"description\": \"...\"}\n"
-            "7. manage_wallet: {\"action\": \"balance|history|prepare_transfer\", ...}\n"
-            "8. get_time: {} - Current time\n"
-            "9. get_weather: {\"city\": \"...\"} - Weather info\n"
-            "10. image_search: {\"query\": \"...\"} - Find images\n"
-            "11. vision_analyze: {\"image_path\": \"...\", \"image_url\": \"...\", \"prompt\": \"...\"} - Analyze images\n"
-            "12. osint_lookup: {\"target\": \"...\", \"type\": \"username|domain|email\"}\n"
-            "</tools_library>\n\n"
-        )
-        
+        # 4. ADVANCED SYSTEM PROMPT (precomputed static prefix, volatile parts go after it)
+        prompt_variant = "discord" if is_discord else "default"
+        # Only the tools relevant to this request go into the prompt (full list on a validation miss)
+        with span("tools.select") as select_span:
+            tool_names = await run_blocking("cpu", ToolSelector.select, message, vector_memory, await query_vector if query_vector else None)
+            if select_span:
+                select_span.attrs["tools"] = len(tool_names) if tool_names is not None else "all"
+        system_prompt_content = SystemPrompt.get(prompt_variant, tool_names)
+        system_prompt_tokens = SystemPrompt.token_count(prompt_variant, tool_names)
+        if tool_names is not None and system_prompt_tokens is not None:
+            ToolSelector.record(tool_names, (SystemPrompt.token_count(prompt_variant) or 0) - system_prompt_tokens)
+        else:
+            ToolSelector.record(tool_names)
         
         # 5. CONTEXT MANAGEMENT (TikToken Optimized)
         
-        # Build history from DB if available
-        history_for_context = []
-        if session_id and db:
-             try:
-                 # Fetch last 15 messages (Chronological)
-                 db_history = HistoryService.get_session_history(db, session_id, limit=15)
-                 # Format and EXCLUDE the last message (which is the current user message we just added)
-                 # HistoryService.get_session_history returns chronological [oldest ... newest]
-                 if db_history and db_history[-1].role == "user" and db_history[-1].content == message:
-                      db_history = db_history[:-1]
-                 
-                 history_for_context = [{"role": m.role, "content": m.content} for m in db_history]
-             except Exception as e:
-                 logger.error(f"Failed to fetch history: {e}")
-                 history_for_context = context if context else [] # Fallback
+        # History from DB if available (fetched during pre-fetch)
+        db_history = prefetched.get("history")
+        relevant_history = []
+        if db_history is not None:
+            # Format and EXCLUDE the last message (which is the current user message we just added)
+            # HistoryService.load_history_within_budget returns chronological [oldest ... newest]
+            if db_history and db_history[-1].role == "user" and db_history[-1].content == message:
+                 db_history = db_history[:-1]
+            # A nearly full window means older messages were left out: fold them into the rolling summary
+            if db_history and (
+                len(db_history) >= HISTORY_MAX_MESSAGES - 1
+                or sum(m.token_count or len(m.content) // 4 for m in db_history) >= HISTORY_TOKEN_BUDGET // 2
+            ):
+                ConversationSummarizer.schedule(session_id, db_history[0].id)
+            
+            history_for_context = [{"role": m.role, "content": m.content, "token_count": m.token_count} for m in db_history]
+
+            # Older messages close to the question (candidates already in the recent tail are dropped)
+            candidates = prefetched.get("relevant_history")
+            if candidates and (db_history or saved_message is not None):
+                before_id = db_history[0].id if db_history else saved_message.id
+                relevant_history = [m for m in candidates if m["id"] < before_id][:RELEVANT_HISTORY_TOP_K]
+                MessageIndex.record_results(len(relevant_history))
         else:
-             history_for_context = context if context else []
-
-        current_context = context_manager.build_optimized_context(
-            system_prompt=system_prompt_content,
-            user_query=message,
-            history=history_for_context,
-            system_info=system_stats
-        )
-        
-        current_context = AIService._clean_context(current_context)
+            history_for_context = context if context else [] # Fallback
+
+        with span("context.build"):
+            base_context = await run_blocking(
+                "cpu",
+                context_manager.build_optimized_context,
+                system_prompt=system_prompt_content,
+                user_query=message,
+                history=history_for_context,
+                system_info=system_stats,
+                system_prompt_tokens=system_prompt_tokens,
+                dynamic_context=memory_context,
+                conversation_summary=prefetched.get("summary"),
+                relevant_history=relevant_history
+            )
+            base_context = AIService._clean_context(base_context)
+            # Steps appended by the ReAct loop are re-budgeted as they come
+            current_context = await run_blocking(
+                "cpu",
+                RunningContext,
+                base_context,
+                context_manager._count_tokens,
+                context_manager.max_tokens,
+                static_prefix=system_prompt_content,
+                static_prefix_tokens=system_prompt_tokens,
+                count_many=context_manager.count_many
+            )
         
-        last_tool_call = None
-        search_count = 0
         max_steps = 10
         
         try:
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                for step_i in range(max_steps):
-                    if time.time() - start_time > TIMEOUT_SECONDS:
-                         yield json.dumps({"type": "final", "content": "⏱️ Timeout de recherche. Voici ma synthèse actuelle."}) + "\n"
-                         return
-
-                    payload = {
-                        "model": "mistral-large-latest",
-                        "messages": current_context,
-                        "stream": False,
-                        "temperature": 0.1,
-                        "max_tokens": 2000
-                    }
-                    
-                    try:
-                        response = await client.post(MISTRAL_API_URL, headers=headers, json=payload)
-                        if response.status_code != 200:
-                            yield json.dumps({"type": "error", "content": f"🌐 API Error {response.status_code}"}) + "\n"
-                            return
-                        data = response.json()
-                        ai_content = data["choices"][0]["message"]["content"]
-                    except Exception as e:
-                        yield json.dumps({"type": "error", "content": f"🌐 Connection Error: {str(e)}"}) + "\n"
-                        return
-                    
-                    yield json.dumps({"type": "thought", "content": ai_content}) + "\n"
-                    
-                    # 6. TOOL EXTRACTION & VALIDATION
-                    tool_call = None
-                    try:
-                        json_match = re.search(r'(\{.*?\})', ai_content, re.DOTALL)
-                        if json_match:
-                            tool_call = json.loads(json_match.group(1))
-                            
-                            # Fallback auto-tool name
-                            if "tool" not in tool_call and "action" in tool_call:
-                                if tool_call["action"] in ["create", "update", "delete", "search", "categories"]:
-                                    tool_call["tool"] = "manage_notes"
-                                elif tool_call["action"] in ["balance", "history", "prepare_transfer"]:
-                                    tool_call["tool"] = "manage_wallet"
-                    except Exception:
-                        pass 
-                    
-                    # 7. ANTI-CHATTER REFLECTION
-                    if not tool_call:
-                        lower_c = ai_content.lower()
-                        intents = ["je vais", "i will", "recherche", "let me", "checking"]
-                        hints = ["search", "recherche", "note", "scrape", "image", "wallet"]
-                        if any(i in lower_c for i in intents) and any(h in lower_c for h in hints) and len(ai_content) < 250:
-                            current_context.append({"role": "assistant", "content": ai_content})
-                            current_context.append({"role": "user", "content": "SYSTEM ALERT: You announced an action but forgot the JSON tool call. DO NOT TALK. USE THE TOOL NOW."})
-                            continue
+            client = HttpClientRegistry.get("mistral")
+            for step_i in range(max_steps):
+                if deadline.expired:
+                     yield json.dumps({"type": "final", "content": "⏱️ Timeout de recherche. Voici ma synthèse actuelle."}) + "\n"
+                     return
+
+                model, route_reason = model_router.choose()
+                small_step = ModelRouter.is_small(model)
+                # Planning drafts may be discarded for the large model's answer, do not stream them
+                draft_step = ModelRouter.is_draft(model)
+                payload = {
+                    "model": model,
+                    "messages": current_context.messages,
+                    "stream": MISTRAL_STREAMING,
+                    "temperature": 0.1,
+                    "max_tokens": BudgetProfile.for_model(model).reserved_output
+                }
+                # Local estimate of the prompt, compared with Mistral's usage (tokenizer calibration)
+                prompt_tokens = current_context.total
+                if MISTRAL_FUNCTION_CALLING:
+                    payload["tools"] = ToolRegistry.function_definitions(tool_names)
+                    payload["tool_choice"] = "auto"
+                    prompt_tokens += context_manager.count_tokens(json.dumps(payload["tools"]))
+                
+                ai_content = ""
+                streamed_calls = None
+                scanner = IncrementalJSONScanner()
+                native = NativeToolCalls()
+                first_token_ms = None
+                llm_started = time.perf_counter()
+                try:
+                    with span("llm", step=step_i + 1, model=model, streaming=MISTRAL_STREAMING, context_tokens=current_context.total) as llm_span:
+                        if MISTRAL_STREAMING:
+                            # Forward prose tokens as they arrive, stop as soon as a tool call JSON is complete
+                            forwarded = 0
+                            async with aclosing(AIService._stream_completion(client, headers, payload, session_id, deadline, prompt_tokens)) as deltas:
+                                while True:
+                                    # The deadline bounds each read, never our own yields to the client
+                                    try:
+                                        async with deadline.scope():
+                                            delta = await deltas.__anext__()
+                                    except StopAsyncIteration:
+                                        # Stream ended inside an array of calls
+                                        streamed_calls = (streamed_calls or []) + scanner.close() or None
+                                        break
+                                    if first_token_ms is None:
+                                        first_token_ms = round((time.perf_counter() - llm_started) * 1000, 1)
+                                        if llm_span:
+                                            llm_span.attrs["first_token_ms"] = first_token_ms
+                                    native.feed(delta.get("tool_calls"))
+                                    if not delta.get("content"):
+                                        continue
+                                    completed = scanner.feed(delta["content"])
+                                    ai_content = scanner.buffer
+
+                                    visible = ai_content if scanner.first_open is None else ai_content[:scanner.first_open]
+                                    if draft_step:
+                                        # The small model is answering instead of planning: stop, the large one will answer
+                                        if "Final Answer:" in visible:
+                                            break
+                                    elif len(visible) > forwarded:
+                                        channel = "final" if "Final Answer:" in visible else "thought"
+                                        yield json.dumps({"type": "token", "channel": channel, "content": visible[forwarded:]}) + "\n"
+                                        forwarded = len(visible)
+
+                                    if completed:
+                                        streamed_calls = (streamed_calls or []) + completed
+                                    if streamed_calls and not scanner.in_object and not scanner.in_array:
+                                        break
+                        else:
+                            reply = await deadline.run(AIService._complete(client, headers, payload, session_id, deadline, prompt_tokens))
+                            native.feed(reply.get("tool_calls"))
+                            ai_content = reply.get("content") or ""
+                except MistralAPIError as e:
+                    yield json.dumps({"type": "error", "content": f"🌐 API Error {e.status_code}"}) + "\n"
+                    return
+                except CircuitOpenError as e:
+                    yield json.dumps({"type": "error", "content": f"🌐 LLM temporarily unavailable, retry in {e.retry_in:.0f}s"}) + "\n"
+                    return
+                except asyncio.TimeoutError:
+                    # Request deadline reached mid-generation, the upstream call is already cancelled
+                    logger.warning(f"⏱️ Chat deadline reached during LLM call (step {step_i + 1})")
+                    yield json.dumps({"type": "final", "content": "⏱️ Timeout de recherche. Voici ma synthèse actuelle."}) + "\n"
+                    return
+                except Exception as e:
+                    yield json.dumps({"type": "error", "content": f"🌐 Connection Error: {str(e)}"}) + "\n"
+                    return
+                
+                yield json.dumps({
+                    "type": "model",
+                    "step": step_i + 1,
+                    "model": model,
+                    "reason": route_reason,
+                    "latency_ms": round((time.perf_counter() - llm_started) * 1000, 1),
+                    "first_token_ms": first_token_ms
+                }) + "\n"
+                
+                # 6. TOOL EXTRACTION & VALIDATION
+                # Structured tool_calls first, JSON written in the text is the fallback.
+                # The model may batch independent calls, they run concurrently.
+                native_calls, parse_failures = native.parse()
+                if native_calls:
+                    # The transcript keeps the text protocol: calls are written into the thought
+                    streamed_calls = native_calls
+                    rendered = json.dumps(native_calls[0] if len(native_calls) == 1 else native_calls, ensure_ascii=False)
+                    ai_content = f"{ai_content.strip()}\n{rendered}".strip()
+                    call_source = "native"
+                else:
+                    if not MISTRAL_STREAMING:
+                        streamed_calls = scanner.feed(ai_content) + scanner.close()
+                    streamed_calls = streamed_calls or []
+                    parse_failures += scanner.failed + int(scanner.truncated)
+                    call_source = "fallback"
+                tool_calls = []
+                for call in streamed_calls:
+                    # Fallback auto-tool name
+                    if "tool" not in call and "action" in call:
+                        if call["action"] in ["create", "update", "delete", "search", "categories"]:
+                            call["tool"] = "manage_notes"
+                        elif call["action"] in ["balance", "history", "prepare_transfer"]:
+                            call["tool"] = "manage_wallet"
+                    if "tool" in call:
+                        tool_calls.append(call)
+                ToolCallStats.record_step(call_source if tool_calls else None, len(tool_calls), parse_failures)
+                
+                # Final answers (and announced-but-missing tool calls) are the large model's job;
+                # with MODEL_KEEP_SMALL_ANSWERS only empty replies and announced actions are redone
+                if not tool_calls and small_step and not parse_failures and (
+                    draft_step or not ai_content.strip() or AIService._announces_action(ai_content)
+                ):
+                    model_router.escalate("final_answer")
+                    continue
+                
+                yield json.dumps({"type": "thought", "content": ai_content}) + "\n"
+                
+                # 7a. UNPARSEABLE TOOL CALL: ask for it again instead of showing broken JSON as the answer
+                if not tool_calls and parse_failures:
+                    logger.warning(f"🧩 Tool call could not be parsed (step {step_i + 1}, {call_source})")
+                    current_context.add_step(ai_content, PARSE_ERROR_NATIVE if MISTRAL_FUNCTION_CALLING else PARSE_ERROR_TEXT)
+                    model_router.record_step(ran_tools=False, rejected_calls=parse_failures)
+                    continue
+                
+                # 7b. ANTI-CHATTER REFLECTION
+                if not tool_calls and AIService._announces_action(ai_content):
+                    current_context.add_step(ai_content, MISSING_CALL_NATIVE if MISTRAL_FUNCTION_CALLING else MISSING_CALL_TEXT)
+                    model_router.record_step(ran_tools=False)
+                    continue
  
-                    if tool_call and "tool" in tool_call:
-                        tool_name = tool_call.get("tool")
-                        display_input = str(tool_call.get("query") or tool_call.get("url") or tool_call.get("action") or tool_call.get("command") or "Processing...")
-                        
-                        # 8. LOOP & VALIDATION LAYERS
+                if tool_calls:
+                    # 8. LOOP & VALIDATION LAYERS (per call, rejected calls become observations)
+                    observations = [None] * len(tool_calls)
+                    validated_args = {}
+                    runnable = []
+                    rejected = 0
+                    for idx, tool_call in enumerate(tool_calls):
                         is_loop, reason = loop_detector.check(tool_call)
                         if is_loop:
-                            current_context.append({"role": "assistant", "content": ai_content})
-                            current_context.append({"role": "user", "content": f"SYSTEM: Loop detected ({reason}). Provide final answer with current info."})
+                            observations[idx] = f"SYSTEM: Loop detected ({reason}). Provide final answer with current info."
                             continue
 
-                        validation = ReflectionLayer.validate(tool_call, current_context)
+                        validation = ReflectionLayer.validate(tool_call, current_context.messages)
                         if not validation["valid"]:
-                            current_context.append({"role": "assistant", "content": ai_content})
-                            current_context.append({"role": "user", "content": f"VALIDATION ERROR: {validation['reason']}. {validation.get('suggestion', '')}"})
+                            observations[idx] = f"VALIDATION ERROR: {validation['reason']}. {validation.get('suggestion', '')}"
+                            rejected += 1
                             continue
+                        validated_args[idx] = validation["args"]
+                        runnable.append(idx)
+
+                    # Validation miss or a tool outside the pruned library: show every tool from now on
+                    if tool_names is not None and (rejected or any(call["tool"] not in tool_names for call in tool_calls)):
+                        full_prompt = SystemPrompt.get(prompt_variant)
+                        current_context.replace_static_prefix(system_prompt_content, full_prompt, SystemPrompt.token_count(prompt_variant))
+                        system_prompt_content, tool_names = full_prompt, None
+                        ToolSelector.record_expansion()
+                        logger.info("🧰 Tool library expanded to the full list")
+
+                    if not runnable:
+                        current_context.add_step(ai_content, "\n\n".join(observations))
+                        model_router.record_step(ran_tools=False, rejected_calls=rejected)
+                        continue
+
+                    # Execute Tools
+                    display_inputs = {idx: AIService._display_input(tool_calls[idx]) for idx in runnable}
+                    for idx in runnable:
+                        yield json.dumps({"type": "step_start", "tool": tool_calls[idx]["tool"].upper(), "input": display_inputs[idx]}) + "\n"
 
-                        # Execute Tool
-                        yield json.dumps({"type": "step_start", "tool": tool_name.upper(), "input": display_input}) + "\n"
-                        
-                        execution_result = ""
-                        status = "success"
-                        
+                    async def run_indexed(idx):
+                        return idx, await AIService._execute_tool(tool_calls[idx], validated_args[idx], deadline)
+
+                    with span("tools", step=step_i + 1, calls=len(runnable)):
+                        tasks = [asyncio.create_task(run_indexed(idx)) for idx in runnable]
                         try:
-                            if tool_name == "search":
-                                results = SearchService.search(tool_call.get("query"))
-                                execution_result = json.dumps(results, indent=2, ensure_ascii=False)
-                                search_count += 1
-                            elif tool_name == "scrape":
-                                execution_result = await ScrapingService.scrape_url(tool_call.get("url"))
-                            elif tool_name == "sandbox":
-                                execution_result = SandboxService.execute_code(tool_call.get("code"))
-                            elif tool_name == "command":
-                                cmd = tool_call.get("command")
-                                execution_result = SandboxService.execute_command(cmd)
-                                
-                                # LINUX COMMAND LEARNING: Store in vector memory
-                                if VECTOR_MEMORY_AVAILABLE and execution_result:
-                                    memory_text = f"COMMAND: {cmd}\nRESULT: {execution_result[:500]}"
-                                    AIService.get_vector_memory().add_memory(
-                                        memory_text,
-                                        metadata={"type": "linux_command", "command": cmd}
-                                    )
-                            elif tool_name == "manage_notes":
-                                action = tool_call.get("action")
-                                with SessionLocal() as db:
-                                    if action == "create":
-                                        note_data = NoteCreate(
-                                            title=tool_call.get("title", "Sans titre"),
-                                            content=tool_call.get("content", ""),
-                                            category=tool_call.get("category", "General"),
-                                            tags=tool_call.get("tags", "")
-                                        )
-                                        execution_result = json.dumps(NoteResponse.model_validate(NotesService.create_note(db, note_data)).model_dump(), default=str)
-                                    elif action == "search":
-                                        results = NotesService.get_all_notes(db, search=tool_call.get("query"))
-                                        execution_result = json.dumps([NoteResponse.model_validate(n).model_dump() for n in results], default=str)
-                                    elif action == "update":
-                                        update_data = NoteUpdate(
-                                            content=tool_call.get("content"),
-                                            title=tool_call.get("title")
-                                        )
-                                        updated = NotesService.update_note(db, int(tool_call.get("id")), update_data)
-                                        execution_result = json.dumps(NoteResponse.model_validate(updated).model_dump(), default=str) if updated else "Note not found"
-                                    elif action == "delete":
-                                        success = NotesService.delete_note(db, int(tool_call.get("id")))
-                                        execution_result = json.dumps({"status": "deleted" if success else "failed"})
-                                    elif action == "categories":
-                                        execution_result = json.dumps(NotesService.get_categories(db))
-                            elif tool_name == "manage_wallet":
-                                action = tool_call.get("action")
-                                if action == "balance":
-                                    execution_result = json.dumps(await CryptoService.get_balance(tool_call.get("address")))
-                                elif action == "history":
-                                    execution_result = json.dumps(await CryptoService.get_transaction_history(tool_call.get("address")))
-                                elif action == "prepare_transfer":
-                                    execution_result = json.dumps(await CryptoService.prepare_transfer(
-                                        to=tool_call.get("to"),
-                                        amount=tool_call.get("amount")
-                                    ))
-                            elif tool_name == "manage_calendar":
-                                action = tool_call.get("action")
-                                if action == "list":
-                                    execution_result = json.dumps(CalendarService.get_events())
-                                elif action == "add":
-                                    execution_result = json.dumps(CalendarService.add_event(
-                                        title=tool_call.get("title"),
-                                        start=tool_call.get("start"),
-                                        end=tool_call.get("end")
-                                    ))
-                            elif tool_name == "image_search":
-                                results = await ImageSearchService.search_images(tool_call.get("query"))
-                                execution_result = json.dumps(results)
-                            elif tool_name == "vision_analyze":
-                                description = await VisionService.analyze_image(
-                                    image_path=tool_call.get("image_path"),
-                                    image_url=tool_call.get("image_url"),
-                                    prompt=tool_call.get("prompt", "Describe this image in detail.")
-                                )
-                                execution_result = description
-                                
-                                # Store in VectorMemory (RAG)
-                                if VECTOR_MEMORY_AVAILABLE:
-                                    summary = f"Visual Analysis: {description[:100]}..."
-                                    AIService.get_vector_memory().add_memory(
-                                        content=f"IMAGE_MEMORY: {description}",
-                                        metadata={"type": "vision", "path": tool_call.get("image_path")}
-                                    )
-                            elif tool_name == "osint_lookup":
-                                target = tool_call.get("target")
-                                if tool_call.get("type") == "username":
-                                    results = await OSINTService.check_username(target)
-                                else:
-                                    results = await OSINTService.domain_lookup(target)
-                                execution_result = json.dumps(results)
-                            elif tool_name == "monitor_live_feed":
-                                execution_result = RealtimeService.get_recent_events()
-                            elif tool_name == "get_time":
-                                execution_result = time.strftime("%Y-%m-%d %H:%M:%S")
-                            elif tool_name == "get_weather":
-                                result = await WeatherService.get_weather(tool_call.get("city"))
-                                execution_result = json.dumps(result)
-                            else:
-                                execution_result = f"Tool {tool_name} not implemented yet."
-                                status = "error"
-                        except Exception as e:
-                            logger.error(f"Tool Error: {e}")
-                            execution_result = f"[TOOL_ERROR] Execution Failed: {str(e)}. Please analyze this error and retry or adapt your plan."
-                            status = "error"
+                            for finished in asyncio.as_completed(tasks):
+                                idx, (execution_result, status) = await finished
+                                tools_used.add(tool_calls[idx]["tool"])
+                                tool_failed = tool_failed or status != "success"
+                                yield json.dumps({
+                                    "type": "step_end", 
+                                    "tool": tool_calls[idx]["tool"].upper(), 
+                                    "input": display_inputs[idx], 
+                                    "output": execution_result, 
+                                    "status": status
+                                }) + "\n"
+                                observation = await run_blocking("cpu", AIService._clean_result_for_ai, execution_result, tool_calls[idx]["tool"], f"{message} {display_inputs[idx]}")
+                                observations[idx] = f"OBSERVATION: {observation}"
                         finally:
-                            yield json.dumps({
-                                "type": "step_end", 
-                                "tool": tool_name.upper(), 
-                                "input": display_input, 
-                                "output": execution_result, 
-                                "status": status
-                            }) + "\n"
-
-                        # Push results to context
-                        current_context.append({"role": "assistant", "content": ai_content})
-                        current_context.append({"role": "user", "content": f"OBSERVATION: {AIService._clean_result_for_ai(execution_result)}"})
-                        continue
-                    else:
-                        # 9. FINAL ANSWER & MEMORY STORAGE
-                        final_response = ai_content
-                        if "Final Answer:" in ai_content:
-                            final_response = ai_content.split("Final Answer:")[-1].strip()
-                        
-                        # Cleanup Thought prefix from final answer if needed
-                        final_response = re.sub(r'(?i)^Thought:.*?\n', '', final_response).strip()
-                        
+                            # Client gone (generator closed / cancelled): stop the tools still running
+                            for task in tasks:
+                                task.cancel()
+
+                    # Push results to context, in call order
+                    if len(tool_calls) > 1:
+                        observations = [f"[{i + 1}] {call['tool']}: {obs}" for i, (call, obs) in enumerate(zip(tool_calls, observations))]
+                    await run_blocking("cpu", current_context.add_step, ai_content, "\n\n".join(observations))
+                    model_router.record_step(ran_tools=True, rejected_calls=rejected)
+                    continue
+                else:
+                    # 9. FINAL ANSWER & MEMORY STORAGE
+                    final_response = ai_content
+                    if "Final Answer:" in ai_content:
+                        final_response = ai_content.split("Final Answer:")[-1].strip()
+                    
+                    # Cleanup Thought prefix from final answer if needed
+                    final_response = re.sub(r'(?i)^Thought:.*?\n', '', final_response).strip()
+                    
+                    with span("final.persist"):
                         # Semantic storage
                         if vector_memory:
                             memory_text = f"User asked: {message}\nEveline answered: {final_response[:250]}"
-                            vector_memory.add_memory(memory_text, {"entities": current_entities})
+                            await run_blocking("cpu", vector_memory.add_memory, memory_text, {"entities": current_entities})
+
+                        await run_blocking("db", MemoryService.save_conversation_snippet, message, final_response, current_entities)
 
-                        MemoryService.save_conversation_snippet(message, final_response, current_entities)
-                        
+                        if answer_embedding is not None and not tool_failed:
+                            await run_blocking("cpu", SemanticAnswerCache.store, answer_embedding, message, final_response, tools_used)
+                    
                         # 10. PERSISTENCE - SAVE ASSISTANT RESPONSE
                         if session_id and db:
                             try:
-                                HistoryService.add_message(db, session_id, "assistant", final_response)
+                                HistoryService.schedule_index(await run_blocking("db", HistoryService.add_message, db, session_id, "assistant", final_response))
                             except Exception as e:
                                 logger.error(f"Failed to save assistant response: {e}")
 
-                        yield json.dumps({"type": "final", "content": final_response}) + "\n"
-                        return
+                    yield json.dumps({"type": "final", "content": final_response}) + "\n"
+                    return
 
+        except (asyncio.CancelledError, GeneratorExit):
+            logger.info(f"🔌 Chat stream abandoned by client after {deadline.elapsed():.1f}s, in-flight work cancelled")
+            raise
         except Exception as e:
             logger.error(f"ReAct Logic Error: {e}")
             yield json.dumps({"type": "error", "content": f"SYSTEM_ERROR: {str(e)}"}) + "\n"
 
+    @staticmethod
+    async def _is_standalone(session_id: str, saved_message, context: list = None) -> bool:
+        """True when the question opens its conversation (no earlier message in the session or legacy context)"""
+        from ..services.history_service import HistoryService
+        if session_id:
+            if saved_message is None:
+                return False
+            return not await run_blocking("db", HistoryService.has_messages_before, session_id, saved_message.id)
+        return not any(m.get("role") in ("user", "assistant") for m in context or [])
+
+    @staticmethod
+    def _announces_action(content: str) -> bool:
+        """Short reply announcing a tool call ("je vais rechercher...") without making it"""
+        if "Final Answer:" in content or len(content) >= 250:
+            return False
+        lower_c = content.lower()
+        intents = ["je vais", "i will", "recherche", "let me", "checking"]
+        hints = ["search", "recherche", "note", "scrape", "image", "wallet"]
+        return any(i in lower_c for i in intents) and any(h in lower_c for h in hints)
+
+    @staticmethod
+    async def _embed_query(vector_memory, message: str):
+        """Raw embedding of the question (cpu pool), None if the model fails"""
+        try:
+            with span("embed.query"):
+                return await run_blocking("cpu", vector_memory.encode, message)
+        except Exception as e:
+            logger.warning(f"Question embedding failed: {e}")
+            return None
+
+    @staticmethod
+    async def _prefetch_context(message: str, session_id: str, db: Session, vector_memory, deadline: Deadline, query_vector=None) -> dict:
+        """
+        Pre-fetch stage: every context source runs concurrently under its own timeout.
+        A slow or failing source maps to None and is dropped instead of delaying the turn.
+        `query_vector` is the future of the question's embedding, awaited by the semantic sources only.
+        """
+        from .account_service import AccountService
+        from .memory_service import MemoryService
+        from ..services.history_service import HistoryService
+
+        async def job(pool: str, fn, args, kwargs, with_query: bool):
+            if with_query:
+                # Shielded: a timed-out source must not cancel the embedding shared by the turn
+                vector = await asyncio.shield(query_vector)
+                if vector is None:
+                    return None
+                args = (*args, vector)
+            return await run_blocking(pool, fn, *args, **kwargs)
+
+        async def fetch(name: str, pool: str, fn, *args, with_query: bool = False, **kwargs):
+            timeout = deadline.clamp(PREFETCH_TIMEOUTS[name])
+            with span(f"prefetch.{name}"):
+                try:
+                    return await asyncio.wait_for(job(pool, fn, args, kwargs, with_query), timeout=timeout)
+                except asyncio.TimeoutError:
+                    logger.warning(f"⏱️ Pre-fetch source '{name}' dropped after {timeout:.1f}s")
+                except Exception as e:
+                    logger.warning(f"Pre-fetch source '{name}' failed: {e}")
+                return None
+
+        sources = {
+            "memory_summary": fetch("memory_summary", "db", MemoryService.build_context_summary),
+            "recent_topics": fetch("recent_topics", "db", MemoryService.get_recent_topics, limit=5),
+            "accounts": fetch("accounts", "db", AccountService.list_accounts),
+        }
+        if query_vector is not None:
+            # search(message, top_k, min_score, embedding)
+            sources["vector"] = fetch("vector", "cpu", vector_memory.search, message, 3, 0.45, with_query=True)
+        if session_id and db:
+            # Most recent messages within HISTORY_TOKEN_BUDGET, chronological. Own DB session: a timed-out
+            # job keeps running in its thread while the request's session is used for add_message.
+            sources["history"] = fetch("history", "db", HistoryService.load_history_within_budget, session_id)
+            sources["summary"] = fetch("summary", "db", ConversationSummarizer.get_summary, session_id)
+        if session_id and query_vector is not None:
+            sources["relevant_history"] = fetch("relevant_history", "cpu", MessageIndex.search, session_id, with_query=True)
+
+        with span("prefetch", sources=len(sources)):
+            results = await asyncio.gather(*sources.values())
+        return dict(zip(sources, results))
+
+    @staticmethod
+    def _display_input(tool_call: dict) -> str:
+        return str(tool_call.get("query") or tool_call.get("url") or tool_call.get("action") or tool_call.get("command") or "Processing...")
+
+    @staticmethod
+    async def _execute_tool(tool_call: dict, args=None, deadline: Deadline = None) -> tuple[str, str]:
+        """Run a single tool call through the registry, returns (execution_result, status)"""
+        tool_name = tool_call.get("tool")
+        spec = ToolRegistry.get(tool_name)
+        if not spec:
+            return f"Tool {tool_name} not implemented yet.", "error"
+
+        try:
+            if args is None:
+                args = spec.args_model.model_validate(tool_call)
+
+            with span(f"tool.{tool_name}") as tool_span:
+                cache_key = ToolResultCache.make_key(tool_name, args) if spec.is_cacheable(args) else None
+                if cache_key:
+                    cached = await ToolResultCache.get(tool_name, cache_key)
+                    if cached is not None:
+                        logger.info(f"⚡ Tool cache hit: {tool_name}")
+                        if tool_span:
+                            tool_span.attrs["cache_hit"] = True
+                        return cached, "success"
+
+                result = await ToolRegistry.execute(spec, args, deadline)
+                if cache_key:
+                    await ToolResultCache.set(tool_name, cache_key, result, spec.cache_ttl)
+                return result, "success"
+        except DeadlineExceeded:
+            logger.warning(f"Tool cancelled: {tool_name} hit the request deadline")
+            return f"[TOOL_ERROR] {tool_name} cancelled, request time budget exhausted. Answer with current info.", "error"
+        except asyncio.TimeoutError:
+            logger.error(f"Tool Timeout: {tool_name} exceeded {spec.timeout}s")
+            return f"[TOOL_ERROR] {tool_name} timed out after {spec.timeout:.0f}s. Try another source or answer with current info.", "error"
+        except Exception as e:
+            logger.error(f"Tool Error: {e}")
+            return f"[TOOL_ERROR] Execution Failed: {str(e)}. Please analyze this error and retry or adapt your plan.", "error"
+
+    @staticmethod
+    async def _complete(client: httpx.AsyncClient, headers: dict, payload: dict, session_id: str = None, deadline: Deadline = None,
+                        prompt_tokens: int = None) -> dict:
+        """Non-streaming chat completion through the LLM gateway, returns the assistant message"""
+        async with LLMGateway.request(client, MISTRAL_API_URL, session_id=session_id, deadline=deadline, headers=headers, json=payload) as response:
+            if response.status_code != 200:
+                raise MistralAPIError(response.status_code)
+            data = response.json()
+        if prompt_tokens:
+            AIService._calibrate(payload["model"], prompt_tokens, data.get("usage"))
+        return data["choices"][0]["message"]
+
+    @staticmethod
+    async def _stream_completion(client: httpx.AsyncClient, headers: dict, payload: dict, session_id: str = None, deadline: Deadline = None,
+                                 prompt_tokens: int = None):
+        """Yield deltas ({"content", "tool_calls"}) from Mistral's SSE chat-completions stream (through the LLM gateway)"""
+        async with LLMGateway.request(client, MISTRAL_API_URL, session_id=session_id, deadline=deadline, stream=True, headers=headers, json=payload) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise MistralAPIError(response.status_code)
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(data)
+                except json.JSONDecodeError:
+                    logger.debug(f"Skipping malformed SSE chunk: {data[:80]}")
+                    continue
+                if chunk.get("usage") and prompt_tokens:
+                    # Last chunk, only reached when the stream is read to the end
+                    AIService._calibrate(payload["model"], prompt_tokens, chunk["usage"])
+                choices = chunk.get("choices") or [{}]
+                delta = choices[0].get("delta") or {}
+                if delta.get("content") or delta.get("tool_calls"):
+                    yield delta
+
+    @staticmethod
+    def _calibrate(model: str, prompt_tokens: int, usage: dict):
+        """Record the local prompt estimate against the tokens Mistral reports"""
+        if usage:
+            TokenizerCalibration.record(model, prompt_tokens, usage.get("prompt_tokens"), AIService.get_context_manager().tokenizer.name)
+
     @staticmethod
     def _clean_context(messages: list) -> list:
         if not messages: return []
@@ -464,14 +706,14 @@ class AIService:
         return cleaned
 
     @staticmethod
-    def _clean_result_for_ai(result: str) -> str:
+    def _clean_result_for_ai(result: str, tool_name: str = "default", query: str = "") -> str:
         if not result or not isinstance(result, str): return str(result)
-        # Truncate image data or massive results
+        # Strip image data, then keep the passages most relevant to the query within the tool's token budget
         data_uri_pattern = r'data:image\/[a-zA-Z]*;base64,[a-zA-Z0-9+/]*={0,2}'
         cleaned = re.sub(data_uri_pattern, '[B64_IMAGE_DATA]', result)
-        if len(cleaned) > 12000:
-            return cleaned[:12000] + "... [TRUNCATED]"
-        return cleaned
+        context_manager = AIService.get_context_manager()
+        compressed, _ = ObservationCompressor.compress(tool_name, cleaned, query, context_manager._count_tokens, context_manager.count_many)
+        return compressed
 
     @staticmethod
     async def analyze_content(content: str, task: str):
@@ -0,0 +1,127 @@
+"""
+Semantic Answer Cache - Reuse final answers of near-identical questions
+Opt-in (ANSWER_CACHE_ENABLED), for questions that open a conversation: the
+cache is process-wide, and a follow-up only makes sense in its own session.
+Questions are embedded with the VectorMemory model and compared by cosine
+similarity against a dedicated in-memory index of previous final answers.
+Answers that relied on time-sensitive or state-changing tools are never
+stored; the others expire after the shortest TTL of the tools they used.
+Oldest entries are evicted past the size limit.
+"""
+import threading
+import time
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import ANSWER_CACHE_ENABLED, ANSWER_CACHE_MIN_SCORE, ANSWER_CACHE_TTL, ANSWER_CACHE_MAX_ENTRIES
+from .message_index import normalize
+from .tool_registry import ToolRegistry
+
+logger = logging.getLogger(__name__)
+
+# Answers built on these depend on "now" or on user state
+TIME_SENSITIVE_TOOLS = {
+    "get_time", "get_weather", "manage_wallet", "manage_calendar", "manage_notes",
+    "command", "sandbox", "vision_analyze",
+}
+
+
+class SemanticAnswerCache:
+    _lock = threading.RLock()
+    _entries: List[Dict[str, Any]] = []
+    _matrix: Optional[np.ndarray] = None  # One normalized embedding per entry
+    _stats = {"hits": 0, "misses": 0, "stores": 0, "skipped": 0, "evicted": 0}
+
+    @staticmethod
+    def enabled(vector_memory) -> bool:
+        return ANSWER_CACHE_ENABLED and vector_memory is not None and getattr(vector_memory, "model", None) is not None
+
+    @staticmethod
+    def embed(vector_memory, text: str) -> np.ndarray:
+        return normalize(vector_memory.encode(text))
+
+    @classmethod
+    def lookup(cls, vector_memory, message: str, embedding: Optional[np.ndarray] = None) -> Tuple[Optional[Dict[str, Any]], np.ndarray]:
+        """Return (entry or None, query embedding), the embedding is reused by store()"""
+        query = normalize(embedding) if embedding is not None else cls.embed(vector_memory, message)
+        with cls._lock:
+            cls._purge_expired()
+            if cls._matrix is None or not cls._entries:
+                cls._stats["misses"] += 1
+                return None, query
+            scores = cls._matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] < ANSWER_CACHE_MIN_SCORE:
+                cls._stats["misses"] += 1
+                return None, query
+            entry = cls._entries[best]
+            entry["hits"] += 1
+            cls._stats["hits"] += 1
+            return {**entry, "score": float(scores[best])}, query
+
+    @classmethod
+    def ttl_for(cls, tools_used: Iterable[str]) -> int:
+        """0 when the answer must not be cached"""
+        ttl = ANSWER_CACHE_TTL
+        for name in set(tools_used):
+            spec = ToolRegistry.get(name)
+            if name in TIME_SENSITIVE_TOOLS or spec is None:
+                return 0
+            if spec.cacheable:
+                ttl = min(ttl, spec.cache_ttl)
+        return ttl
+
+    @classmethod
+    def store(cls, embedding: np.ndarray, message: str, answer: str, tools_used: Iterable[str]):
+        tools_used = sorted(set(tools_used))
+        ttl = cls.ttl_for(tools_used)
+        with cls._lock:
+            if ttl <= 0:
+                cls._stats["skipped"] += 1
+                return
+            now = time.time()
+            cls._entries.append({
+                "question": message,
+                "answer": answer,
+                "tools": tools_used,
+                "created": now,
+                "expires": now + ttl,
+                "hits": 0,
+            })
+            row = embedding[np.newaxis, :]
+            cls._matrix = row if cls._matrix is None else np.vstack([cls._matrix, row])
+            cls._stats["stores"] += 1
+
+            overflow = len(cls._entries) - ANSWER_CACHE_MAX_ENTRIES
+            if overflow > 0:
+                cls._drop(range(overflow))
+                cls._stats["evicted"] += overflow
+        logger.info(f"💾 Answer cached for {ttl}s (tools: {', '.join(tools_used) or 'none'})")
+
+    @classmethod
+    def _purge_expired(cls):
+        now = time.time()
+        expired = [i for i, e in enumerate(cls._entries) if e["expires"] <= now]
+        if expired:
+            cls._drop(expired)
+            cls._stats["evicted"] += len(expired)
+
+    @classmethod
+    def _drop(cls, indices):
+        drop = set(indices)
+        keep = [i for i in range(len(cls._entries)) if i not in drop]
+        cls._entries = [cls._entries[i] for i in keep]
+        cls._matrix = cls._matrix[keep] if keep else None
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        with cls._lock:
+            return {"enabled": ANSWER_CACHE_ENABLED, "entries": len(cls._entries), "min_score": ANSWER_CACHE_MIN_SCORE, **cls._stats}
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries = []
+            cls._matrix = None
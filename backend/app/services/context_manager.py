@@ -1,57 +1,92 @@
 """
 Context Manager - Intelligent context window management
 """
-import tiktoken
-from typing import List, Dict, Any
+import hashlib
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import List, Dict, Any, Optional
 import logging
 
+from config import TOKEN_COUNT_CACHE_SIZE, RELEVANT_HISTORY_SHARE, TOKENIZER_BACKEND, MODEL_BUDGETS
+from .tokenizers import Tokenizer, get_tokenizer
+
 logger = logging.getLogger(__name__)
 
+
+@dataclass(frozen=True)
+class BudgetProfile:
+    max_tokens: int       # Context size used for the model
+    reserved_output: int  # Completion tokens (payload max_tokens), kept out of the context budget
+    system_share: float   # Share of the budget volatile system info may use
+
+    @property
+    def context_budget(self) -> int:
+        return self.max_tokens - self.reserved_output
+
+    @classmethod
+    def for_model(cls, model: str) -> "BudgetProfile":
+        return cls(**MODEL_BUDGETS.get(model, MODEL_BUDGETS["default"]))
+
+
 class ContextManager:
     """Dynamically manages context to stay within token limits"""
     
-    def __init__(self, model: str = "gpt-3.5-turbo", max_tokens: int = 30000):
+    def __init__(self, model: str = "default", max_tokens: Optional[int] = None, tokenizer: Optional[Tokenizer] = None):
         """
         Args:
-            model: Model for the tokenizer (Mistral/OpenAI compatible)
-            max_tokens: Token limit for the context (Mistral Small default)
+            model: Model the context is built for (tokenizer and budget profile)
+            max_tokens: Overrides the profile's context budget
+            tokenizer: Overrides TOKENIZER_BACKEND
         """
-        try:
-            self.encoder = tiktoken.get_encoding("cl100k_base") # Standard for most modern LLMs
-        except Exception as e:
-            logger.warning(f"Could not load tiktoken encoder: {e}. Fallback enabled.")
-            self.encoder = None
-        
-        self.max_tokens = max_tokens
-        logger.info(f"📊 Context Manager initialized (max: {max_tokens} tokens)")
+        self.tokenizer = tokenizer or get_tokenizer(TOKENIZER_BACKEND, model)
+        self.profile = BudgetProfile.for_model(model)
+        self.max_tokens = max_tokens or self.profile.context_budget
+        # Content-hash -> token count, shared by every turn (history, observations, prompts)
+        self._token_cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._token_cache_lock = threading.Lock()
+        self._token_cache_stats = {"hits": 0, "misses": 0}
+        logger.info(f"📊 Context Manager initialized (max: {self.max_tokens} tokens, tokenizer: {self.tokenizer.name})")
     
     def build_optimized_context(
         self,
         system_prompt: str,
         user_query: str,
         history: List[Dict[str, Any]],
-        system_info: Dict[str, Any] = None
+        system_info: Dict[str, Any] = None,
+        system_prompt_tokens: Optional[int] = None,
+        dynamic_context: str = "",
+        conversation_summary: Optional[str] = None,
+        relevant_history: Optional[List[Dict[str, Any]]] = None
     ) -> List[Dict[str, str]]:
         """
         Builds an optimized context
+        Static system prompt first (stable prefix), volatile content after it.
+        conversation_summary: latest rolling summary of the history left out (ConversationSummarizer)
+        relevant_history: older messages similar to the query, best first (MessageIndex)
         """
         context = []
         token_count = 0
         
-        # 1. System prompt (absolute priority)
+        # 1. System prompt (absolute priority, token count precomputed when static)
         system_msg = {"role": "system", "content": system_prompt}
-        system_tokens = self._count_tokens(system_msg["content"])
+        system_tokens = system_prompt_tokens if system_prompt_tokens is not None else self._count_tokens(system_msg["content"])
         context.append(system_msg)
         token_count += system_tokens
         
-        # 2. Add System Info (Wallet state, etc.)
-        if system_info:
-            info_content = "SYSTEM_STATE:\n" + "\n".join([f"{k}: {v}" for k, v in system_info.items()])
+        # 2. Add volatile info (memories, wallet state, etc.)
+        if system_info or dynamic_context:
+            info_parts = [dynamic_context.strip()] if dynamic_context.strip() else []
+            if system_info:
+                info_parts.append("SYSTEM_STATE:\n" + "\n".join([f"{k}: {v}" for k, v in system_info.items()]))
+            info_content = "\n\n".join(info_parts)
             info_msg = {"role": "system", "content": info_content}
             info_tokens = self._count_tokens(info_content)
             
             # Use small budget for system info
-            if token_count + info_tokens < self.max_tokens * 0.2:
+            if token_count + info_tokens < self.max_tokens * self.profile.system_share:
                 context.append(info_msg)
                 token_count += info_tokens
         
@@ -63,39 +98,110 @@ class ContextManager:
         remaining_budget = self.max_tokens - token_count - user_tokens - 200 # 200 buffer
         if remaining_budget < 0:
             remaining_budget = 500 # minimum safety
+
+        # 4a. Older messages relevant to the query, best first, within their share of the budget
+        relevant_msg = None
+        if relevant_history:
+            relevant_costs = [m.get("token_count") or self._count_tokens(m["content"]) for m in relevant_history]
+            fitted = bisect_right(list(accumulate(relevant_costs)), int(remaining_budget * RELEVANT_HISTORY_SHARE))
+            if fitted:
+                chronological = sorted(relevant_history[:fitted], key=lambda m: m.get("id", 0))
+                relevant_content = "RELEVANT_EARLIER_MESSAGES:\n" + "\n".join(f"[{m['role']}] {m['content']}" for m in chronological)
+                relevant_msg = {"role": "system", "content": relevant_content}
+                relevant_tokens = self._count_tokens(relevant_content)
+                remaining_budget -= relevant_tokens
+                token_count += relevant_tokens
             
-        added_history = []
-        history_tokens = 0
-        
         # Filter and prioritize history
-        prioritized_history = [self._format_message(m) for m in history if self._format_message(m)]
-        
-        for msg in reversed(prioritized_history):
-            msg_tokens = self._count_tokens(msg["content"])
-            if history_tokens + msg_tokens > remaining_budget:
-                break
-            added_history.insert(0, msg)
-            history_tokens += msg_tokens
+        prioritized_history = [m for m in map(self._format_message, history) if m]
+        # Stored messages carry their token count (ChatMessage.token_count)
+        history_costs = [msg.pop("token_count", None) for msg in prioritized_history]
+        uncounted = [i for i, cost in enumerate(history_costs) if not cost]
+        for i, cost in zip(uncounted, self.count_many([prioritized_history[i]["content"] for i in uncounted])):
+            history_costs[i] = cost
+
+        # Newest-first prefix sums: the k most recent messages fit while prefix[k-1] <= budget
+        prefix = list(accumulate(reversed(history_costs)))
+        kept = bisect_right(prefix, remaining_budget)
+        split = len(prioritized_history) - kept
+        added_history = prioritized_history[split:]
+        history_tokens = prefix[kept - 1] if kept else 0
             
         # 5. Summary of very old history if there's space left
-        if len(prioritized_history) > len(added_history) and (remaining_budget - history_tokens) > 300:
-            old_history = prioritized_history[:-len(added_history)]
-            summary_text = self._summarize_old_messages(old_history)
+        if (split or conversation_summary) and (remaining_budget - history_tokens) > 300:
+            if conversation_summary:
+                summary_text = conversation_summary
+            else:
+                summary_text = self._summarize_old_messages(prioritized_history[:split])
             summary_msg = {"role": "system", "content": f"PREVIOUS_CONVERSATION_SUMMARY: {summary_text}"}
             context.insert(1, summary_msg)
             token_count += self._count_tokens(summary_text)
 
         # Final Assembly
+        if relevant_msg:
+            context.append(relevant_msg)
         context.extend(added_history)
         context.append({"role": "user", "content": user_query})
         
         logger.info(f"✅ Context built: {len(context)} msgs, ~{token_count + user_tokens} tokens")
         return context
     
+    @staticmethod
+    def _cache_key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def _cache_get(self, key: bytes) -> Optional[int]:
+        with self._token_cache_lock:
+            count = self._token_cache.get(key)
+            if count is not None:
+                self._token_cache.move_to_end(key)
+                self._token_cache_stats["hits"] += 1
+            return count
+
+    def _cache_put(self, key: bytes, count: int):
+        with self._token_cache_lock:
+            self._token_cache[key] = count
+            self._token_cache_stats["misses"] += 1
+            if len(self._token_cache) > TOKEN_COUNT_CACHE_SIZE:
+                self._token_cache.popitem(last=False)
+
     def _count_tokens(self, text: str) -> int:
-        if not self.encoder:
-            return len(text) // 4 # heuristic
-        return len(self.encoder.encode(text))
+        if not self.tokenizer.cacheable:
+            return self.tokenizer.count(text)
+        key = self._cache_key(text)
+        count = self._cache_get(key)
+        if count is None:
+            count = self.tokenizer.count(text)
+            self._cache_put(key, count)
+        return count
+
+    def count_tokens(self, text: str) -> int:
+        """Public token counter (memoized by content hash)"""
+        return self._count_tokens(text or "")
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        """Token counts of several texts: cache hits first, the misses encoded in one batch"""
+        if not self.tokenizer.cacheable:
+            return self.tokenizer.count_many(texts)
+        keys = [self._cache_key(text) for text in texts]
+        counts = [self._cache_get(key) for key in keys]
+        misses = [i for i, count in enumerate(counts) if count is None]
+        if misses:
+            for i, count in zip(misses, self.tokenizer.count_many([texts[i] for i in misses])):
+                counts[i] = count
+                self._cache_put(keys[i], count)
+        return counts
+
+    def token_cache_stats(self) -> Dict[str, Any]:
+        with self._token_cache_lock:
+            lookups = self._token_cache_stats["hits"] + self._token_cache_stats["misses"]
+            return {
+                "tokenizer": self.tokenizer.name,
+                "entries": len(self._token_cache),
+                "max_entries": TOKEN_COUNT_CACHE_SIZE,
+                **self._token_cache_stats,
+                "hit_rate": round(self._token_cache_stats["hits"] / lookups, 3) if lookups else 0.0,
+            }
     
     def _format_message(self, msg: Dict[str, Any]) -> Dict[str, str]:
         """Convert system history format to OpenAI/Mistral format"""
@@ -104,7 +210,10 @@ class ContextManager:
         
         # DIRECT SUPPORT for already formatted messages (from DB or clean source)
         if "role" in msg and "content" in msg:
-             return {"role": msg["role"], "content": msg["content"]}
+             formatted = {"role": msg["role"], "content": msg["content"]}
+             if msg.get("token_count"):
+                 formatted["token_count"] = msg["token_count"]
+             return formatted
 
         if m_type == "input":
             return {"role": "user", "content": str(text).replace("> ", "")}
@@ -129,3 +238,85 @@ class ContextManager:
         if topics:
             return f"Discussed topics like {', '.join(list(topics)[:5])}."
         return "Earlier context involved general system interactions."
+
+
+class RunningContext:
+    """
+    ReAct context that stays within budget while steps are appended.
+    The base messages (system, history, user query) are kept as built by
+    ContextManager. Each step (assistant thought + observation) carries its
+    token count; past the budget the oldest observations are collapsed,
+    then the oldest steps evicted. The latest step is always kept whole.
+    """
+
+    COLLAPSED_CHARS = 200
+
+    def __init__(
+        self,
+        messages: List[Dict[str, str]],
+        count_tokens,
+        max_tokens: int,
+        static_prefix: str = "",
+        static_prefix_tokens: Optional[int] = None,
+        count_many=None
+    ):
+        self._count = count_tokens
+        self.max_tokens = max_tokens
+        self.messages = list(messages)
+        self.base_len = len(self.messages)
+        # Static system prompt counted once at startup, the rest in one batch when supported
+        prefixed = [
+            bool(static_prefix) and static_prefix_tokens is not None and msg["content"].startswith(static_prefix)
+            for msg in self.messages
+        ]
+        texts = [msg["content"][len(static_prefix):] if p else msg["content"] for msg, p in zip(self.messages, prefixed)]
+        counts = count_many(texts) if count_many else [self._count(text) for text in texts]
+        self.tokens = [count + static_prefix_tokens if p else count for count, p in zip(counts, prefixed)]
+        self.collapsed = 0
+        self.evicted = 0
+
+    @property
+    def total(self) -> int:
+        return sum(self.tokens)
+
+    def replace_static_prefix(self, old_prefix: str, new_prefix: str, new_prefix_tokens: Optional[int] = None):
+        """Swap the system prompt's static prefix (e.g. pruned -> full tool library), then re-budget"""
+        content = self.messages[0]["content"]
+        if not content.startswith(old_prefix):
+            return
+        rest = content[len(old_prefix):]
+        self.messages[0] = {**self.messages[0], "content": new_prefix + rest}
+        prefix_tokens = new_prefix_tokens if new_prefix_tokens is not None else self._count(new_prefix)
+        self.tokens[0] = prefix_tokens + self._count(rest)
+        self._rebudget()
+
+    def add_step(self, thought: str, observation: str):
+        """Append an assistant thought and its observation, then re-budget"""
+        for role, content in (("assistant", thought), ("user", observation)):
+            self.messages.append({"role": role, "content": content})
+            self.tokens.append(self._count(content))
+        self._rebudget()
+
+    def _rebudget(self):
+        last_step = len(self.messages) - 2
+        before = (self.collapsed, self.evicted)
+
+        # 1. Collapse older observations, oldest first
+        for i in range(self.base_len + 1, last_step, 2):
+            if self.total <= self.max_tokens:
+                return
+            content = self.messages[i]["content"]
+            if len(content) <= self.COLLAPSED_CHARS or content.endswith("[COLLAPSED]"):
+                continue
+            self.messages[i] = {"role": "user", "content": content[:self.COLLAPSED_CHARS] + "... [COLLAPSED]"}
+            self.tokens[i] = self._count(self.messages[i]["content"])
+            self.collapsed += 1
+
+        # 2. Evict whole steps (thought + observation pairs), oldest first
+        while self.total > self.max_tokens and len(self.messages) - 2 > self.base_len:
+            del self.messages[self.base_len:self.base_len + 2]
+            del self.tokens[self.base_len:self.base_len + 2]
+            self.evicted += 1
+
+        if (self.collapsed, self.evicted) != before:
+            logger.info(f"✂️ Running context re-budgeted: ~{self.total} tokens ({self.collapsed} collapsed, {self.evicted} steps evicted)")
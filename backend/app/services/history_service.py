@@ -1,8 +1,25 @@
-from sqlalchemy.orm import Session
+import asyncio
+import logging
+from typing import Optional, Set
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, defer
+from ..core.database import SessionLocal
+from ..core.executors import run_blocking
 from ..models.chat import ChatSession, ChatMessage
 from datetime import datetime
+from config import HISTORY_TOKEN_BUDGET, HISTORY_MAX_MESSAGES
+
+logger = logging.getLogger(__name__)
+
+
+def _token_cost():
+    """Per-row token cost in SQL: stored count, len/4 for rows older than the column"""
+    return func.coalesce(ChatMessage.token_count, func.length(ChatMessage.content) / 4)
 
 class HistoryService:
+    _indexing: Set[asyncio.Task] = set()  # index_message tasks in flight
+
     @staticmethod
     def create_session(db: Session, session_id: str, title: str = "New Chat"):
         """Create a new chat session"""
@@ -20,19 +37,125 @@ class HistoryService:
             .limit(limit)\
             .all()
         return list(reversed(messages))  
+
+    @staticmethod
+    def get_history_within_budget(db: Session, session_id: str, budget: int = HISTORY_TOKEN_BUDGET,
+                                  max_messages: int = HISTORY_MAX_MESSAGES):
+        """
+        Most recent messages of the session fitting in `budget` tokens, chronological.
+        One query on (session_id, id): a running SUM over the newest-first rows,
+        cut where it passes the budget. Rows without token_count cost len/4.
+        """
+        running = db.query(
+            ChatMessage.id.label("id"),
+            func.sum(_token_cost()).over(order_by=ChatMessage.id.desc()).label("cumulative_tokens")
+        ).filter(ChatMessage.session_id == session_id).subquery()
+
+        messages = db.query(ChatMessage)\
+            .options(defer(ChatMessage.embedding))\
+            .join(running, running.c.id == ChatMessage.id)\
+            .filter(running.c.cumulative_tokens <= budget)\
+            .order_by(ChatMessage.id.desc())\
+            .limit(max_messages)\
+            .all()
+        return list(reversed(messages))
+
+    @staticmethod
+    def load_history_within_budget(session_id: str, budget: int = HISTORY_TOKEN_BUDGET,
+                                   max_messages: int = HISTORY_MAX_MESSAGES):
+        """get_history_within_budget on its own DB session, rows returned detached (safe from worker threads)"""
+        with SessionLocal() as db:
+            messages = HistoryService.get_history_within_budget(db, session_id, budget, max_messages)
+            db.expunge_all()
+        return messages
+
+    @staticmethod
+    def has_messages_before(session_id: str, before_id: int) -> bool:
+        """Whether the session has a message older than before_id (own DB session)"""
+        with SessionLocal() as db:
+            return db.query(ChatMessage.id)\
+                .filter(ChatMessage.session_id == session_id, ChatMessage.id < before_id)\
+                .first() is not None
+
+    @staticmethod
+    def get_messages_between(db: Session, session_id: str, after_id: int, before_id: int, budget: int):
+        """
+        Oldest messages with after_id < id < before_id, chronological, up to `budget` tokens.
+        The message crossing the budget is kept, so a single oversized message is still returned.
+        """
+        cost = _token_cost()
+        running = db.query(
+            ChatMessage.id.label("id"),
+            (func.sum(cost).over(order_by=ChatMessage.id) - cost).label("tokens_before")
+        ).filter(
+            ChatMessage.session_id == session_id,
+            ChatMessage.id > after_id,
+            ChatMessage.id < before_id
+        ).subquery()
+
+        return db.query(ChatMessage)\
+            .options(defer(ChatMessage.embedding))\
+            .join(running, running.c.id == ChatMessage.id)\
+            .filter(running.c.tokens_before < budget)\
+            .order_by(ChatMessage.id)\
+            .all()
     
     @staticmethod
     def add_message(db: Session, session_id: str, role: str, content: str):
-        """Add a message to the history"""
+        """Add a message to the history with its token count (context budgeting), the embedding comes later from index_message"""
+        from .ai_service import AIService
         message = ChatMessage(
             session_id=session_id,
             role=role,
-            content=content
+            content=content,
+            token_count=AIService.get_context_manager().count_tokens(content)
         )
         db.add(message)
         db.commit()
+        db.refresh(message)  # Loaded here (db pool), not lazily on the event loop
         return message
-    
+
+    @classmethod
+    def schedule_index(cls, message, embedding: Optional[asyncio.Future] = None):
+        """Run index_message in the background (never blocks the turn)"""
+        if message is None:
+            return
+        task = asyncio.create_task(cls.index_message(message.session_id, message.id, message.content, embedding))
+        cls._indexing.add(task)
+        task.add_done_callback(cls._indexing.discard)
+
+    @staticmethod
+    async def index_message(session_id: str, message_id: int, content: str, embedding: Optional[asyncio.Future] = None):
+        """
+        Embedding of a saved message (relevant history), computed in the cpu pool off the request
+        path. `embedding` resolves to the text's raw embedding when the turn already computed it.
+        """
+        from .ai_service import AIService
+        from .message_index import MessageIndex
+        try:
+            vector_memory = AIService.get_vector_memory()
+            raw = None
+            if embedding is not None:
+                try:
+                    raw = await asyncio.shield(embedding)
+                except asyncio.CancelledError:
+                    if not embedding.cancelled():
+                        raise
+                    # The turn was cancelled while computing it: embed here instead
+            vector = await run_blocking("cpu", MessageIndex.embed, vector_memory, content, raw)
+            if vector is None:
+                return
+            await run_blocking("db", HistoryService._store_embedding, message_id, vector)
+            MessageIndex.add(session_id, message_id, vector)
+        except Exception as e:
+            logger.warning(f"Indexing of message {message_id} failed: {e}")
+
+    @staticmethod
+    def _store_embedding(message_id: int, embedding):
+        with SessionLocal() as db:
+            db.query(ChatMessage).filter(ChatMessage.id == message_id).update({"embedding": embedding.tobytes()})
+            db.commit()
+
     @staticmethod
     def get_session(db: Session, session_id: str):
         """Retrieve a session by its ID"""
@@ -6,6 +6,7 @@ import httpx
 import logging
 import asyncio
 from config import PLAYWRIGHT_SERVICE_URL
+from ..core.http_clients import HttpClientRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -35,23 +36,22 @@ class ImageSearchService:
         
         try:
             logger.info(f"🖼️ Searching images via Node.js service: {query}")
-            async with httpx.AsyncClient(timeout=40.0) as client:
-                response = await client.post(
-                    f"{PLAYWRIGHT_SERVICE_URL}/search-images",
-                    json={"query": query, "max_results": max_results}
-                )
-                
-                if response.status_code == 200:
-                    results = response.json()
-                    if results and isinstance(results, list):
-                        logger.info(f"✅ Node.js service success: {len(results)} images")
-                        return results
-                    else:
-                        logger.warning(f"⚠️ Node.js service returned empty results")
-                        return [] # Return empty list instead of falling back
+            response = await HttpClientRegistry.get("playwright").post(
+                f"{PLAYWRIGHT_SERVICE_URL}/search-images",
+                json={"query": query, "max_results": max_results}
+            )
+            
+            if response.status_code == 200:
+                results = response.json()
+                if results and isinstance(results, list):
+                    logger.info(f"✅ Node.js service success: {len(results)} images")
+                    return results
                 else:
-                    logger.warning(f"⚠️ Node.js service returned {response.status_code}")
-                    return [{"error": f"Service error: {response.status_code}"}]
+                    logger.warning(f"⚠️ Node.js service returned empty results")
+                    return [] # Return empty list instead of falling back
+            else:
+                logger.warning(f"⚠️ Node.js service returned {response.status_code}")
+                return [{"error": f"Service error: {response.status_code}"}]
                     
         except httpx.ConnectError:
             logger.error("❌ Cannot connect to Playwright service")
@@ -0,0 +1,271 @@
+"""
+Intent Router - Local fast path for trivial requests
+Time, date, arithmetic, "list my events" and weather questions are answered
+directly from TimeService, CalendarService, WeatherService or a safe
+expression evaluator, without any Mistral round trip.
+Anchored keyword rules are trusted as is; looser keyword matches must be
+confirmed by the VectorMemory embedding model (cosine similarity against a
+few example phrasings) before the fast path answers.
+"""
+import ast
+import operator
+import re
+import threading
+import unicodedata
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import FAST_PATH_MIN_CONFIDENCE, FAST_PATH_TIMEZONE
+from ..core.executors import run_blocking
+from .message_index import normalize
+
+logger = logging.getLogger(__name__)
+
+DAYS_FR = ["lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche"]
+MONTHS_FR = ["janvier", "février", "mars", "avril", "mai", "juin", "juillet", "août",
+             "septembre", "octobre", "novembre", "décembre"]
+
+# Time qualifiers: "meteo a lyon demain" asks for a forecast, not the weather in "lyon demain"
+TIME_WORDS = (r"(?:aujourd'hui|demain|apres[- ]demain|hier|maintenant|ce soir|cette nuit|matin|apres[- ]midi|soir|"
+              r"week[- ]?end|semaine|mois|prochaine?s?|" + "|".join(DAYS_FR) + r"|"
+              r"today|tonight|tomorrow|yesterday|now|week|month|next|monday|tuesday|wednesday|thursday|friday|saturday|sunday)")
+CITY = rf"(?P<city>(?!.*\b{TIME_WORDS}\b)[a-z][a-z '\-]{{1,40}}?)"
+# "Quelle heure est-il a Tokyo ?", "a quelle heure ferme..." : not the local time
+PLACE_OR_ZONE = r"\b(?:a|au|aux|en|dans|in|at|utc|gmt|fuseau|timezone|time zone|decalage)\b"
+
+# (intent, pattern, confidence) - patterns run on lowercased, accent-free text
+RULES: List[Tuple[str, re.Pattern, float]] = [
+    ("time", re.compile(r"^(?:quelle heure (?:est[- ]il|il est)|il est quelle heure|l'heure|what time is it|what's the time)$"), 1.0),
+    ("date", re.compile(r"^(?:quel jour (?:sommes[- ]nous|on est|est[- ]on)|on est quel jour|quelle est la date(?: d'aujourd'hui)?|"
+                        r"la date d'aujourd'hui|what day is it|what's the date(?: today)?)$"), 1.0),
+    ("calendar", re.compile(r"^(?:(?:liste|montre|affiche|donne)(?:[- ]moi)? (?:mes|les) (?:evenements|rendez-vous|rdv)|"
+                            r"(?:quels sont )?mes (?:prochains )?(?:evenements|rendez-vous|rdv)|mon agenda|"
+                            r"(?:list|show) my (?:events|calendar|appointments))$"), 0.95),
+    ("weather", re.compile(r"^(?:(?:quelle (?:est la )?)?meteo|quel temps fait[- ]il|weather|what's the weather)"
+                           rf"(?: (?:a|au|en|de|pour|in|at|for))? {CITY}$"), 0.95),
+    # Loose matches, answered only when the embedding model agrees
+    ("time", re.compile(rf"^(?!.*{PLACE_OR_ZONE}).*(?:\bquelle heure\b|\bwhat time\b)"), 0.6),
+    ("calendar", re.compile(r"\bmes (?:prochains )?(?:evenements|rendez-vous|rdv)\b|\bmy (?:events|calendar)\b"), 0.6),
+    ("weather", re.compile(rf"\b(?:meteo|weather|quel temps)\b.*? (?:a|in) {CITY}$"), 0.6),
+]
+
+# Example phrasings embedded once, used to confirm loose matches
+EXAMPLES: Dict[str, List[str]] = {
+    "time": ["Quelle heure est-il ?", "Tu peux me donner l'heure ?", "What time is it now?"],
+    "date": ["Quel jour sommes-nous ?", "Quelle est la date aujourd'hui ?"],
+    "calendar": ["Liste mes événements", "Qu'est-ce que j'ai de prévu dans mon agenda ?", "Show my upcoming events"],
+    "weather": ["Quel temps fait-il à Paris ?", "Donne-moi la météo à Lyon", "What's the weather in London?"],
+}
+
+CALC_PREFIX = re.compile(r"^(?:combien (?:font|fait|ca fait)|calcule(?:[- ]moi)?|calculate|compute|what is|what's|c'est combien)\s*:?\s*")
+CALC_CHARS = re.compile(r"^[\d\s.+\-*/()%^]+$")
+# Numbers joined by - or / alone are ranges, dates or phone numbers ("2024-2025", "12/05/2024")
+# unless the message asks for a result ("combien", "calcule", a trailing "=")
+BARE_RANGE = re.compile(r"^\d+(?:\s*[-/]\s*\d+)+$")
+CALC_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: operator.pow,
+    ast.USub: operator.neg, ast.UAdd: operator.pos,
+}
+
+
+@dataclass
+class FastAnswer:
+    intent: str
+    confidence: float
+    tool: str      # step_start / step_end label
+    input: str
+    output: str    # raw service result shown in step_end
+    answer: str    # final answer text
+
+
+class IntentRouter:
+    _lock = threading.Lock()
+    _examples: Optional[Dict[str, np.ndarray]] = None
+    _stats: Dict[str, int] = {"checked": 0, "answered": 0, "declined": 0}
+    _per_intent: Dict[str, int] = {}
+
+    @staticmethod
+    def normalize(message: str) -> str:
+        text = unicodedata.normalize("NFKD", message.lower())
+        text = "".join(c for c in text if not unicodedata.combining(c))
+        text = text.replace("’", "'")
+        return re.sub(r"\s+", " ", text).strip(" ?!.")
+
+    @classmethod
+    def classify(cls, message: str) -> Optional[Tuple[str, float, Dict[str, str]]]:
+        """(intent, rule confidence, params) of the first matching rule"""
+        text = cls.normalize(message)
+        if len(text) > 120:
+            return None
+        expression = cls._expression(text)
+        if expression:
+            return "calc", 1.0, {"expression": expression}
+        for intent, pattern, confidence in RULES:
+            match = pattern.search(text)
+            if match:
+                return intent, confidence, {k: v.strip() for k, v in match.groupdict().items() if v}
+        return None
+
+    @classmethod
+    def _similarity(cls, vector_memory, intent: str, message: str, embedding: Optional[np.ndarray] = None) -> float:
+        """Best cosine similarity between the message and the intent's example phrasings"""
+        model = vector_memory.model
+        with cls._lock:
+            if cls._examples is None:
+                cls._examples = {}
+                for name, phrases in EXAMPLES.items():
+                    vectors = np.asarray(model.encode(phrases), dtype="float32")
+                    cls._examples[name] = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        query = normalize(embedding if embedding is not None else vector_memory.encode(message))
+        return float(np.max(cls._examples[intent] @ query))
+
+    @classmethod
+    async def try_answer(cls, message: str, vector_memory=None, embedding: Optional[Awaitable] = None) -> Optional[FastAnswer]:
+        """
+        Answer locally when confident, None hands the request to the ReAct loop.
+        `embedding` resolves to the message's embedding, only awaited when the rules are not confident enough.
+        """
+        cls._stats["checked"] += 1
+        match = cls.classify(message)
+        if not match:
+            return None
+        intent, confidence, params = match
+
+        if confidence < FAST_PATH_MIN_CONFIDENCE and intent in EXAMPLES and getattr(vector_memory, "model", None) is not None:
+            try:
+                query = await embedding if embedding is not None else None
+                confidence = max(confidence, await run_blocking("cpu", cls._similarity, vector_memory, intent, message, query))
+            except Exception as e:
+                logger.warning(f"Fast path embedding check failed: {e}")
+        if confidence < FAST_PATH_MIN_CONFIDENCE:
+            return None
+
+        try:
+            answer = await getattr(cls, f"_answer_{intent}")(**params)
+        except Exception as e:
+            logger.warning(f"Fast path '{intent}' failed, falling back to the LLM: {e}")
+            answer = None
+        if answer is None:
+            cls._stats["declined"] += 1
+            return None
+
+        answer.intent, answer.confidence = intent, round(confidence, 3)
+        cls._stats["answered"] += 1
+        cls._per_intent[intent] = cls._per_intent.get(intent, 0) + 1
+        logger.info(f"⚡ Fast path answered '{intent}' locally ({confidence:.2f})")
+        return answer
+
+    # ==================== ANSWERS ====================
+
+    @staticmethod
+    def _now() -> Optional[datetime]:
+        """Server local time like the get_time tool, or FAST_PATH_TIMEZONE when set"""
+        if not FAST_PATH_TIMEZONE:
+            return datetime.now()
+        from .time_service import TimeService
+        now = TimeService.get_current_time(FAST_PATH_TIMEZONE)
+        return None if "error" in now else datetime.strptime(now["datetime"], "%Y-%m-%d %H:%M:%S")
+
+    @classmethod
+    async def _answer_time(cls) -> Optional[FastAnswer]:
+        now = cls._now()
+        if now is None:
+            return None
+        return FastAnswer("time", 1.0, "GET_TIME", FAST_PATH_TIMEZONE or "local", now.strftime("%Y-%m-%d %H:%M:%S"), f"Il est {now:%H:%M}.")
+
+    @classmethod
+    async def _answer_date(cls) -> Optional[FastAnswer]:
+        now = cls._now()
+        if now is None:
+            return None
+        text = f"Nous sommes le {DAYS_FR[now.weekday()]} {now.day} {MONTHS_FR[now.month - 1]} {now.year}."
+        return FastAnswer("date", 1.0, "GET_TIME", FAST_PATH_TIMEZONE or "local", now.strftime("%Y-%m-%d %H:%M:%S"), text)
+
+    @staticmethod
+    async def _answer_calendar() -> Optional[FastAnswer]:
+        from .calendar_service import CalendarService
+        events = await run_blocking("db", CalendarService.get_events)
+        now = datetime.now().isoformat()
+        upcoming = [e for e in events if (e["end"] or e["start"] or "") >= now][:10]
+        if not upcoming:
+            text = "Aucun événement à venir dans ton calendrier."
+        else:
+            lines = [f"- **{e['title']}** — {e['start'][:16].replace('T', ' ')}" for e in upcoming]
+            text = "Tes prochains événements :\n" + "\n".join(lines)
+        return FastAnswer("calendar", 1.0, "MANAGE_CALENDAR", "list", f"{len(upcoming)} upcoming / {len(events)} events", text)
+
+    @staticmethod
+    async def _answer_weather(city: str) -> Optional[FastAnswer]:
+        from .weather_service import WeatherService
+        weather = await WeatherService.get_weather(city)
+        if "error" in weather:
+            return None  # unknown city or no API key: let the agent handle it
+        text = (
+            f"À {weather['city']} ({weather['country']}) : {weather['description']}, {weather['temperature']:.0f}°C "
+            f"(ressenti {weather['feels_like']:.0f}°C), humidité {weather['humidity']}%, vent {weather['wind_speed']} m/s."
+        )
+        return FastAnswer("weather", 1.0, "GET_WEATHER", city, str(weather), text)
+
+    @classmethod
+    async def _answer_calc(cls, expression: str) -> Optional[FastAnswer]:
+        value = cls.evaluate(expression)
+        if value is None:
+            return None
+        shown = expression.replace("**", "^")
+        return FastAnswer("calc", 1.0, "CALCULATE", shown, str(value), f"{shown} = **{value}**")
+
+    # ==================== SAFE ARITHMETIC ====================
+
+    @staticmethod
+    def _expression(text: str) -> Optional[str]:
+        """Arithmetic expression of the message, None when it is not a pure calculation"""
+        asks_result = bool(CALC_PREFIX.match(text)) or text.rstrip().endswith("=")
+        candidate = CALC_PREFIX.sub("", text).rstrip(" =")
+        candidate = candidate.replace("×", "*").replace("÷", "/").replace(" x ", " * ")
+        candidate = re.sub(r"(\d),(\d)", r"\1.\2", candidate)
+        if not CALC_CHARS.match(candidate) or not re.search(r"\d\s*(?:\*\*|[-+*/%^])\s*[-+]?\s*[\d(]", candidate):
+            return None
+        if not asks_result and BARE_RANGE.match(candidate.strip()):
+            return None
+        return re.sub(r"\s+", " ", candidate.replace("^", "**")).strip()
+
+    @classmethod
+    def evaluate(cls, expression: str) -> Optional[Any]:
+        """Numbers and + - * / // % ** only, bounded exponents, no names or calls"""
+        try:
+            value = cls._eval(ast.parse(expression, mode="eval").body)
+        except (SyntaxError, ValueError, TypeError, ZeroDivisionError, OverflowError):
+            return None
+        if isinstance(value, float):
+            if value != value or value in (float("inf"), float("-inf")):
+                return None
+            value = int(value) if value.is_integer() and abs(value) < 1e15 else round(value, 10)
+        return value
+
+    @classmethod
+    def _eval(cls, node):
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            return node.value
+        if isinstance(node, ast.UnaryOp) and type(node.op) in CALC_OPERATORS:
+            return CALC_OPERATORS[type(node.op)](cls._eval(node.operand))
+        if isinstance(node, ast.BinOp) and type(node.op) in CALC_OPERATORS:
+            left, right = cls._eval(node.left), cls._eval(node.right)
+            if isinstance(node.op, ast.Pow) and (abs(right) > 100 or abs(left) > 1e6):
+                raise ValueError("exponent too large")
+            return CALC_OPERATORS[type(node.op)](left, right)
+        raise ValueError(f"unsupported expression: {type(node).__name__}")
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        checked = cls._stats["checked"]
+        return {
+            **cls._stats,
+            "per_intent": dict(cls._per_intent),
+            "hit_rate": round(cls._stats["answered"] / checked, 3) if checked else 0.0,
+            "min_confidence": FAST_PATH_MIN_CONFIDENCE,
+        }
@@ -0,0 +1,154 @@
+"""
+Message Index - Per-session semantic index of chat messages
+Each ChatMessage is embedded once, off the request path after it is
+written (VectorMemory model, stored normalized in ChatMessage.embedding).
+Sessions are loaded from the DB into an in-memory matrix on first search
+and kept in an LRU, new messages are appended to loaded sessions. The
+ReAct context gets the older messages most similar to the question next
+to the recent tail.
+"""
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import RELEVANT_HISTORY_ENABLED, RELEVANT_HISTORY_TOP_K, RELEVANT_HISTORY_MIN_SCORE, MESSAGE_INDEX_SESSIONS
+from ..core.database import SessionLocal
+from ..models.chat import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+# Candidates returned per search: the recent tail is filtered out by the caller
+CANDIDATES_PER_RESULT = 4
+
+
+def normalize(vec: np.ndarray) -> np.ndarray:
+    """Unit-length float32 copy (cosine similarity by dot product)"""
+    vec = np.asarray(vec, dtype="float32")
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class MessageIndex:
+    _lock = threading.Lock()
+    _sessions: "OrderedDict[str, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()  # session_id -> (message ids, normalized embeddings)
+    _loading: Dict[str, List[Tuple[int, np.ndarray]]] = {}  # session_id -> messages added while it is read from the DB
+    _stats = {"embedded": 0, "sessions_loaded": 0, "searches": 0, "results": 0}
+
+    @staticmethod
+    def enabled(vector_memory) -> bool:
+        return RELEVANT_HISTORY_ENABLED and vector_memory is not None and getattr(vector_memory, "model", None) is not None
+
+    @classmethod
+    def embed(cls, vector_memory, text: str, embedding: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """Normalized float32 embedding (of `embedding` when already computed), None when the model is unavailable"""
+        if not cls.enabled(vector_memory) or not text:
+            return None
+        vec = embedding if embedding is not None else vector_memory.encode(text)
+        if vec is None:
+            return None
+        cls._stats["embedded"] += 1
+        return normalize(vec)
+
+    @classmethod
+    def add(cls, session_id: str, message_id: int, embedding: np.ndarray):
+        """Append a new message to its session's matrix (if loaded, otherwise read from the DB later)"""
+        with cls._lock:
+            loaded = cls._sessions.get(session_id)
+            if loaded is None:
+                if session_id in cls._loading:
+                    cls._loading[session_id].append((message_id, embedding))  # The load may have read the DB before it
+                return
+            cls._sessions[session_id] = cls._merge(*loaded, [(message_id, embedding)])
+
+    @staticmethod
+    def _merge(ids: np.ndarray, matrix: np.ndarray, extra: List[Tuple[int, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Append the (message id, embedding) pairs whose id is not in `ids` yet"""
+        known = set(ids.tolist())
+        new_ids, new_rows = [], []
+        for message_id, embedding in extra:
+            if message_id not in known:
+                known.add(message_id)
+                new_ids.append(message_id)
+                new_rows.append(embedding)
+        if not new_ids:
+            return ids, matrix
+        rows = np.vstack(new_rows)
+        matrix = np.vstack([matrix, rows]) if len(ids) else rows
+        return np.append(ids, new_ids).astype("int64"), matrix
+
+    @classmethod
+    def _session_matrix(cls, session_id: str) -> Tuple[np.ndarray, np.ndarray]:
+        with cls._lock:
+            loaded = cls._sessions.get(session_id)
+            if loaded is not None:
+                cls._sessions.move_to_end(session_id)
+                return loaded
+            cls._loading.setdefault(session_id, [])
+
+        with SessionLocal() as db:
+            rows = db.query(ChatMessage.id, ChatMessage.embedding)\
+                .filter(ChatMessage.session_id == session_id, ChatMessage.embedding.isnot(None))\
+                .order_by(ChatMessage.id)\
+                .all()
+        ids = np.array([row.id for row in rows], dtype="int64")
+        matrix = np.vstack([np.frombuffer(row.embedding, dtype="float32") for row in rows]) if rows else np.empty((0, 0), dtype="float32")
+
+        with cls._lock:
+            # Keep what a concurrent load or add() cached meanwhile instead of overwriting it
+            extra = cls._loading.pop(session_id, [])
+            cached = cls._sessions.get(session_id)
+            if cached is not None:
+                extra = list(zip(cached[0].tolist(), cached[1])) + extra
+            ids, matrix = cls._merge(ids, matrix, extra)
+            cls._sessions[session_id] = (ids, matrix)
+            cls._sessions.move_to_end(session_id)
+            while len(cls._sessions) > MESSAGE_INDEX_SESSIONS:
+                cls._sessions.popitem(last=False)
+            cls._stats["sessions_loaded"] += 1
+        return ids, matrix
+
+    @classmethod
+    def search(cls, session_id: str, query: np.ndarray, top_k: int = RELEVANT_HISTORY_TOP_K,
+               min_score: float = RELEVANT_HISTORY_MIN_SCORE) -> List[Dict[str, Any]]:
+        """
+        Messages of the session most similar to the query, best first.
+        Returns up to top_k * CANDIDATES_PER_RESULT candidates: the caller drops
+        the ones already in its recent history and keeps top_k.
+        """
+        ids, matrix = cls._session_matrix(session_id)
+        cls._stats["searches"] += 1
+        if not len(ids):
+            return []
+        scores = matrix @ normalize(query)
+        order = [i for i in np.argsort(-scores)[:top_k * CANDIDATES_PER_RESULT] if scores[i] >= min_score]
+        if not order:
+            return []
+
+        best = {int(ids[i]): float(scores[i]) for i in order}
+        with SessionLocal() as db:
+            rows = db.query(ChatMessage.id, ChatMessage.role, ChatMessage.content, ChatMessage.token_count)\
+                .filter(ChatMessage.id.in_(best))\
+                .all()
+        return sorted(
+            ({"id": r.id, "role": r.role, "content": r.content, "token_count": r.token_count, "score": best[r.id]} for r in rows),
+            key=lambda m: -m["score"]
+        )
+
+    @classmethod
+    def record_results(cls, count: int):
+        cls._stats["results"] += count
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        with cls._lock:
+            cached = len(cls._sessions)
+        return {
+            "enabled": RELEVANT_HISTORY_ENABLED,
+            "top_k": RELEVANT_HISTORY_TOP_K,
+            "min_score": RELEVANT_HISTORY_MIN_SCORE,
+            "sessions_cached": cached,
+            **cls._stats,
+        }
@@ -0,0 +1,54 @@
+"""
+Model Router - Per-step model choice for the ReAct loop
+Planning steps (picking a tool) go to the small model; the step that
+synthesizes observations into the final answer, and any step after
+repeated validation failures, go to the large model. A small-model step
+that calls no tool is redone on the large model, which writes the final
+answer (MODEL_KEEP_SMALL_ANSWERS keeps it instead).
+"""
+import logging
+from typing import Optional, Tuple
+
+from config import MISTRAL_SMALL_MODEL, MISTRAL_LARGE_MODEL, MODEL_ROUTING_ENABLED, MODEL_ESCALATE_AFTER_FAILURES, MODEL_KEEP_SMALL_ANSWERS
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRouter:
+    """One instance per chat turn, like LoopDetector"""
+
+    def __init__(self):
+        self.validation_failures = 0
+        self.after_observation = False
+        self._escalate_reason: Optional[str] = None
+
+    def choose(self) -> Tuple[str, str]:
+        """(model, reason) for the next step"""
+        if not MODEL_ROUTING_ENABLED:
+            return MISTRAL_LARGE_MODEL, "routing_disabled"
+        if self._escalate_reason:
+            reason, self._escalate_reason = self._escalate_reason, None
+            return MISTRAL_LARGE_MODEL, reason
+        if self.validation_failures >= MODEL_ESCALATE_AFTER_FAILURES:
+            return MISTRAL_LARGE_MODEL, "validation_failures"
+        if self.after_observation:
+            return MISTRAL_LARGE_MODEL, "synthesis"
+        return MISTRAL_SMALL_MODEL, "planning"
+
+    @staticmethod
+    def is_small(model: str) -> bool:
+        return MODEL_ROUTING_ENABLED and model == MISTRAL_SMALL_MODEL != MISTRAL_LARGE_MODEL
+
+    @classmethod
+    def is_draft(cls, model: str) -> bool:
+        """Small-model step whose answer (if it calls no tool) is redone on the large model: not streamed"""
+        return cls.is_small(model) and not MODEL_KEEP_SMALL_ANSWERS
+
+    def escalate(self, reason: str):
+        """Redo the current step with the large model"""
+        logger.info(f"⬆️ Escalating to {MISTRAL_LARGE_MODEL} ({reason})")
+        self._escalate_reason = reason
+
+    def record_step(self, ran_tools: bool, rejected_calls: int = 0):
+        self.after_observation = ran_tools
+        self.validation_failures += rejected_calls
@@ -0,0 +1,136 @@
+"""
+Observation Compressor - Token-budgeted tool outputs for the ReAct context
+Long observations are split into passages, ranked against the user query
+with BM25 and the best ones kept (in their original order) within the
+tool's token budget. What was dropped is noted in the observation itself
+and counted in the compressor stats.
+"""
+import json
+import math
+import re
+import threading
+import logging
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import OBSERVATION_TOKEN_BUDGETS, OBSERVATION_MAX_INPUT_CHARS
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class ObservationCompressor:
+    PASSAGE_WORDS = 80  # Target passage size for plain text
+    K1 = 1.5
+    B = 0.75
+
+    _lock = threading.Lock()
+    _stats: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def budget_for(cls, tool_name: str) -> int:
+        return OBSERVATION_TOKEN_BUDGETS.get(tool_name, OBSERVATION_TOKEN_BUDGETS["default"])
+
+    @classmethod
+    def compress(cls, tool_name: str, text: str, query: str, count_tokens: Callable[[str], int],
+                 count_many: Optional[Callable[[List[str]], List[int]]] = None) -> Tuple[str, Dict[str, Any]]:
+        """Return (observation, info), info records kept/dropped passages and tokens"""
+        budget = cls.budget_for(tool_name)
+        text = text[:OBSERVATION_MAX_INPUT_CHARS]
+        tokens_in = count_tokens(text)
+        info = {"tool": tool_name, "budget": budget, "tokens_in": tokens_in, "tokens_out": tokens_in, "passages": 0, "dropped": 0}
+        if tokens_in <= budget:
+            cls._record(info)
+            return text, info
+
+        passages, is_json = cls._split(text)
+        sizes = count_many(passages) if count_many else [count_tokens(p) for p in passages]
+        scores = cls._bm25(query, passages)
+
+        # Best passages first, earlier ones win ties. Keep room for the note.
+        available = budget - 40
+        kept = []
+        for i in sorted(range(len(passages)), key=lambda i: (-scores[i], i)):
+            if sizes[i] <= available:
+                kept.append(i)
+                available -= sizes[i]
+        kept.sort()
+
+        if kept:
+            body = json.dumps([json.loads(passages[i]) for i in kept], ensure_ascii=False) if is_json else "\n".join(passages[i] for i in kept)
+        else:
+            # A single passage larger than the whole budget: hard cut
+            body = text[:budget * 3]
+        dropped = len(passages) - len(kept)
+        tokens_out = count_tokens(body)
+        note = f"\n[COMPRESSED: kept {len(kept)}/{len(passages)} passages most relevant to the query, ~{tokens_in - tokens_out} tokens dropped]"
+
+        info.update({"tokens_out": tokens_out, "passages": len(passages), "dropped": dropped})
+        cls._record(info)
+        logger.info(f"🗜️ {tool_name} observation {tokens_in} -> {tokens_out} tokens ({dropped}/{len(passages)} passages dropped)")
+        return body + note, info
+
+    @classmethod
+    def _split(cls, text: str) -> Tuple[List[str], bool]:
+        """JSON arrays split per item, plain text per paragraph (long ones windowed)"""
+        stripped = text.strip()
+        if stripped.startswith("["):
+            try:
+                items = json.loads(stripped)
+                if isinstance(items, list) and items:
+                    return [json.dumps(item, ensure_ascii=False) for item in items], True
+            except json.JSONDecodeError:
+                pass
+
+        passages = []
+        for block in re.split(r"\n\s*\n|\n", text):
+            words = block.split()
+            if not words:
+                continue
+            if passages and len(words) + len(passages[-1].split()) <= cls.PASSAGE_WORDS // 2:
+                # Merge short lines (menus, headings) with the previous passage
+                passages[-1] += " " + " ".join(words)
+                continue
+            for i in range(0, len(words), cls.PASSAGE_WORDS):
+                passages.append(" ".join(words[i:i + cls.PASSAGE_WORDS]))
+        return passages, False
+
+    @classmethod
+    def _bm25(cls, query: str, passages: List[str]) -> List[float]:
+        query_terms = set(WORD_PATTERN.findall(query.lower()))
+        docs = [Counter(WORD_PATTERN.findall(p.lower())) for p in passages]
+        if not query_terms or not docs:
+            return [0.0] * len(passages)
+
+        n = len(docs)
+        lengths = [sum(d.values()) for d in docs]
+        avg_len = (sum(lengths) / n) or 1.0
+        df = {t: sum(1 for d in docs if t in d) for t in query_terms}
+
+        scores = []
+        for doc, length in zip(docs, lengths):
+            score = 0.0
+            for term in query_terms:
+                tf = doc.get(term, 0)
+                if not tf:
+                    continue
+                idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+                score += idf * tf * (cls.K1 + 1) / (tf + cls.K1 * (1 - cls.B + cls.B * length / avg_len))
+            scores.append(score)
+        return scores
+
+    @classmethod
+    def _record(cls, info: Dict[str, Any]):
+        with cls._lock:
+            stats = cls._stats.setdefault(info["tool"], {"calls": 0, "compressed": 0, "tokens_in": 0, "tokens_out": 0, "passages_dropped": 0})
+            stats["calls"] += 1
+            stats["compressed"] += int(info["tokens_out"] < info["tokens_in"])
+            stats["tokens_in"] += info["tokens_in"]
+            stats["tokens_out"] += info["tokens_out"]
+            stats["passages_dropped"] += info["dropped"]
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        with cls._lock:
+            return {"budgets": OBSERVATION_TOKEN_BUDGETS, "tools": {k: dict(v) for k, v in cls._stats.items()}}
@@ -5,6 +5,8 @@ from typing import List, Dict, Any
 import socket
 import whois
 from datetime import datetime
+from ..core.http_clients import HttpClientRegistry
+from ..core.executors import run_blocking
 
 logger = logging.getLogger(__name__)
 
@@ -27,15 +29,14 @@ class OSINTService:
     @classmethod
     async def check_username(cls, username: str) -> List[Dict[str, str]]:
         """Check if a username exists on various platforms."""
-        results = []
-        async with httpx.AsyncClient(timeout=5.0, follow_redirects=True) as client:
-            tasks = []
-            for platform, url_pattern in cls.PLATFORMS.items():
-                url = url_pattern.format(username)
-                tasks.append(cls._check_platform(client, platform, url))
-            
-            platform_results = await asyncio.gather(*tasks)
-            results = [r for r in platform_results if r["status"] == "FOUND"]
+        client = HttpClientRegistry.get("generic")
+        tasks = []
+        for platform, url_pattern in cls.PLATFORMS.items():
+            url = url_pattern.format(username)
+            tasks.append(cls._check_platform(client, platform, url))
+        
+        platform_results = await asyncio.gather(*tasks)
+        results = [r for r in platform_results if r["status"] == "FOUND"]
         return results
 
     @staticmethod
@@ -44,7 +45,7 @@ class OSINTService:
             headers = {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
             }
-            resp = await client.get(url, headers=headers)
+            resp = await client.get(url, headers=headers, timeout=5.0, follow_redirects=True)
             
             # Simple heuristic: 200 OK usually means found, though some redirect to home
             # We filter out common false positives like "login" pages or obvious 404 text
@@ -64,16 +65,16 @@ class OSINTService:
     async def domain_lookup(cls, domain: str) -> Dict[str, Any]:
         """Perform a WHOIS and DNS lookup for a domain."""
         try:
-            # WHOIS (blocking call, run in thread)
-            loop = asyncio.get_event_loop()
-            w = await loop.run_in_executor(None, whois.whois, domain)
+            # WHOIS and DNS are blocking calls, run them side by side in the dns pool
+            w, dns = await asyncio.gather(
+                run_blocking("dns", whois.whois, domain),
+                run_blocking("dns", socket.gethostbyname_ex, domain),
+                return_exceptions=True
+            )
+            if isinstance(w, Exception):
+                raise w
             
-            # DNS
-            ips = []
-            try:
-                ips = socket.gethostbyname_ex(domain)[2]
-            except:
-                pass
+            ips = [] if isinstance(dns, Exception) else dns[2]
 
             return {
                 "domain": domain,
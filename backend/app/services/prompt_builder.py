@@ -0,0 +1,121 @@
+"""
+Prompt Builder - Immutable system-prompt segments, ordered static -> volatile
+The static prefix is byte-identical across requests so the provider can reuse
+its prefix cache, and its token count is computed once instead of every turn.
+With native function calling the tools travel in the `tools` payload, so the
+text tool library and the JSON-in-text instructions are left out.
+"""
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from config import MISTRAL_FUNCTION_CALLING
+from .tool_registry import ToolRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class SystemPrompt:
+    IDENTITY = (
+        "You are Eveline, a personal AI assistant. You help with EVERYDAY tasks.\n"
+        "Current date and time: see SYSTEM_STATE timestamp.\n\n"
+        "<directives>\n"
+        "- LANGUAGE: You MUST answer in FRENCH (Français) unless explicitly asked otherwise.\n"
+        "- BE USEFUL: Help with daily tasks: reminders, calculations, research, planning, organization.\n"
+        "- SPEED AND ACTION: Use tools immediately. Do not announce them.\n"
+        "- DIRECT RESPONSES: Be concise and helpful. No fluff.\n"
+        "- PERSISTENCE: If research is needed, use search/scrape as a chain.\n"
+        "- NO CHATTER: Do not say 'I will search...'. {action}\n"
+        "- PROACTIVE: Suggest improvements, remind about upcoming events, be anticipatory.\n"
+        "- LEARN FROM COMMANDS: Remember command outputs for future reference.\n"
+        "</directives>\n\n"
+    )
+
+    CAPABILITIES = (
+        "<everyday_capabilities>\n"
+        "You can help with:\n"
+        "- Quick calculations (use sandbox for math)\n"
+        "- Setting reminders and calendar events\n"
+        "- Research and web lookups\n"
+        "- File and system management (via command tool)\n"
+        "- Note taking and organization\n"
+        "- Weather and time information\n"
+        "- Crypto portfolio monitoring\n"
+        "- Image analysis and search\n"
+        "- Learning and remembering Linux commands\n"
+        "</everyday_capabilities>\n\n"
+    )
+
+    # How the model is told to act, per tool-call protocol
+    ACTION = {
+        "text": "Just output the JSON Action.",
+        "native": "Just call the tool.",
+    }
+
+    # Variant segments appended after the shared prefix
+    VARIANTS = {
+        "default": "",
+        "discord": "<discord_mode>You are on Discord. Be cool, use emojis, keep it crisp.</discord_mode>\n\n",
+    }
+
+    MAX_PRUNED_PROMPTS = 256  # Distinct (variant, tool subset) prompts kept
+
+    _prompts: Dict[str, str] = {}
+    _token_counts: Dict[str, int] = {}
+    _pruned: "OrderedDict[Tuple[str, Tuple[str, ...]], Tuple[str, Optional[int]]]" = OrderedDict()
+    _count_tokens: Optional[Callable[[str], int]] = None
+
+    @classmethod
+    def get(cls, variant: str = "default", tools: Optional[Sequence[str]] = None) -> str:
+        """Static system prompt for a variant (assembled once), `tools` restricts the tool library"""
+        if variant not in cls.VARIANTS:
+            variant = "default"
+        if tools is not None:
+            return cls._get_pruned(variant, tools)[0]
+        prompt = cls._prompts.get(variant)
+        if prompt is None:
+            prompt = cls._assemble(variant)
+            cls._prompts[variant] = prompt
+        return prompt
+
+    @classmethod
+    def token_count(cls, variant: str = "default", tools: Optional[Sequence[str]] = None) -> Optional[int]:
+        """Precomputed token count, None until warmup() ran"""
+        if variant not in cls.VARIANTS:
+            variant = "default"
+        if tools is not None:
+            return cls._get_pruned(variant, tools)[1]
+        return cls._token_counts.get(variant)
+
+    @classmethod
+    def _get_pruned(cls, variant: str, tools: Sequence[str]) -> Tuple[str, Optional[int]]:
+        """Prompt with a reduced tool library, assembled and counted once per tool subset"""
+        if MISTRAL_FUNCTION_CALLING:
+            # No tool library in the prompt: every subset shares the full prompt
+            return cls.get(variant), cls._token_counts.get(variant)
+        key = (variant, tuple(sorted(tools)))
+        entry = cls._pruned.get(key)
+        if entry is None:
+            prompt = cls._assemble(variant, key[1])
+            entry = (prompt, cls._count_tokens(prompt) if cls._count_tokens else None)
+            cls._pruned[key] = entry
+            if len(cls._pruned) > cls.MAX_PRUNED_PROMPTS:
+                cls._pruned.popitem(last=False)
+        else:
+            cls._pruned.move_to_end(key)
+        return entry
+
+    @classmethod
+    def _assemble(cls, variant: str, tools: Optional[Sequence[str]] = None) -> str:
+        if MISTRAL_FUNCTION_CALLING:
+            return cls.IDENTITY.format(action=cls.ACTION["native"]) + cls.CAPABILITIES + cls.VARIANTS[variant]
+        identity = cls.IDENTITY.format(action=cls.ACTION["text"])
+        return identity + cls.CAPABILITIES + ToolRegistry.render_library(tools) + cls.VARIANTS[variant]
+
+    @classmethod
+    def warmup(cls, count_tokens: Callable[[str], int]):
+        """Assemble every variant and count its tokens (called once at startup)"""
+        cls._count_tokens = count_tokens
+        for variant in cls.VARIANTS:
+            cls._token_counts[variant] = count_tokens(cls.get(variant))
+        logger.info(f"🧱 System prompt ready ({', '.join(f'{v}={n} tok' for v, n in cls._token_counts.items())})")
@@ -3,10 +3,13 @@ Sandbox Service - Code and Command Execution
 Provides Python code execution and shell command capabilities for Eveline.
 """
 
+import asyncio
 import subprocess
 import logging
 import os
+import signal
 import sys
+import tempfile
 from typing import Dict, Any, Generator
 
 logger = logging.getLogger(__name__)
@@ -26,35 +29,58 @@ class SandboxService:
         if not os.path.exists(cls.WORKING_DIR):
             os.makedirs(cls.WORKING_DIR, exist_ok=True)
 
+    @staticmethod
+    async def _run_process(*args, shell: bool, timeout: float) -> tuple[int, str, str]:
+        """
+        Run a subprocess without blocking a worker thread.
+        The whole process group is killed on timeout or when the awaiting task is cancelled.
+        """
+        if shell:
+            process = await asyncio.create_subprocess_shell(
+                args[0], stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                cwd=SandboxService.WORKING_DIR, start_new_session=True
+            )
+        else:
+            process = await asyncio.create_subprocess_exec(
+                *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                cwd=SandboxService.WORKING_DIR, start_new_session=True
+            )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        except BaseException:
+            # TimeoutError or CancelledError (deadline / client gone): do not leave it running
+            if process.returncode is None:
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                await process.wait()
+                logger.warning(f"🔪 Sandbox process {process.pid} killed")
+            raise
+        return process.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
     @classmethod
-    def execute_code(cls, code: str) -> str:
+    async def execute_code(cls, code: str, timeout: float = 30) -> str:
         """Execute Python code in a subprocess and return output"""
         cls._ensure_working_dir()
-        script_path = os.path.join(cls.WORKING_DIR, "temp_script.py")
+        # Unique script per call, tool calls of one step may run concurrently
+        fd, script_path = tempfile.mkstemp(suffix=".py", prefix="script_", dir=cls.WORKING_DIR)
         
         try:
-            with open(script_path, "w", encoding="utf-8") as f:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
                 f.write(code)
             
-            result = subprocess.run(
-                [sys.executable, script_path],
-                capture_output=True,
-                text=True,
-                timeout=30,
-                cwd=cls.WORKING_DIR
-            )
-            
-            output = result.stdout
-            if result.stderr:
-                output += f"\nSTDERR:\n{result.stderr}"
+            returncode, output, stderr = await cls._run_process(sys.executable, script_path, shell=False, timeout=timeout)
+            if stderr:
+                output += f"\nSTDERR:\n{stderr}"
             
-            if result.returncode != 0:
-                return f"EXECUTION ERROR (Code {result.returncode}):\n{output}"
+            if returncode != 0:
+                return f"EXECUTION ERROR (Code {returncode}):\n{output}"
             
             return output if output.strip() else "Success (No output)"
             
-        except subprocess.TimeoutExpired:
-            return "ERROR: Execution timed out (30s limit)"
+        except asyncio.TimeoutError:
+            return f"ERROR: Execution timed out ({timeout:g}s limit)"
         except Exception as e:
             return f"SANDBOX EXCEPTION: {str(e)}"
         finally:
@@ -65,31 +91,22 @@ class SandboxService:
                     pass
 
     @classmethod
-    def execute_command(cls, command: str) -> str:
+    async def execute_command(cls, command: str, timeout: float = 60) -> str:
         """Execute shell command and return complete output"""
         cls._ensure_working_dir()
         
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=60,
-                cwd=cls.WORKING_DIR
-            )
-            
-            output = result.stdout
-            if result.stderr:
-                output += f"\nSTDERR:\n{result.stderr}"
+            returncode, output, stderr = await cls._run_process(command, shell=True, timeout=timeout)
+            if stderr:
+                output += f"\nSTDERR:\n{stderr}"
                 
-            if result.returncode != 0:
-                return f"COMMAND ERROR (Code {result.returncode}):\n{output}"
+            if returncode != 0:
+                return f"COMMAND ERROR (Code {returncode}):\n{output}"
                 
             return output if output.strip() else "Command executed successfully."
             
-        except subprocess.TimeoutExpired:
-            return "ERROR: Command timed out (60s limit)"
+        except asyncio.TimeoutError:
+            return f"ERROR: Command timed out ({timeout:g}s limit)"
         except Exception as e:
             return f"COMMAND EXCEPTION: {str(e)}"
 
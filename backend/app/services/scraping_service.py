@@ -4,6 +4,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 from config import PLAYWRIGHT_SERVICE_URL
+from ..core.http_clients import HttpClientRegistry
 
 class ScrapingService:
     @staticmethod
@@ -14,20 +15,19 @@ class ScrapingService:
         logger.info(f"🌐 Scraping via Node.js service: {url}")
         
         try:
-            async with httpx.AsyncClient(timeout=40.0) as client:
-                response = await client.post(
-                    f"{PLAYWRIGHT_SERVICE_URL}/scrape",
-                    json={"url": url}
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    text = data.get("text", "")
-                    logger.info(f"✅ Scraped {len(text)} characters")
-                    return text
-                else:
-                    logger.error(f"❌ Node.js service returned {response.status_code}")
-                    return f"Service error: {response.status_code}"
+            response = await HttpClientRegistry.get("playwright").post(
+                f"{PLAYWRIGHT_SERVICE_URL}/scrape",
+                json={"url": url}
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                text = data.get("text", "")
+                logger.info(f"✅ Scraped {len(text)} characters")
+                return text
+            else:
+                logger.error(f"❌ Node.js service returned {response.status_code}")
+                return f"Service error: {response.status_code}"
                     
         except httpx.ConnectError:
             logger.error("❌ Cannot connect to Playwright service")
@@ -4,17 +4,18 @@ import logging
 logger = logging.getLogger(__name__)
 
 from config import PLAYWRIGHT_SERVICE_URL
+from ..core.http_clients import HttpClientRegistry
 
 class SearchService:
     @staticmethod
-    def search(query: str, region: str = "wt-wt", max_results: int = 5) -> list[dict]:
+    async def search(query: str, region: str = "wt-wt", max_results: int = 5) -> list[dict]:
         """
         Search using Node.js Playwright service.
         """
         logger.info(f"🔍 Searching via Node.js service: {query}")
         
         try:
-            response = httpx.post(
+            response = await HttpClientRegistry.get("playwright").post(
                 f"{PLAYWRIGHT_SERVICE_URL}/search",
                 json={"query": query, "max_results": max_results},
                 timeout=30.0
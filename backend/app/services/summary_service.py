@@ -0,0 +1,174 @@
+"""
+Conversation Summarizer - Rolling per-session summaries of evicted history
+Chat turns only read the stored summary (ChatSession.summary) and schedule
+a refresh; a background worker started in main.py's lifespan folds the
+messages that fell out of the history budget into the summary with the
+small model, off the request path. Refreshes wait until at least
+SUMMARY_MIN_EVICTED_TOKENS of evicted history are pending, and queued
+sessions are processed in batches through the LLM gateway.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from config import (
+    SUMMARY_ENABLED, SUMMARY_MODEL, SUMMARY_MIN_EVICTED_TOKENS, SUMMARY_BATCH_TOKENS,
+    SUMMARY_BATCH_SESSIONS, SUMMARY_MAX_TOKENS, SUMMARY_TIMEOUT,
+)
+from ..core.database import SessionLocal
+from ..core.deadline import Deadline
+from ..core.executors import run_blocking
+from ..models.chat import ChatSession
+from .history_service import HistoryService
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = (
+    "You maintain the running summary of a conversation between a user and the assistant Eveline. "
+    "Merge the new messages into the previous summary. Keep facts, decisions, names, numbers, "
+    "open questions and user preferences; drop small talk. Answer with the summary only, "
+    "in the conversation's language, under 250 words."
+)
+MESSAGE_CHARS = 1500  # Per-message cap in the summarization prompt
+
+
+class ConversationSummarizer:
+    _queue: Optional[asyncio.Queue] = None
+    _task: Optional[asyncio.Task] = None
+    _pending: Dict[str, int] = {}  # session_id -> id of the oldest message still in the context
+    _stats = {"scheduled": 0, "refreshes": 0, "skipped": 0, "failures": 0, "messages_summarized": 0}
+
+    @classmethod
+    async def start(cls):
+        """Start the background worker (main.py lifespan)"""
+        if not SUMMARY_ENABLED or (cls._task and not cls._task.done()):
+            return
+        cls._queue = asyncio.Queue()
+        cls._pending.clear()
+        cls._task = asyncio.create_task(cls._worker())
+        logger.info("📝 Conversation summarizer started")
+
+    @classmethod
+    async def stop(cls):
+        if cls._task:
+            cls._task.cancel()
+            try:
+                await cls._task
+            except asyncio.CancelledError:
+                pass
+            cls._task = None
+
+    @classmethod
+    def schedule(cls, session_id: str, first_loaded_id: int):
+        """Ask for a refresh of the messages older than first_loaded_id (never blocks)"""
+        if cls._task is None or cls._task.done():
+            return
+        if session_id in cls._pending:
+            cls._pending[session_id] = max(cls._pending[session_id], first_loaded_id)
+            return
+        cls._pending[session_id] = first_loaded_id
+        cls._queue.put_nowait(session_id)
+        cls._stats["scheduled"] += 1
+
+    @staticmethod
+    def get_summary(session_id: str) -> Optional[str]:
+        """Latest ready summary of the session, None if there is none yet"""
+        with SessionLocal() as db:
+            session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
+            return session.summary if session else None
+
+    # ==================== WORKER ====================
+
+    @classmethod
+    async def _worker(cls):
+        while True:
+            batch = [await cls._queue.get()]
+            while len(batch) < SUMMARY_BATCH_SESSIONS and not cls._queue.empty():
+                batch.append(cls._queue.get_nowait())
+            jobs = [(session_id, cls._pending.pop(session_id)) for session_id in batch]
+            results = await asyncio.gather(*(cls._refresh(*job) for job in jobs), return_exceptions=True)
+            for (session_id, _), result in zip(jobs, results):
+                if isinstance(result, Exception):
+                    cls._stats["failures"] += 1
+                    logger.warning(f"Summary refresh failed for session {session_id}: {result}")
+
+    @classmethod
+    async def _refresh(cls, session_id: str, first_loaded_id: int):
+        loaded = await run_blocking("db", cls._load_evicted, session_id, first_loaded_id)
+        if loaded is None:
+            cls._stats["skipped"] += 1
+            return
+        previous, messages, tokens = loaded
+        summary = await cls._summarize(previous, messages)
+        if not summary:
+            cls._stats["failures"] += 1
+            return
+        await run_blocking("db", cls._store, session_id, summary, messages[-1].id)
+        cls._stats["refreshes"] += 1
+        cls._stats["messages_summarized"] += len(messages)
+        logger.info(f"📝 Summary refreshed for session {session_id} (+{len(messages)} messages)")
+
+        if tokens >= SUMMARY_BATCH_TOKENS:
+            # More evicted history than one batch: keep folding it in
+            cls.schedule(session_id, first_loaded_id)
+
+    @staticmethod
+    def _load_evicted(session_id: str, first_loaded_id: int):
+        """(previous summary, evicted messages not yet summarized, their tokens), None below the threshold"""
+        with SessionLocal() as db:
+            session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
+            if session is None:
+                return None
+            messages = HistoryService.get_messages_between(
+                db, session_id, session.summary_upto_id or 0, first_loaded_id, SUMMARY_BATCH_TOKENS
+            )
+            tokens = sum(m.token_count or len(m.content or "") // 4 for m in messages)
+            if tokens < SUMMARY_MIN_EVICTED_TOKENS:
+                return None
+            db.expunge_all()
+            return session.summary, messages, tokens
+
+    @staticmethod
+    async def _summarize(previous: Optional[str], messages) -> Optional[str]:
+        from .ai_service import AIService, MISTRAL_API_KEY
+        from ..core.http_clients import HttpClientRegistry
+        if not MISTRAL_API_KEY:
+            return None
+
+        transcript = "\n".join(f"{m.role.upper()}: {(m.content or '')[:MESSAGE_CHARS]}" for m in messages)
+        payload = {
+            "model": SUMMARY_MODEL,
+            "messages": [
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": f"PREVIOUS SUMMARY:\n{previous or '(none)'}\n\nNEW MESSAGES:\n{transcript}"},
+            ],
+            "temperature": 0.2,
+            "max_tokens": SUMMARY_MAX_TOKENS,
+        }
+        headers = {"Authorization": f"Bearer {MISTRAL_API_KEY}", "Content-Type": "application/json"}
+        # One gateway key for all background work: it gets a single round-robin share next to chat sessions
+        message = await AIService._complete(
+            HttpClientRegistry.get("mistral"), headers, payload,
+            session_id="summarizer", deadline=Deadline(SUMMARY_TIMEOUT)
+        )
+        return (message.get("content") or "").strip() or None
+
+    @staticmethod
+    def _store(session_id: str, summary: str, upto_id: int):
+        with SessionLocal() as db:
+            session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
+            if session is None:
+                return
+            session.summary = summary
+            session.summary_upto_id = upto_id
+            db.commit()
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {
+            "enabled": SUMMARY_ENABLED,
+            "running": cls._task is not None and not cls._task.done(),
+            "queued": len(cls._pending),
+            "min_evicted_tokens": SUMMARY_MIN_EVICTED_TOKENS,
+            **cls._stats,
+        }
@@ -0,0 +1,147 @@
+"""
+Tokenizers - Pluggable token counters for context budgeting
+- tiktoken: cl100k_base, close to but not the Mistral vocabulary
+- mistral: the model's own tokenizer, from a local tokenizer.json
+  (MISTRAL_TOKENIZER_PATH, needs `tokenizers`) or from mistral-common
+- heuristic: len/4, always available
+get_tokenizer() falls back along that list when a backend cannot load.
+TokenizerCalibration compares local prompt counts with the `usage` field
+of Mistral responses and logs when they drift apart.
+"""
+import threading
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional
+
+from config import TOKENIZER_THREADS, TOKENIZER_DRIFT_WARN, MISTRAL_TOKENIZER_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class Tokenizer:
+    """len/4 heuristic, base class of the real tokenizers"""
+    name = "len/4"
+    cacheable = False  # Worth memoizing (ContextManager token cache)
+
+    def count(self, text: str) -> int:
+        return len(text) // 4
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        return [self.count(text) for text in texts]
+
+
+class TiktokenTokenizer(Tokenizer):
+    cacheable = True
+
+    def __init__(self, encoding: str = "cl100k_base"):
+        import tiktoken
+        self.encoder = tiktoken.get_encoding(encoding)
+        self.name = encoding
+
+    def count(self, text: str) -> int:
+        return len(self.encoder.encode(text, disallowed_special=()))
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        if len(texts) < 2:
+            return [self.count(text) for text in texts]
+        return [len(ids) for ids in self.encoder.encode_batch(texts, num_threads=TOKENIZER_THREADS, disallowed_special=())]
+
+
+class MistralTokenizer(Tokenizer):
+    cacheable = True
+    _pool: Optional[ThreadPoolExecutor] = None
+
+    def __init__(self, model: str):
+        if MISTRAL_TOKENIZER_PATH:
+            from tokenizers import Tokenizer as HFTokenizer
+            self._hf = HFTokenizer.from_file(MISTRAL_TOKENIZER_PATH)
+            self._encode = None
+            self.name = f"mistral:{MISTRAL_TOKENIZER_PATH}"
+            return
+
+        from mistral_common.tokens.tokenizers.mistral import MistralTokenizer as MistralCommonTokenizer
+        try:
+            tokenizer = MistralCommonTokenizer.from_model(model)
+        except Exception:
+            tokenizer = MistralCommonTokenizer.v3()
+        raw = tokenizer.instruct_tokenizer.tokenizer
+        self._hf = None
+        self._encode = lambda text: raw.encode(text, bos=False, eos=False)
+        self.name = f"mistral:{model}"
+
+    def count(self, text: str) -> int:
+        if self._hf is not None:
+            return len(self._hf.encode(text, add_special_tokens=False).ids)
+        return len(self._encode(text))
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        if len(texts) < 2:
+            return [self.count(text) for text in texts]
+        if self._hf is not None:
+            # Rust-side parallel batch encoding
+            return [len(enc.ids) for enc in self._hf.encode_batch(texts, add_special_tokens=False)]
+        if MistralTokenizer._pool is None:
+            MistralTokenizer._pool = ThreadPoolExecutor(max_workers=TOKENIZER_THREADS, thread_name_prefix="tokenizer")
+        return list(MistralTokenizer._pool.map(self.count, texts))
+
+
+BACKENDS = {
+    "mistral": MistralTokenizer,
+    "tiktoken": lambda model: TiktokenTokenizer(),
+    "heuristic": lambda model: Tokenizer(),
+}
+FALLBACK_ORDER = ["mistral", "tiktoken", "heuristic"]
+
+
+def get_tokenizer(backend: str, model: str) -> Tokenizer:
+    """Requested backend, or the next one in FALLBACK_ORDER that loads"""
+    order = FALLBACK_ORDER[FALLBACK_ORDER.index(backend):] if backend in FALLBACK_ORDER else FALLBACK_ORDER
+    for name in order:
+        try:
+            tokenizer = BACKENDS[name](model)
+            if name != backend:
+                logger.warning(f"Tokenizer '{backend}' unavailable, using {tokenizer.name}")
+            return tokenizer
+        except Exception as e:
+            logger.warning(f"Could not load {name} tokenizer: {e}")
+    return Tokenizer()
+
+
+class TokenizerCalibration:
+    """Local prompt token counts vs the ones Mistral bills (response `usage.prompt_tokens`)"""
+    SAMPLES = 200
+    LOG_EVERY = 50  # Drift warnings per model, at most one per LOG_EVERY samples
+
+    _lock = threading.Lock()
+    _ratios: Dict[str, Deque[float]] = {}
+    _seen: Dict[str, int] = {}
+
+    @classmethod
+    def record(cls, model: str, local_tokens: int, reported_tokens: Optional[int], tokenizer: str = ""):
+        if not local_tokens or not reported_tokens:
+            return
+        ratio = reported_tokens / local_tokens
+        with cls._lock:
+            ratios = cls._ratios.setdefault(model, deque(maxlen=cls.SAMPLES))
+            ratios.append(ratio)
+            seen = cls._seen[model] = cls._seen.get(model, 0) + 1
+            mean = sum(ratios) / len(ratios)
+        if abs(mean - 1) > TOKENIZER_DRIFT_WARN and seen % cls.LOG_EVERY == 1:
+            logger.warning(
+                f"📏 Tokenizer drift on {model}: Mistral counts {mean - 1:+.0%} vs {tokenizer or 'local'} "
+                f"over {len(ratios)} requests (last: {reported_tokens} billed, {local_tokens} estimated)"
+            )
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        with cls._lock:
+            return {
+                model: {
+                    "samples": cls._seen[model],
+                    "mean_ratio": round(sum(ratios) / len(ratios), 3),
+                    "min_ratio": round(min(ratios), 3),
+                    "max_ratio": round(max(ratios), 3),
+                }
+                for model, ratios in cls._ratios.items()
+            }
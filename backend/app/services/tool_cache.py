@@ -0,0 +1,167 @@
+"""
+Tool Result Cache - Per-tool TTL cache in front of tool execution
+Tier 1: in-process LRU. Tier 2 (optional): SQLite file shared across workers.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config import TOOL_CACHE_MAX_ENTRIES, TOOL_CACHE_SHARED, TOOL_CACHE_DB_PATH
+from ..core.executors import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# Argument values compared case-insensitively when building the key
+CASE_INSENSITIVE_ARGS = {"query", "city", "target"}
+
+
+class ToolResultCache:
+    _lru: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()  # {key: (result, expires_at)}
+    _lock = threading.RLock()
+    _db: Optional[sqlite3.Connection] = None
+    _db_lock = threading.Lock()
+    _stats: Dict[str, Dict[str, int]] = {}
+
+    # ==================== KEYS ====================
+
+    @staticmethod
+    def make_key(tool_name: str, args: Any) -> str:
+        """Normalized, order-independent key for a validated tool call"""
+        normalized = {}
+        for field, value in args.model_dump(exclude_none=True).items():
+            if isinstance(value, str):
+                value = " ".join(value.split())
+                if field in CASE_INSENSITIVE_ARGS:
+                    value = value.lower()
+            normalized[field] = value
+        raw = json.dumps({"tool": tool_name, "args": normalized}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def is_storable(result: str) -> bool:
+        """Handlers report upstream failures as text, never cache those"""
+        head = (result or "")[:80].lower()
+        return bool(result) and "error" not in head and "failed" not in head
+
+    # ==================== LOOKUP ====================
+
+    @classmethod
+    async def get(cls, tool_name: str, key: str) -> Optional[str]:
+        now = time.time()
+        with cls._lock:
+            entry = cls._lru.get(key)
+            if entry and entry[1] > now:
+                cls._lru.move_to_end(key)
+                cls._count(tool_name, "hits")
+                return entry[0]
+            if entry:
+                del cls._lru[key]
+
+        if TOOL_CACHE_SHARED:
+            row = await run_blocking("db", cls._db_get, key, now)
+            if row:
+                result, expires_at = row
+                cls._lru_put(key, result, expires_at)
+                cls._count(tool_name, "shared_hits")
+                return result
+
+        cls._count(tool_name, "misses")
+        return None
+
+    @classmethod
+    async def set(cls, tool_name: str, key: str, result: str, ttl: int):
+        if not cls.is_storable(result):
+            return
+        expires_at = time.time() + ttl
+        cls._lru_put(key, result, expires_at)
+        cls._count(tool_name, "stores")
+        if TOOL_CACHE_SHARED:
+            await run_blocking("db", cls._db_set, key, tool_name, result, expires_at)
+
+    @classmethod
+    def _lru_put(cls, key: str, result: str, expires_at: float):
+        with cls._lock:
+            cls._lru[key] = (result, expires_at)
+            cls._lru.move_to_end(key)
+            while len(cls._lru) > TOOL_CACHE_MAX_ENTRIES:
+                cls._lru.popitem(last=False)
+
+    @classmethod
+    def _count(cls, tool_name: str, counter: str):
+        with cls._lock:
+            stats = cls._stats.setdefault(tool_name, {"hits": 0, "shared_hits": 0, "misses": 0, "stores": 0})
+            stats[counter] += 1
+
+    # ==================== SQLITE TIER ====================
+
+    @classmethod
+    def _get_db(cls) -> sqlite3.Connection:
+        if cls._db is None:
+            cls._db = sqlite3.connect(TOOL_CACHE_DB_PATH, check_same_thread=False, timeout=5.0)
+            cls._db.execute("PRAGMA journal_mode=WAL")
+            cls._db.execute(
+                "CREATE TABLE IF NOT EXISTS tool_cache ("
+                "key TEXT PRIMARY KEY, tool TEXT, result TEXT, expires_at REAL)"
+            )
+            cls._db.commit()
+        return cls._db
+
+    @classmethod
+    def _db_get(cls, key: str, now: float) -> Optional[Tuple[str, float]]:
+        try:
+            with cls._db_lock:
+                return cls._get_db().execute(
+                    "SELECT result, expires_at FROM tool_cache WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Tool cache read failed: {e}")
+            return None
+
+    @classmethod
+    def _db_set(cls, key: str, tool_name: str, result: str, expires_at: float):
+        try:
+            with cls._db_lock:
+                db = cls._get_db()
+                db.execute("INSERT OR REPLACE INTO tool_cache VALUES (?, ?, ?, ?)", (key, tool_name, result, expires_at))
+                db.execute("DELETE FROM tool_cache WHERE expires_at < ?", (time.time(),))
+                db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Tool cache write failed: {e}")
+
+    # ==================== ADMIN ====================
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        with cls._lock:
+            per_tool = {tool: dict(counters) for tool, counters in cls._stats.items()}
+            size = len(cls._lru)
+        hits = sum(c["hits"] + c["shared_hits"] for c in per_tool.values())
+        lookups = hits + sum(c["misses"] for c in per_tool.values())
+        return {
+            "entries": size,
+            "max_entries": TOOL_CACHE_MAX_ENTRIES,
+            "shared_tier": TOOL_CACHE_SHARED,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "tools": per_tool,
+        }
+
+    @classmethod
+    def close(cls):
+        with cls._db_lock:
+            if cls._db is not None:
+                cls._db.close()
+                cls._db = None
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._lru.clear()
+        if TOOL_CACHE_SHARED:
+            with cls._db_lock:
+                cls._get_db().execute("DELETE FROM tool_cache")
+                cls._get_db().commit()
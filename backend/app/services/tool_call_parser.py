@@ -0,0 +1,231 @@
+"""
+Tool Call Parser - Tool calls from LLM output
+Native Mistral `tool_calls` are merged from streamed fragments; JSON written
+in the text is found by the incremental balanced-brace scanner (fallback).
+Both record parse failures in ToolCallStats.
+"""
+import json
+import threading
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+from config import MISTRAL_FUNCTION_CALLING
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalJSONScanner:
+    """
+    Balanced-brace scanner fed chunk by chunk.
+    Tracks string literals and escapes so braces inside JSON strings
+    (code, nested fields...) never close an object early.
+    Only tool calls are reported: objects with a "tool" or "action" key, or
+    top-level arrays made only of such objects ([{...}, {...}], reported
+    when the array closes). Other JSON (examples, `{}` in an answer) and
+    brackets in prose stay part of the visible text.
+    """
+
+    CALL_KEYS = ("tool", "action")
+
+    def __init__(self):
+        self.buffer = ""
+        self.first_open = None  # index where the first tool-call JSON starts in buffer
+        self._depth = 0
+        self._array_start = None  # "[" that may open an array of calls
+        self._array_calls: List[Dict[str, Any]] = []
+        self._array_other = False  # the array holds something else than tool calls
+        self._in_string = False
+        self._escape = False
+        self._start = None
+        self._pos = 0
+        self.failed = 0  # balanced blocks that looked like tool calls but were not valid JSON
+
+    @property
+    def in_object(self) -> bool:
+        return self._depth > 0
+
+    @property
+    def in_array(self) -> bool:
+        return self._array_start is not None
+
+    @property
+    def truncated(self) -> bool:
+        """A tool-call object was opened but never closed (output cut or braces unbalanced)"""
+        return self._depth > 0 and '"tool"' in self.buffer[self._start:]
+
+    @classmethod
+    def is_call(cls, value: Any) -> bool:
+        return isinstance(value, dict) and any(key in value for key in cls.CALL_KEYS)
+
+    def _release(self, start: Optional[int]):
+        """The JSON starting at `start` is not a tool call: show it again"""
+        if start is not None and self.first_open == start:
+            self.first_open = None
+
+    def _close_array(self) -> List[Dict[str, Any]]:
+        calls = self._array_calls if not self._array_other else []
+        if not calls:
+            self._release(self._array_start)
+        self._array_start, self._array_calls, self._array_other = None, [], False
+        return calls
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Append a chunk and return the tool calls completed by it
+        """
+        self.buffer += chunk
+        completed = []
+
+        while self._pos < len(self.buffer):
+            char = self.buffer[self._pos]
+
+            if self._depth > 0:
+                if self._in_string:
+                    if self._escape:
+                        self._escape = False
+                    elif char == "\\":
+                        self._escape = True
+                    elif char == '"':
+                        self._in_string = False
+                elif char == '"':
+                    self._in_string = True
+                elif char == "{":
+                    self._depth += 1
+                elif char == "}":
+                    self._depth -= 1
+                    if self._depth == 0:
+                        completed += self._close_object()
+            elif char == "{":
+                self._start = self._pos
+                if self.first_open is None:
+                    self.first_open = self._pos
+                self._depth = 1
+            elif self._array_start is not None:
+                # Between the objects of an array only commas and whitespace are allowed
+                if char == "]":
+                    completed += self._close_array()
+                elif char != "," and not char.isspace():
+                    # Prose after "[": not an array of calls
+                    completed += self._close_array()
+                    continue
+            elif char == "[":
+                self._array_start = self._pos
+                if self.first_open is None:
+                    self.first_open = self._pos
+
+            self._pos += 1
+
+        return completed
+
+    def _close_object(self) -> List[Dict[str, Any]]:
+        raw = self.buffer[self._start:self._pos + 1]
+        parsed = self._try_parse(raw)
+        start, self._start = self._start, None
+        if parsed is None and '"tool"' in raw:
+            self.failed += 1
+        if self._array_start is not None:
+            if self.is_call(parsed):
+                self._array_calls.append(parsed)
+            else:
+                self._array_other = True
+            return []
+        if self.is_call(parsed):
+            return [parsed]
+        # Prose braces, a JSON example or broken JSON: keep scanning for the real call
+        self._release(start)
+        return []
+
+    def close(self) -> List[Dict[str, Any]]:
+        """End of output: tool calls of an array left unclosed"""
+        return self._close_array() if self._array_start is not None else []
+
+    @staticmethod
+    def _try_parse(raw: str) -> Optional[Dict[str, Any]]:
+        try:
+            # strict=False: models often put raw newlines inside code strings
+            value = json.loads(raw, strict=False)
+            return value if isinstance(value, dict) else None
+        except json.JSONDecodeError:
+            logger.debug(f"Balanced block is not valid JSON: {raw[:80]}")
+            return None
+
+    @classmethod
+    def extract_all(cls, text: str) -> List[Dict[str, Any]]:
+        """Return every tool call found in a full text"""
+        scanner = cls()
+        return scanner.feed(text) + scanner.close()
+
+    @classmethod
+    def extract_first(cls, text: str) -> Optional[Dict[str, Any]]:
+        """Return the first tool call found in a full text"""
+        objects = cls.extract_all(text)
+        return objects[0] if objects else None
+
+
+class NativeToolCalls:
+    """
+    Structured `tool_calls` of a Mistral response, merged by index when streamed.
+    Each call becomes the same flat dict as a text tool call: {"tool": name, **arguments}.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Any, Dict[str, str]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self._calls)
+
+    def feed(self, fragments: List[Dict[str, Any]]):
+        for fragment in fragments or []:
+            key = fragment.get("index", fragment.get("id", len(self._calls)))
+            call = self._calls.setdefault(key, {"name": "", "arguments": ""})
+            function = fragment.get("function") or {}
+            if function.get("name"):
+                call["name"] = function["name"]
+            arguments = function.get("arguments")
+            if isinstance(arguments, dict):
+                call["arguments"] = json.dumps(arguments)
+            elif arguments:
+                call["arguments"] += arguments
+
+    def parse(self) -> Tuple[List[Dict[str, Any]], int]:
+        """Return (tool calls, number of calls whose arguments were not a JSON object)"""
+        calls, failed = [], 0
+        for call in self._calls.values():
+            try:
+                arguments = json.loads(call["arguments"] or "{}", strict=False)
+            except json.JSONDecodeError:
+                arguments = None
+            if not call["name"] or not isinstance(arguments, dict):
+                logger.warning(f"Unparseable native tool call: {call['name']} {call['arguments'][:80]}")
+                failed += 1
+                continue
+            calls.append({**arguments, "tool": call["name"]})
+        return calls, failed
+
+
+class ToolCallStats:
+    """Process-wide tool-call parsing counters (GET /api/metrics/tool-calls)"""
+    _lock = threading.Lock()
+    _counters = {"steps": 0, "native_steps": 0, "fallback_steps": 0, "calls": 0, "failed_steps": 0, "failed_calls": 0}
+
+    @classmethod
+    def record_step(cls, source: Optional[str], calls: int, failed: int):
+        """source: "native", "fallback" (scanner) or None when the step had no tool call"""
+        with cls._lock:
+            cls._counters["steps"] += 1
+            if source:
+                cls._counters[f"{source}_steps"] += 1
+            cls._counters["calls"] += calls
+            cls._counters["failed_calls"] += failed
+            cls._counters["failed_steps"] += int(failed > 0)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        with cls._lock:
+            counters = dict(cls._counters)
+        steps = counters["steps"]
+        return {
+            "mode": "native" if MISTRAL_FUNCTION_CALLING else "text",
+            **counters,
+            "parse_failures_per_100_steps": round(100 * counters["failed_steps"] / steps, 2) if steps else 0.0,
+        }
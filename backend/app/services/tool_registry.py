@@ -0,0 +1,344 @@
+"""
+Tool Registry - Declarative tool definitions for the ReAct agent
+Each tool declares its argument model, async handler, timeout and cache TTL.
+Validation (ReflectionLayer), dispatch (AIService) and the <tools_library>
+prompt block are all derived from this registry.
+"""
+import asyncio
+import json
+import time
+import logging
+import typing
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+from pydantic import ValidationError
+
+from ..schemas.tools import (
+    ToolArgs, SearchArgs, ScrapeArgs, SandboxArgs, CommandArgs, ManageNotesArgs,
+    ManageCalendarArgs, ManageWalletArgs, GetTimeArgs, GetWeatherArgs,
+    ImageSearchArgs, VideoSearchArgs, VisionAnalyzeArgs, OsintLookupArgs,
+)
+from ..core.executors import run_blocking
+from ..core.deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    name: str
+    description: str
+    args_model: Type[ToolArgs]
+    handler: Callable[[Any], Awaitable[str]]
+    timeout: float
+    cache_ttl: int = 0  # seconds, 0 = never cached
+    cache_when: Optional[Callable[[Any], bool]] = None
+    signature: str = ""
+    keywords: Tuple[str, ...] = ()  # Request words hinting at this tool (tool pruning without embeddings)
+
+    @property
+    def cacheable(self) -> bool:
+        return self.cache_ttl > 0
+
+    def is_cacheable(self, args: ToolArgs) -> bool:
+        """Whether this particular call may be served from the result cache"""
+        return self.cacheable and (self.cache_when is None or self.cache_when(args))
+
+
+class ToolRegistry:
+    _tools: Dict[str, ToolSpec] = {}
+    _library_text: Optional[str] = None
+    _function_definitions: Optional[List[Dict[str, Any]]] = None
+
+    @classmethod
+    def register(cls, name: str, args_model: Type[ToolArgs], description: str, timeout: float,
+                 cache_ttl: int = 0, cache_when: Optional[Callable[[Any], bool]] = None, keywords: Tuple[str, ...] = ()):
+        """Decorator registering an async handler `handler(args) -> str`"""
+        def decorator(handler):
+            cls._tools[name] = ToolSpec(
+                name=name,
+                description=description,
+                args_model=args_model,
+                handler=handler,
+                timeout=timeout,
+                cache_ttl=cache_ttl,
+                cache_when=cache_when,
+                signature=cls._signature(args_model),
+                keywords=keywords,
+            )
+            cls._library_text = None
+            cls._function_definitions = None
+            return handler
+        return decorator
+
+    @classmethod
+    def get(cls, name: str) -> Optional[ToolSpec]:
+        return cls._tools.get(name)
+
+    @classmethod
+    def names(cls) -> List[str]:
+        return list(cls._tools)
+
+    @classmethod
+    def validate(cls, tool_call: Dict[str, Any]) -> Tuple[Optional[ToolArgs], Optional[Dict[str, str]]]:
+        """Parse a raw tool call, returns (args, None) or (None, error)"""
+        spec = cls._tools.get(tool_call.get("tool"))
+        if not spec:
+            return None, {
+                "reason": f"Unknown tool: {tool_call.get('tool')}",
+                "suggestion": f"Available tools: {', '.join(cls._tools)}"
+            }
+        try:
+            return spec.args_model.model_validate(tool_call), None
+        except ValidationError as e:
+            err = e.errors()[0]
+            field = ".".join(str(p) for p in err.get("loc", ()))
+            msg = err.get("msg", "").removeprefix("Value error, ")
+            if err.get("type") == "missing":
+                reason = f"Missing required parameter: {field}"
+            elif field:
+                reason = f"Invalid parameter '{field}': {msg}"
+            else:
+                reason = msg
+            return None, {"reason": reason, "suggestion": f"Expected: {spec.name}: {spec.signature}"}
+
+    @classmethod
+    async def execute(cls, spec: ToolSpec, args: ToolArgs, deadline: Optional[Deadline] = None) -> str:
+        """Run a handler under its declared timeout, clamped to the request deadline"""
+        if deadline is not None:
+            return await deadline.run(spec.handler(args), timeout=spec.timeout)
+        return await asyncio.wait_for(spec.handler(args), timeout=spec.timeout)
+
+    @classmethod
+    def render_library(cls, names: Optional[Sequence[str]] = None) -> str:
+        """The <tools_library> prompt block, full (rendered once per registry state) or restricted to `names`"""
+        if names is not None:
+            return cls._render_library([spec for spec in cls._tools.values() if spec.name in names])
+        if cls._library_text is None:
+            cls._library_text = cls._render_library(list(cls._tools.values()))
+        return cls._library_text
+
+    @staticmethod
+    def _render_library(specs: List[ToolSpec]) -> str:
+        lines = [
+            "<tools_library>",
+            "Format: {\"tool\": \"name\", \"parameter_key\": \"value\", \"private\": boolean} ",
+            "- Add \"private\": true to ANY tool call if you want to execute it without showing the output to the user.",
+            "- Root level parameters only, NO nesting under 'param'.",
+            "- Independent calls can be batched in ONE step as a JSON array: [{\"tool\": \"scrape\", ...}, {\"tool\": \"scrape\", ...}]. They run in parallel.",
+            "",
+            "EVERYDAY TOOLS:",
+        ]
+        for i, spec in enumerate(specs, 1):
+            lines.append(f"{i}. {spec.name}: {spec.signature} - {spec.description}")
+        lines.append("</tools_library>")
+        return "\n".join(lines) + "\n\n"
+
+    @classmethod
+    def function_definitions(cls, names: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Mistral `tools` payload (function calling), built once per registry state, optionally restricted to `names`"""
+        if cls._function_definitions is None:
+            definitions = []
+            for spec in cls._tools.values():
+                parameters = cls._strip_titles(spec.args_model.model_json_schema())
+                parameters.setdefault("properties", {})["private"] = {
+                    "type": "boolean",
+                    "description": "Execute without showing the output to the user",
+                }
+                definitions.append({
+                    "type": "function",
+                    "function": {"name": spec.name, "description": spec.description, "parameters": parameters},
+                })
+            cls._function_definitions = definitions
+        if names is not None:
+            return [d for d in cls._function_definitions if d["function"]["name"] in names]
+        return cls._function_definitions
+
+    @classmethod
+    def _strip_titles(cls, schema: Any) -> Any:
+        """Drop pydantic's generated titles, they only cost prompt tokens"""
+        if isinstance(schema, dict):
+            return {k: cls._strip_titles(v) for k, v in schema.items() if not (k == "title" and isinstance(v, str))}
+        if isinstance(schema, list):
+            return [cls._strip_titles(v) for v in schema]
+        return schema
+
+    @staticmethod
+    def _signature(model: Type[ToolArgs]) -> str:
+        """Compact JSON-like parameter hint built from the model fields"""
+        parts = []
+        for name, field in model.model_fields.items():
+            annotation = field.annotation
+            if typing.get_origin(annotation) is typing.Union:
+                annotation = next(a for a in typing.get_args(annotation) if a is not type(None))
+            if typing.get_origin(annotation) is typing.Literal:
+                hint = "|".join(typing.get_args(annotation))
+            elif field.description:
+                hint = field.description
+            elif isinstance(field.default, str) and field.default:
+                hint = field.default
+            elif annotation in (int, float):
+                parts.append(f"\"{name}\": 0")
+                continue
+            else:
+                hint = "..."
+            parts.append(f"\"{name}\": \"{hint}\"")
+        return "{" + ", ".join(parts) + "}"
+
+
+# ==================== HANDLERS ====================
+
+@ToolRegistry.register("search", SearchArgs, "Web search", timeout=35.0, cache_ttl=600)
+async def _search(args: SearchArgs) -> str:
+    from .search_service import SearchService
+    results = await SearchService.search(args.query)
+    return json.dumps(results, indent=2, ensure_ascii=False)
+
+
+@ToolRegistry.register("scrape", ScrapeArgs, "Extract text from URL", timeout=45.0, cache_ttl=3600,
+                       keywords=("http", "www", "url", "lien", "link", "site", "page", "article"))
+async def _scrape(args: ScrapeArgs) -> str:
+    from .scraping_service import ScrapingService
+    return await ScrapingService.scrape_url(args.url)
+
+
+@ToolRegistry.register("sandbox", SandboxArgs, "Execute Python (calculations, scripts). Use print() for output.", timeout=35.0)
+async def _sandbox(args: SandboxArgs) -> str:
+    from .sandbox_service import SandboxService
+    return await SandboxService.execute_code(args.code)
+
+
+@ToolRegistry.register("command", CommandArgs, "Shell/Linux commands. LEARN from results.", timeout=65.0,
+                       keywords=("commande", "command", "terminal", "shell", "linux", "bash", "fichier", "file", "dossier", "directory", "disque", "disk", "processus", "process"))
+async def _command(args: CommandArgs) -> str:
+    from .sandbox_service import SandboxService
+    from .ai_service import AIService
+    result = await SandboxService.execute_command(args.command)
+
+    # LINUX COMMAND LEARNING: Store in vector memory
+    vector_memory = AIService.get_vector_memory()
+    if vector_memory and result:
+        memory_text = f"COMMAND: {args.command}\nRESULT: {result[:500]}"
+        await run_blocking("cpu", vector_memory.add_memory, memory_text, metadata={"type": "linux_command", "command": args.command})
+    return result
+
+
+def _notes_action(args: ManageNotesArgs) -> str:
+    """Blocking manage_notes body (runs in the db pool)"""
+    from .notes_service import NotesService
+    from ..schemas.notes import NoteCreate, NoteUpdate, NoteResponse
+    from ..core.database import SessionLocal
+
+    with SessionLocal() as db:
+        if args.action == "create":
+            note_data = NoteCreate(
+                title=args.title or "Sans titre",
+                content=args.content or "",
+                category=args.category,
+                tags=args.tags
+            )
+            return json.dumps(NoteResponse.model_validate(NotesService.create_note(db, note_data)).model_dump(), default=str)
+        if args.action == "search":
+            results = NotesService.get_all_notes(db, search=args.query or args.title)
+            return json.dumps([NoteResponse.model_validate(n).model_dump() for n in results], default=str)
+        if args.action == "update":
+            update_data = NoteUpdate(content=args.content, title=args.title)
+            updated = NotesService.update_note(db, args.id, update_data)
+            return json.dumps(NoteResponse.model_validate(updated).model_dump(), default=str) if updated else "Note not found"
+        if args.action == "delete":
+            success = NotesService.delete_note(db, args.id)
+            return json.dumps({"status": "deleted" if success else "failed"})
+        return json.dumps(NotesService.get_categories(db))
+
+
+@ToolRegistry.register("manage_notes", ManageNotesArgs, "Notes (id required for update/delete)", timeout=10.0,
+                       keywords=("note",))
+async def _manage_notes(args: ManageNotesArgs) -> str:
+    return await run_blocking("db", _notes_action, args)
+
+
+@ToolRegistry.register("manage_calendar", ManageCalendarArgs, "Calendar events (id required for remove/update)", timeout=10.0,
+                       keywords=("calendrier", "calendar", "agenda", "evenement", "event", "rendez-vous", "rdv", "rappel", "remind", "reunion", "meeting"))
+async def _manage_calendar(args: ManageCalendarArgs) -> str:
+    from .calendar_service import CalendarService
+    if args.action == "list":
+        return json.dumps(await run_blocking("db", CalendarService.get_events))
+    if args.action == "add":
+        return json.dumps(await run_blocking(
+            "db", CalendarService.add_event,
+            title=args.title, start=args.start, end=args.end, description=args.description
+        ))
+    if args.action == "remove":
+        success = await run_blocking("db", CalendarService.delete_event, args.id)
+        return json.dumps({"status": "deleted" if success else "not_found", "id": args.id})
+    updates = args.model_dump(include={"title", "start", "end", "description"}, exclude_none=True)
+    updated = await run_blocking("db", CalendarService.update_event, args.id, updates)
+    return json.dumps(updated) if updated else "Event not found"
+
+
+@ToolRegistry.register("manage_wallet", ManageWalletArgs, "Ethereum wallet ('address' is the connected wallet)", timeout=20.0,
+                       cache_ttl=60, cache_when=lambda args: args.action == "balance",
+                       keywords=("wallet", "portefeuille", "eth", "ethereum", "crypto", "solde", "balance", "transfer", "transaction", "0x"))
+async def _manage_wallet(args: ManageWalletArgs) -> str:
+    from .crypto_service import CryptoService
+    # web3 uses a blocking HTTP provider
+    if args.action == "balance":
+        return json.dumps(await run_blocking("dns", CryptoService.get_balance, args.address))
+    if args.action == "history":
+        return json.dumps(await run_blocking("dns", CryptoService.get_transactions, args.address))
+    return json.dumps(await run_blocking("dns", CryptoService.prepare_transfer, args.address, args.to, args.amount))
+
+
+@ToolRegistry.register("get_time", GetTimeArgs, "Current time", timeout=2.0,
+                       keywords=("heure", "time", "date", "jour", "aujourd", "today", "demain", "tomorrow"))
+async def _get_time(args: GetTimeArgs) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S")
+
+
+@ToolRegistry.register("get_weather", GetWeatherArgs, "Weather info", timeout=12.0, cache_ttl=600,
+                       keywords=("meteo", "weather", "temps", "temperature", "pluie", "rain", "neige", "snow", "vent", "wind"))
+async def _get_weather(args: GetWeatherArgs) -> str:
+    from .weather_service import WeatherService
+    return json.dumps(await WeatherService.get_weather(args.city))
+
+
+@ToolRegistry.register("image_search", ImageSearchArgs, "Find images", timeout=50.0, cache_ttl=3600,
+                       keywords=("image", "photo", "picture", "logo", "illustration", "wallpaper"))
+async def _image_search(args: ImageSearchArgs) -> str:
+    from .image_search_service import ImageSearchService
+    return json.dumps(await ImageSearchService.search_images(args.query))
+
+
+@ToolRegistry.register("video_search", VideoSearchArgs, "Find videos", timeout=45.0, cache_ttl=3600,
+                       keywords=("video", "youtube", "clip"))
+async def _video_search(args: VideoSearchArgs) -> str:
+    from .video_search_service import VideoSearchService
+    return json.dumps(await VideoSearchService.search_videos(args.query))
+
+
+@ToolRegistry.register("vision_analyze", VisionAnalyzeArgs, "Analyze images", timeout=70.0,
+                       keywords=("image", "photo", "picture", "vision", "uploads/", ".png", ".jpg", ".jpeg", ".webp"))
+async def _vision_analyze(args: VisionAnalyzeArgs) -> str:
+    from .vision_service import VisionService
+    from .ai_service import AIService
+    description = await VisionService.analyze_image(image_path=args.image_path, image_url=args.image_url, prompt=args.prompt)
+
+    # Store in VectorMemory (RAG)
+    vector_memory = AIService.get_vector_memory()
+    if vector_memory:
+        await run_blocking("cpu", vector_memory.add_memory, f"IMAGE_MEMORY: {description}", metadata={"type": "vision", "path": args.image_path})
+    return description
+
+
+@ToolRegistry.register("osint_lookup", OsintLookupArgs, "Username, domain or email footprint", timeout=30.0, cache_ttl=86400,
+                       keywords=("osint", "username", "pseudo", "domaine", "domain", "email", "mail", "whois", "breach", "fuite"))
+async def _osint_lookup(args: OsintLookupArgs) -> str:
+    from .osint_service import OSINTService
+    if args.type == "username":
+        results = await OSINTService.check_username(args.target)
+    elif args.type == "email":
+        results = await OSINTService.breach_check(args.target)
+    else:
+        results = await OSINTService.domain_lookup(args.target)
+    return json.dumps(results)
@@ -0,0 +1,110 @@
+"""
+Tool Selector - Per-request pruning of the tool library
+Each tool (name, description, keywords) is embedded once at startup with the
+VectorMemory model; a request only gets the top-k most similar tools plus the
+always-on set in its prompt. Without the embedding model, tools are picked by
+keyword hits and requests without any hit keep the full library.
+The ReAct loop falls back to the full library on a validation miss.
+"""
+import re
+import threading
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config import TOOL_PRUNING_ENABLED, TOOL_PRUNING_TOP_K, TOOL_PRUNING_MIN_SCORE, TOOL_PRUNING_ALWAYS
+from .message_index import normalize
+from .tool_registry import ToolRegistry
+from .intent_router import IntentRouter
+
+logger = logging.getLogger(__name__)
+
+
+class ToolSelector:
+    _lock = threading.Lock()
+    _names: List[str] = []
+    _matrix: Optional[np.ndarray] = None  # One normalized embedding per tool
+    _stats = {"requests": 0, "pruned": 0, "full": 0, "expanded": 0, "tools_sent": 0, "prompt_tokens_saved": 0}
+
+    @classmethod
+    def warmup(cls, vector_memory):
+        """Embed every tool description (called once at startup)"""
+        if not TOOL_PRUNING_ENABLED or getattr(vector_memory, "model", None) is None:
+            return
+        specs = [ToolRegistry.get(name) for name in ToolRegistry.names()]
+        texts = [f"{spec.name}: {spec.description}. {' '.join(spec.keywords)}" for spec in specs]
+        vectors = np.asarray(vector_memory.model.encode(texts), dtype="float32")
+        with cls._lock:
+            cls._names = [spec.name for spec in specs]
+            cls._matrix = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        logger.info(f"🧰 Tool selector ready ({len(specs)} tool embeddings)")
+
+    @classmethod
+    def select(cls, message: str, vector_memory=None, embedding: Optional[np.ndarray] = None) -> Optional[List[str]]:
+        """Tool names for this request, None = full library (`embedding`: the message's, when already computed)"""
+        if not TOOL_PRUNING_ENABLED:
+            return None
+        always = [name for name in TOOL_PRUNING_ALWAYS if ToolRegistry.get(name)]
+        if cls._matrix is not None and getattr(vector_memory, "model", None) is not None:
+            scores = cls._embedding_scores(vector_memory, message, embedding)
+            min_score = TOOL_PRUNING_MIN_SCORE
+        else:
+            scores = cls._keyword_scores(message)
+            if not any(scores.values()):
+                return None
+            min_score = 1.0
+
+        ranked = sorted((name for name in scores if name not in always and scores[name] >= min_score),
+                        key=lambda name: -scores[name])
+        selected = always + ranked[:TOOL_PRUNING_TOP_K]
+        return selected if len(selected) < len(ToolRegistry.names()) else None
+
+    @classmethod
+    def _embedding_scores(cls, vector_memory, message: str, embedding: Optional[np.ndarray] = None) -> Dict[str, float]:
+        query = normalize(embedding if embedding is not None else vector_memory.encode(message))
+        with cls._lock:
+            return dict(zip(cls._names, (cls._matrix @ query).tolist()))
+
+    @staticmethod
+    def _keyword_scores(message: str) -> Dict[str, float]:
+        """Keyword hits per tool: word prefixes for plain keywords, substrings for the others"""
+        text = IntentRouter.normalize(message)
+        words = re.findall(r"\w+", text)
+        scores = {}
+        for name in ToolRegistry.names():
+            hits = 0
+            for keyword in ToolRegistry.get(name).keywords:
+                if keyword.isalnum():
+                    hits += any(word.startswith(keyword) for word in words)
+                else:
+                    hits += keyword in text
+            scores[name] = float(hits)
+        return scores
+
+    @classmethod
+    def record(cls, tools: Optional[List[str]], tokens_saved: int = 0):
+        cls._stats["requests"] += 1
+        if tools is None:
+            cls._stats["full"] += 1
+            cls._stats["tools_sent"] += len(ToolRegistry.names())
+        else:
+            cls._stats["pruned"] += 1
+            cls._stats["tools_sent"] += len(tools)
+            cls._stats["prompt_tokens_saved"] += tokens_saved
+
+    @classmethod
+    def record_expansion(cls):
+        cls._stats["expanded"] += 1
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        requests = cls._stats["requests"]
+        return {
+            "enabled": TOOL_PRUNING_ENABLED,
+            "mode": "embeddings" if cls._matrix is not None else "keywords",
+            "top_k": TOOL_PRUNING_TOP_K,
+            "always_on": TOOL_PRUNING_ALWAYS,
+            **cls._stats,
+            "avg_tools_per_request": round(cls._stats["tools_sent"] / requests, 2) if requests else 0.0,
+        }
@@ -1,14 +1,29 @@
 """
 Vector Memory - Semantic search for AI memory and recall
 Requires: pip install sentence-transformers faiss-cpu numpy
+
+Persistence (cache_dir):
+- snapshot.npz: vectors + memories (JSON) + log generation, written atomically
+- memories.<generation>.log: (metadata, embedding) records appended since that snapshot,
+  each framed with its length and CRC32, fsynced in batches by a background thread
+Loading replays the logs over the snapshot and drops a torn last record.
+Past VECTOR_SNAPSHOT_EVERY logged records the background thread writes a new
+snapshot and deletes the logs it covers. No pickle is read, except once to
+import the faiss.index/memories.pkl files of older versions.
 """
 
 import os
+import json
 import pickle
+import struct
+import threading
+import zlib
 import logging
 import numpy as np
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+
+from config import VECTOR_LOG_FSYNC_INTERVAL, VECTOR_LOG_FSYNC_BATCH, VECTOR_SNAPSHOT_EVERY
 
 try:
     from sentence_transformers import SentenceTransformer
@@ -19,6 +34,10 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+SNAPSHOT_FILE = "snapshot.npz"
+LOG_PREFIX, LOG_SUFFIX = "memories.", ".log"
+LOG_HEADER = struct.Struct("<III")  # CRC32 of the body, JSON length, embedding bytes
+
 
 class VectorMemory:
     """Semantic vector memory for intelligent recall"""
@@ -35,9 +54,19 @@ class VectorMemory:
             self.index = faiss.IndexFlatL2(self.dimension)
             self.memories = []
             self.cache_dir = cache_dir
+            self._lock = threading.RLock()
+            self._generation = 0
+            self._log = None
+            self._log_records = 0  # Records logged since the last snapshot
+            self._unsynced = 0
+            self._stats = {"appended": 0, "fsyncs": 0, "snapshots": 0, "replayed": 0, "torn_records": 0}
             
             os.makedirs(cache_dir, exist_ok=True)
             self._load_from_disk()
+            self._open_log()
+            self._stop = threading.Event()
+            self._flusher = threading.Thread(target=self._flush_loop, name="vector-memory-log", daemon=True)
+            self._flusher.start()
             logger.info(f"Vector Memory initialized ({len(self.memories)} memories loaded)")
         except Exception as e:
             logger.error(f"Error initializing VectorMemory: {e}")
@@ -49,36 +78,42 @@ class VectorMemory:
             return
         
         try:
+            # Encoded once: used for the deduplication search and stored
+            embedding = self.encode(text)
+
             # Deduplication: skip if similar memory exists
             if self.memories:
-                existing = self.search(text, top_k=1, min_score=0.85)
+                existing = self.search(text, top_k=1, min_score=0.85, embedding=embedding)
                 if existing:
                     logger.debug(f"Skipping duplicate memory (score {existing[0]['score']:.2f})")
                     return
             
-            embedding = self.model.encode([text])[0]
-            self.index.add(np.array([embedding]).astype('float32'))
-            
-            entry = {
-                "text": text,
-                "metadata": metadata or {},
-                "timestamp": datetime.now().isoformat(),
-                "id": len(self.memories)
-            }
-            self.memories.append(entry)
-            
-            if len(self.memories) % 5 == 0:
-                self._save_to_disk()
+            with self._lock:
+                entry = {
+                    "text": text,
+                    "metadata": metadata or {},
+                    "timestamp": datetime.now().isoformat(),
+                    "id": len(self.memories)
+                }
+                self.index.add(embedding.reshape(1, -1))
+                self.memories.append(entry)
+                self._append(entry, embedding)
         except Exception as e:
             logger.error(f"Failed to add memory: {e}")
 
-    def search(self, query: str, top_k: int = 3, min_score: float = 0.4) -> List[Dict[str, Any]]:
-        """Search memories by semantic similarity"""
+    def encode(self, text: str) -> Optional[np.ndarray]:
+        """Raw float32 embedding of a text, None without a model"""
+        if not self.model or not text:
+            return None
+        return np.asarray(self.model.encode([text])[0], dtype='float32')
+
+    def search(self, query: str, top_k: int = 3, min_score: float = 0.4, embedding: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Search memories by semantic similarity (`embedding`: the query's, when already computed)"""
         if not self.model or not self.memories or self.index.ntotal == 0:
             return []
         
         try:
-            query_embedding = self.model.encode([query])[0]
+            query_embedding = embedding if embedding is not None else self.model.encode([query])[0]
             distances, indices = self.index.search(np.array([query_embedding]).astype('float32'), top_k)
             
             results = []
@@ -105,23 +140,175 @@ class VectorMemory:
         results = self.search(query, top_k=top_k * 2)
         return [r for r in results if r.get("metadata", {}).get("type") == type_filter][:top_k]
 
-    def _save_to_disk(self):
-        """Persist index and memories to disk"""
-        try:
-            faiss.write_index(self.index, os.path.join(self.cache_dir, "faiss.index"))
-            with open(os.path.join(self.cache_dir, "memories.pkl"), 'wb') as f:
-                pickle.dump(self.memories, f)
-        except Exception as e:
-            logger.error(f"Save error: {e}")
+    # ==================== PERSISTENCE ====================
+
+    def _log_path(self, generation: int) -> str:
+        return os.path.join(self.cache_dir, f"{LOG_PREFIX}{generation}{LOG_SUFFIX}")
+
+    def _log_generations(self) -> List[int]:
+        generations = []
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(LOG_PREFIX) and name.endswith(LOG_SUFFIX):
+                middle = name[len(LOG_PREFIX):-len(LOG_SUFFIX)]
+                if middle.isdigit():
+                    generations.append(int(middle))
+        return sorted(generations)
+
+    def _open_log(self):
+        self._log = open(self._log_path(self._generation), "ab")
+
+    def _append(self, entry: Dict[str, Any], embedding: np.ndarray):
+        """Write one record to the log (caller holds the lock), fsync once a batch is pending"""
+        meta = json.dumps(entry, ensure_ascii=False, default=str).encode("utf-8")
+        vec = embedding.tobytes()
+        body = meta + vec
+        self._log.write(LOG_HEADER.pack(zlib.crc32(body), len(meta), len(vec)) + body)
+        self._log.flush()
+        self._log_records += 1
+        self._unsynced += 1
+        self._stats["appended"] += 1
+        if self._unsynced >= VECTOR_LOG_FSYNC_BATCH:
+            self._sync()
+
+    def _sync(self):
+        with self._lock:
+            if self._unsynced and self._log:
+                os.fsync(self._log.fileno())
+                self._unsynced = 0
+                self._stats["fsyncs"] += 1
+
+    def _read_log(self, path: str) -> List[Tuple[Dict[str, Any], np.ndarray]]:
+        """Records of one log, a torn or corrupt tail is cut off the file"""
+        with open(path, "rb") as f:
+            data = f.read()
+        records, offset = [], 0
+        while offset + LOG_HEADER.size <= len(data):
+            crc, meta_len, vec_len = LOG_HEADER.unpack_from(data, offset)
+            start, end = offset + LOG_HEADER.size, offset + LOG_HEADER.size + meta_len + vec_len
+            if end > len(data) or zlib.crc32(data[start:end]) != crc:
+                break
+            entry = json.loads(data[start:start + meta_len].decode("utf-8"))
+            records.append((entry, np.frombuffer(data[start + meta_len:end], dtype="float32")))
+            offset = end
+        if offset < len(data):
+            self._stats["torn_records"] += 1
+            logger.warning(f"Vector memory log {os.path.basename(path)}: dropping {len(data) - offset} bytes of torn tail")
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+        return records
+
+    def _write_snapshot(self, vectors: np.ndarray, memories: List[Dict[str, Any]], generation: int):
+        path = os.path.join(self.cache_dir, SNAPSHOT_FILE)
+        tmp = path + ".tmp"
+        meta = json.dumps(memories, ensure_ascii=False, default=str).encode("utf-8")
+        with open(tmp, "wb") as f:
+            np.savez(f, vectors=vectors, memories=np.frombuffer(meta, dtype=np.uint8), generation=np.array(generation))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _snapshot(self):
+        """Compaction: switch to a new log generation, snapshot everything before it, drop the old logs"""
+        with self._lock:
+            self._sync()
+            count = len(self.memories)
+            vectors = self.index.reconstruct_n(0, count) if count else np.empty((0, self.dimension), dtype="float32")
+            memories = list(self.memories)
+            self._log.close()
+            self._generation += 1
+            generation = self._generation
+            self._open_log()
+            self._log_records = 0
+
+        # Appends go to the new log meanwhile; until the replace, recovery still uses the old snapshot + all logs
+        self._write_snapshot(vectors, memories, generation)
+        for old in self._log_generations():
+            if old < generation:
+                os.remove(self._log_path(old))
+        self._stats["snapshots"] += 1
+        logger.info(f"💾 Vector memory snapshot written ({count} memories, log generation {generation})")
+
+    def _flush_loop(self):
+        """Background fsync of pending records, and compaction once the logs grow"""
+        while not self._stop.wait(VECTOR_LOG_FSYNC_INTERVAL):
+            try:
+                self._sync()
+                if self._log_records >= VECTOR_SNAPSHOT_EVERY:
+                    self._snapshot()
+            except Exception as e:
+                logger.error(f"Vector memory persistence error: {e}")
+
+    def close(self):
+        """Stop the background thread and sync the log (app shutdown)"""
+        if not self.model:
+            return
+        self._stop.set()
+        self._flusher.join(timeout=5)
+        with self._lock:
+            self._sync()
+            self._log.close()
 
     def _load_from_disk(self):
-        """Load index and memories from disk"""
+        """Load the snapshot, then replay the logs written after it"""
+        snapshot_path = os.path.join(self.cache_dir, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with np.load(snapshot_path, allow_pickle=False) as data:
+                vectors = data["vectors"]
+                memories = json.loads(bytes(data["memories"]).decode("utf-8"))
+                generation = int(data["generation"])
+        else:
+            vectors, memories, generation = self._migrate_legacy()
+
+        if len(memories):
+            self.index.add(np.ascontiguousarray(vectors, dtype="float32"))
+            self.memories = memories
+        self._generation = generation
+
+        replay_vectors = []
+        for gen in self._log_generations():
+            if gen < generation:
+                os.remove(self._log_path(gen))  # Already in the snapshot
+                continue
+            for entry, vec in self._read_log(self._log_path(gen)):
+                if entry.get("id", len(self.memories)) < len(self.memories):
+                    continue
+                self.memories.append(entry)
+                replay_vectors.append(vec)
+            self._generation = gen
+        if replay_vectors:
+            self.index.add(np.vstack(replay_vectors))
+        self._log_records = self._stats["replayed"] = len(replay_vectors)
+
+    def _migrate_legacy(self) -> Tuple[np.ndarray, List[Dict[str, Any]], int]:
+        """One-time import of faiss.index + memories.pkl written by older versions"""
+        empty = (np.empty((0, self.dimension), dtype="float32"), [], 0)
         idx_path = os.path.join(self.cache_dir, "faiss.index")
         mem_path = os.path.join(self.cache_dir, "memories.pkl")
-        if os.path.exists(idx_path) and os.path.exists(mem_path):
-            try:
-                self.index = faiss.read_index(idx_path)
-                with open(mem_path, 'rb') as f:
-                    self.memories = pickle.load(f)
-            except Exception as e:
-                logger.warning(f"Load failed: {e}")
+        if not (os.path.exists(idx_path) and os.path.exists(mem_path)):
+            return empty
+        try:
+            index = faiss.read_index(idx_path)
+            with open(mem_path, 'rb') as f:
+                memories = pickle.load(f)
+            vectors = index.reconstruct_n(0, index.ntotal) if index.ntotal else empty[0]
+            self._write_snapshot(vectors, memories, 0)
+            os.remove(idx_path)
+            os.remove(mem_path)
+            logger.info(f"💾 Migrated {len(memories)} memories from the pickle files to {SNAPSHOT_FILE}")
+            return vectors, memories, 0
+        except Exception as e:
+            logger.warning(f"Load failed: {e}")
+            return empty
+
+    def persistence_stats(self) -> Dict[str, Any]:
+        if not self.model:
+            return {"available": False}
+        with self._lock:
+            return {
+                "available": True,
+                "memories": len(self.memories),
+                "log_generation": self._generation,
+                "log_records": self._log_records,
+                "unsynced": self._unsynced,
+                **self._stats,
+            }
@@ -4,7 +4,7 @@ Video Search Service - Pure Node.js Playwright Implementation
 
 import httpx
 import logging
-import asyncio
+from ..core.http_clients import HttpClientRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -19,23 +19,22 @@ class VideoSearchService:
         
         try:
             logger.info(f"🎬 Searching videos via Node.js service: {query}")
-            async with httpx.AsyncClient(timeout=40.0) as client:
-                response = await client.post(
-                    f"{PLAYWRIGHT_SERVICE_URL}/search-videos",
-                    json={"query": query, "max_results": max_results}
-                )
-                
-                if response.status_code == 200:
-                    results = response.json()
-                    if results and isinstance(results, list):
-                        logger.info(f"✅ Node.js video service success: {len(results)} videos")
-                        return results
-                    else:
-                        logger.warning(f"⚠️ Node.js video service returned empty results")
-                        return []
+            response = await HttpClientRegistry.get("playwright").post(
+                f"{PLAYWRIGHT_SERVICE_URL}/search-videos",
+                json={"query": query, "max_results": max_results}
+            )
+            
+            if response.status_code == 200:
+                results = response.json()
+                if results and isinstance(results, list):
+                    logger.info(f"✅ Node.js video service success: {len(results)} videos")
+                    return results
                 else:
-                    logger.warning(f"⚠️ Node.js video service returned {response.status_code}")
-                    return [{"error": f"Service error: {response.status_code}"}]
+                    logger.warning(f"⚠️ Node.js video service returned empty results")
+                    return []
+            else:
+                logger.warning(f"⚠️ Node.js video service returned {response.status_code}")
+                return [{"error": f"Service error: {response.status_code}"}]
                     
         except httpx.ConnectError:
             logger.error("❌ Cannot connect to Playwright service")
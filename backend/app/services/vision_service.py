@@ -1,10 +1,12 @@
-import httpx
 import logging
 import os
 import base64
 from PIL import Image
 from io import BytesIO
 from typing import Optional
+from ..core.http_clients import HttpClientRegistry
+from ..core.executors import run_blocking
+from ..core.llm_gateway import LLMGateway
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +18,16 @@ class VisionService:
     Service to handle image analysis using Mistral's multimodal capabilities (Pixtral).
     """
 
+    @staticmethod
+    def _encode_image(source) -> str:
+        """Resize to 1024px max and encode as base64 WEBP (CPU bound)"""
+        with Image.open(source) as img:
+            max_size = (1024, 1024)
+            img.thumbnail(max_size, Image.Resampling.LANCZOS)
+            buffered = BytesIO()
+            img.save(buffered, format="WEBP", quality=80)
+            return base64.b64encode(buffered.getvalue()).decode('utf-8')
+
     @staticmethod
     async def analyze_image(image_path: Optional[str] = None, image_url: Optional[str] = None, prompt: str = "Describe this image in detail.") -> str:
         """
@@ -32,30 +44,19 @@ class VisionService:
             
             # CASE A: Remote URL
             if image_url:
-                 async with httpx.AsyncClient() as client:
-                     resp = await client.get(image_url)
-                     if resp.status_code != 200:
-                         return f"ERROR: Failed to fetch image from URL {image_url} (Status {resp.status_code})"
-                     
-                     with Image.open(BytesIO(resp.content)) as img:
-                        # Process same as local
-                         max_size = (1024, 1024)
-                         img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                         buffered = BytesIO()
-                         img.save(buffered, format="WEBP", quality=80)
-                         base64_image = base64.b64encode(buffered.getvalue()).decode('utf-8')
+                 resp = await HttpClientRegistry.get("generic").get(image_url)
+                 if resp.status_code != 200:
+                     return f"ERROR: Failed to fetch image from URL {image_url} (Status {resp.status_code})"
+                 
+                 # Process same as local
+                 base64_image = await run_blocking("cpu", VisionService._encode_image, BytesIO(resp.content))
 
             # CASE B: Local Path
             elif image_path:
                 if not os.path.exists(image_path):
                     return f"ERROR: Image file not found at {image_path}"
                 
-                with Image.open(image_path) as img:
-                    max_size = (1024, 1024)
-                    img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                    buffered = BytesIO()
-                    img.save(buffered, format="WEBP", quality=80)
-                    base64_image = base64.b64encode(buffered.getvalue()).decode('utf-8')
+                base64_image = await run_blocking("cpu", VisionService._encode_image, image_path)
 
             # 2. Call Mistral Pixtral
             headers = {
@@ -80,15 +81,14 @@ class VisionService:
                 "max_tokens": 500
             }
 
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(MISTRAL_API_URL, headers=headers, json=payload)
+            async with LLMGateway.request(HttpClientRegistry.get("mistral"), MISTRAL_API_URL, session_id="vision", headers=headers, json=payload, timeout=60.0) as response:
                 if response.status_code != 200:
                     logger.error(f"Pixtral API Error: {response.status_code} - {response.text}")
                     return f"ERROR: Vision API failed with status {response.status_code}"
                 
                 data = response.json()
-                description = data["choices"][0]["message"]["content"]
-                return description
+            description = data["choices"][0]["message"]["content"]
+            return description
 
         except Exception as e:
             logger.error(f"Vision analysis failed: {e}")
@@ -2,10 +2,10 @@
 Weather service with OpenWeatherMap (free API)
 """
 
-import httpx
 import os
 import logging
 from dotenv import load_dotenv
+from ..core.http_clients import HttpClientRegistry
 load_dotenv
 
 logger = logging.getLogger(__name__)
@@ -35,26 +35,25 @@ class WeatherService:
         }
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(url, params=params)
-                
-                if response.status_code != 200:
-                    return {"error": f"City not found or API error: {response.status_code}"}
-                
-                data = response.json()
-                
-                # Format result
-                return {
-                    "city": data["name"],
-                    "country": data["sys"]["country"],
-                    "temperature": data["main"]["temp"],
-                    "feels_like": data["main"]["feels_like"],
-                    "description": data["weather"][0]["description"],
-                    "humidity": data["main"]["humidity"],
-                    "wind_speed": data["wind"]["speed"],
-                    "icon": data["weather"][0]["icon"],
-                    "icon_url": f"https://openweathermap.org/img/wn/{data['weather'][0]['icon']}@2x.png"
-                }
+            response = await HttpClientRegistry.get("openweather").get(url, params=params)
+            
+            if response.status_code != 200:
+                return {"error": f"City not found or API error: {response.status_code}"}
+            
+            data = response.json()
+            
+            # Format result
+            return {
+                "city": data["name"],
+                "country": data["sys"]["country"],
+                "temperature": data["main"]["temp"],
+                "feels_like": data["main"]["feels_like"],
+                "description": data["weather"][0]["description"],
+                "humidity": data["main"]["humidity"],
+                "wind_speed": data["wind"]["speed"],
+                "icon": data["weather"][0]["icon"],
+                "icon_url": f"https://openweathermap.org/img/wn/{data['weather'][0]['icon']}@2x.png"
+            }
                 
         except Exception as e:
             logger.error(f"Weather API error: {e}")
@@ -0,0 +1,185 @@
+"""
+Chat Benchmark - Offline end-to-end load test of POST /api/chat
+Drives N concurrent sessions through the real FastAPI app while Mistral and
+the Playwright service are replaced by the in-process fakes of
+fake_upstreams.py. Runs without network, in a throwaway data directory.
+
+Usage (from backend/):
+    python -m benchmarks.chat_bench --sessions 20 --turns 3
+    python -m benchmarks.chat_bench --sessions 50 --scenario research --json bench.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.fake_upstreams import (  # noqa: E402
+    BENCH_MARKER, TRANSCRIPTS, FakeLatency, StreamingASGITransport,
+    create_fake_mistral, create_fake_playwright,
+)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(values, 50), 1),
+        "p95": round(percentile(values, 95), 1),
+        "p99": round(percentile(values, 99), 1),
+        "max": round(max(values), 1) if values else 0.0,
+    }
+
+
+def prepare_environment(data_dir: Path):
+    """Point every on-disk store at a throwaway directory before the app is imported"""
+    os.environ.setdefault("MISTRAL_API_KEY", "bench")
+    os.chdir(data_dir)  # SQLite database and uploads use relative paths
+
+    import config
+    config.DATA_ROOT = data_dir
+    config.TOOL_CACHE_DB_PATH = str(data_dir / "tool_cache.db")
+
+
+async def run_session(client: httpx.AsyncClient, session_id: str, turns: int, scenarios: List[str], offset: int) -> List[Dict]:
+    results = []
+    for turn in range(turns):
+        scenario = scenarios[(offset + turn) % len(scenarios)]
+        message = f"{BENCH_MARKER}{scenario}] session {session_id} turn {turn}"
+        started = time.perf_counter()
+        first_event = None
+        events = 0
+        final = False
+        async with client.stream("POST", "/api/chat", json={"message": message, "session_id": session_id}) as response:
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                if first_event is None:
+                    first_event = time.perf_counter()
+                events += 1
+                final = final or json.loads(line).get("type") == "final"
+        ended = time.perf_counter()
+        results.append({
+            "scenario": scenario,
+            "status": response.status_code,
+            "ttfe_ms": ((first_event or ended) - started) * 1000,
+            "turn_ms": (ended - started) * 1000,
+            "events": events,
+            "ok": response.status_code == 200 and final,
+        })
+    return results
+
+
+async def run_benchmark(args) -> Dict:
+    from main import app
+    from app.core.http_clients import HttpClientRegistry
+    from app.core.llm_gateway import LLMGateway
+    from app.services.tool_call_parser import ToolCallStats
+
+    latency = FakeLatency(ttft_ms=args.ttft_ms, token_ms=args.token_ms, search_ms=args.search_ms, scrape_ms=args.scrape_ms)
+    fake_mistral = create_fake_mistral(latency)
+
+    # Pre-installed clients are kept by HttpClientRegistry.start()
+    HttpClientRegistry._clients["mistral"] = httpx.AsyncClient(transport=StreamingASGITransport(fake_mistral), timeout=120.0)
+    HttpClientRegistry._clients["playwright"] = httpx.AsyncClient(transport=StreamingASGITransport(create_fake_playwright(latency)), timeout=40.0)
+
+    scenarios = list(TRANSCRIPTS) if args.scenario == "mix" else [args.scenario]
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=StreamingASGITransport(app), base_url="http://bench", timeout=300.0) as client:
+            # Warmup (imports, tokenizer, first DB connections), not measured
+            await run_session(client, "bench-warmup", 1, scenarios, 0)
+
+            if args.tracemalloc:
+                tracemalloc.start()
+            started = time.perf_counter()
+            sessions = await asyncio.gather(*[
+                run_session(client, f"bench-{i}", args.turns, scenarios, i) for i in range(args.sessions)
+            ])
+            wall = time.perf_counter() - started
+            traced_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+            if args.tracemalloc:
+                tracemalloc.stop()
+
+    turns = [r for session in sessions for r in session]
+    total_events = sum(r["events"] for r in turns)
+    return {
+        "config": {
+            "sessions": args.sessions,
+            "turns_per_session": args.turns,
+            "scenarios": scenarios,
+            "latency": vars(latency),
+        },
+        "turns": len(turns),
+        "failed_turns": sum(1 for r in turns if not r["ok"]),
+        "wall_s": round(wall, 2),
+        "turns_per_s": round(len(turns) / wall, 2),
+        "events_per_s": round(total_events / wall, 1),
+        "ttfe_ms": summarize([r["ttfe_ms"] for r in turns]),
+        "turn_ms": summarize([r["turn_ms"] for r in turns]),
+        "per_scenario_turn_ms": {
+            s: summarize([r["turn_ms"] for r in turns if r["scenario"] == s]) for s in scenarios
+        },
+        "mistral_requests": fake_mistral.state.requests,
+        "llm_queue_wait_ms": LLMGateway.stats()["queue_wait_ms"],
+        "tool_calls": ToolCallStats.stats(),
+        "memory": {
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "traced_peak_mb": round(traced_peak / 1024 / 1024, 1) if traced_peak is not None else None,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline /api/chat benchmark with fake Mistral and Playwright")
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent chat sessions")
+    parser.add_argument("--turns", type=int, default=3, help="turns per session")
+    parser.add_argument("--scenario", default="mix", choices=["mix", *TRANSCRIPTS], help="transcript replayed by the fake Mistral")
+    parser.add_argument("--ttft-ms", type=float, default=150.0, help="fake Mistral time to first token")
+    parser.add_argument("--token-ms", type=float, default=8.0, help="fake Mistral delay per streamed chunk")
+    parser.add_argument("--search-ms", type=float, default=300.0, help="fake search latency")
+    parser.add_argument("--scrape-ms", type=float, default=600.0, help="fake scrape latency")
+    parser.add_argument("--tracemalloc", action="store_true", help="track Python heap peak (slower)")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("-v", "--verbose", action="store_true", help="keep application logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+    output = Path(args.json).resolve() if args.json else None
+
+    with tempfile.TemporaryDirectory(prefix="eveline-bench-") as data_dir:
+        prepare_environment(Path(data_dir))
+        if not args.verbose:
+            logging.disable(logging.WARNING)
+        # Startup banners go to stderr, stdout carries only the JSON report
+        with contextlib.redirect_stdout(sys.stderr):
+            report = asyncio.run(run_benchmark(args))
+        os.chdir(BACKEND_DIR)
+
+    print(json.dumps(report, indent=2))
+    if output:
+        output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
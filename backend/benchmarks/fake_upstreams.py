@@ -0,0 +1,235 @@
+"""
+Fake Upstreams - In-process stand-ins for Mistral and the Node Playwright service
+Both are plain ASGI apps called in-process through StreamingASGITransport,
+so the benchmark needs no network. Latencies are fixed (no randomness) for reproducible runs.
+"""
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Dict, List
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Every benchmark message starts with this marker, it tells the fake Mistral
+# which transcript to replay and where the turn starts in the context.
+BENCH_MARKER = "[bench:"
+
+# Scripted assistant outputs, one per ReAct step
+TRANSCRIPTS: Dict[str, List[str]] = {
+    "direct": [
+        "Final Answer: Bonjour ! Comment puis-je t'aider aujourd'hui ?",
+    ],
+    "search": [
+        'Je cherche. {"tool": "search", "query": "bitcoin price today"}',
+        "Final Answer: Le bitcoin s'échange autour de 65 000 $ selon les résultats de recherche.",
+    ],
+    "research": [
+        '[{"tool": "search", "query": "python asyncio tutorial"}, {"tool": "image_search", "query": "python logo"}]',
+        '{"tool": "scrape", "url": "https://docs.python.org/3/library/asyncio.html"}',
+        "Final Answer: asyncio permet d'écrire du code concurrent avec async/await ; la documentation couvre les tâches, les boucles et les flux.",
+    ],
+}
+
+
+class StreamingASGITransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport calling an ASGI app in-process.
+    Unlike httpx.ASGITransport, body chunks are handed over as the app sends
+    them, so streamed responses keep their real time-to-first-byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "scheme": request.url.scheme,
+            "path": request.url.path,
+            "raw_path": request.url.raw_path.split(b"?")[0],
+            "query_string": request.url.query,
+            "root_path": "",
+            "headers": [(k.lower(), v) for k, v in request.headers.raw],
+            "server": (request.url.host, request.url.port or 80),
+            "client": ("127.0.0.1", 50000),
+        }
+        chunks: asyncio.Queue = asyncio.Queue()
+        response_start = asyncio.get_running_loop().create_future()
+        disconnected = asyncio.Event()
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response_start.set_result(message)
+            elif message["type"] == "http.response.body":
+                if message.get("body"):
+                    await chunks.put(message["body"])
+                if not message.get("more_body"):
+                    await chunks.put(None)
+
+        async def run():
+            try:
+                await self.app(scope, receive, send)
+            except Exception as e:
+                if not response_start.done():
+                    response_start.set_exception(e)
+            finally:
+                await chunks.put(None)
+
+        task = asyncio.create_task(run())
+        start = await response_start
+        return httpx.Response(
+            start["status"],
+            headers=start.get("headers", []),
+            stream=_QueueStream(chunks, task, disconnected),
+            request=request,
+        )
+
+
+class _QueueStream(httpx.AsyncByteStream):
+    def __init__(self, chunks: asyncio.Queue, task: asyncio.Task, disconnected: asyncio.Event):
+        self._chunks = chunks
+        self._task = task
+        self._disconnected = disconnected
+
+    async def __aiter__(self):
+        while (chunk := await self._chunks.get()) is not None:
+            yield chunk
+
+    async def aclose(self):
+        # Like a client hanging up: the app sees http.disconnect
+        self._disconnected.set()
+        if not self._task.done():
+            try:
+                await asyncio.wait_for(self._task, timeout=5)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._task.cancel()
+
+
+@dataclass
+class FakeLatency:
+    ttft_ms: float = 150.0     # Mistral time to first token
+    token_ms: float = 8.0      # per streamed chunk
+    chunk_chars: int = 12      # characters per streamed chunk
+    search_ms: float = 300.0
+    scrape_ms: float = 600.0
+
+
+def _scenario_and_step(messages: List[dict]):
+    """Transcript name from the bench marker, step = assistant messages since that user message"""
+    start = None
+    for i, msg in enumerate(messages):
+        if msg.get("role") == "user" and BENCH_MARKER in str(msg.get("content", "")):
+            start = i
+    if start is None:
+        return "direct", 0
+    content = messages[start]["content"]
+    # Consecutive user messages may be merged, the current turn is the last marker
+    name = content.rsplit(BENCH_MARKER, 1)[1].split("]", 1)[0]
+    step = sum(1 for msg in messages[start + 1:] if msg.get("role") == "assistant")
+    return name if name in TRANSCRIPTS else "direct", step
+
+
+def _as_tool_calls(text: str):
+    """Split a scripted step into (prose, Mistral tool_calls)"""
+    start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        return text, None
+    calls = json.loads(text[start:])
+    calls = calls if isinstance(calls, list) else [calls]
+    return text[:start].strip(), [
+        {
+            "id": f"call{i}",
+            "index": i,
+            "type": "function",
+            "function": {"name": call["tool"], "arguments": json.dumps({k: v for k, v in call.items() if k != "tool"})},
+        }
+        for i, call in enumerate(calls)
+    ]
+
+
+def create_fake_mistral(latency: FakeLatency) -> FastAPI:
+    app = FastAPI()
+    app.state.requests = 0
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        name, step = _scenario_and_step(body.get("messages", []))
+        transcript = TRANSCRIPTS[name]
+        text = transcript[min(step, len(transcript) - 1)]
+        tool_calls = None
+        if body.get("tools"):
+            # Function-calling mode: scripted JSON calls become structured tool_calls
+            text, tool_calls = _as_tool_calls(text)
+
+        if not body.get("stream"):
+            await asyncio.sleep((latency.ttft_ms + latency.token_ms * len(text) / latency.chunk_chars) / 1000)
+            message = {"role": "assistant", "content": text}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            return JSONResponse({"choices": [{"message": message}]})
+
+        async def sse():
+            await asyncio.sleep(latency.ttft_ms / 1000)
+            for i in range(0, len(text), latency.chunk_chars):
+                chunk = {"choices": [{"delta": {"content": text[i:i + latency.chunk_chars]}}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(latency.token_ms / 1000)
+            if tool_calls:
+                yield f"data: {json.dumps({'choices': [{'delta': {'tool_calls': tool_calls}}]})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(sse(), media_type="text/event-stream")
+
+    return app
+
+
+def create_fake_playwright(latency: FakeLatency) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/search")
+    async def search(request: Request):
+        body = await request.json()
+        await asyncio.sleep(latency.search_ms / 1000)
+        query = body.get("query", "")
+        return [
+            {"title": f"Result {i} for {query}", "href": f"https://example.com/{i}", "body": f"Snippet {i} about {query}."}
+            for i in range(body.get("max_results", 5))
+        ]
+
+    @app.post("/scrape")
+    async def scrape(request: Request):
+        body = await request.json()
+        await asyncio.sleep(latency.scrape_ms / 1000)
+        paragraph = f"Content of {body.get('url')} about asyncio tasks, event loops and streams."
+        return {"text": "\n\n".join(f"{paragraph} Section {i}." for i in range(200))}
+
+    @app.post("/search-images")
+    async def search_images(request: Request):
+        body = await request.json()
+        await asyncio.sleep(latency.search_ms / 1000)
+        return [{"title": body.get("query"), "image": f"https://example.com/img{i}.png"} for i in range(5)]
+
+    @app.post("/search-videos")
+    async def search_videos(request: Request):
+        body = await request.json()
+        await asyncio.sleep(latency.search_ms / 1000)
+        return [{"title": body.get("query"), "url": f"https://example.com/video{i}"} for i in range(5)]
+
+    return app
@@ -14,9 +14,130 @@ DATA_ROOT = BASE_DIR / "data"
 
 # HTTP Settings
 DEFAULT_TIMEOUT = 10
-DEFAULT_THREADS = 10
+DEFAULT_THREADS = 10  # Max pooled connections per upstream host
+HTTP_KEEPALIVE_EXPIRY = 30
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36"
 
+# Blocking work pools (threads per workload class, see app/core/executors.py)
+EXECUTOR_POOL_SIZES = {
+    "db": int(os.getenv("EXECUTOR_DB_THREADS", 4)),
+    "cpu": int(os.getenv("EXECUTOR_CPU_THREADS", os.cpu_count() or 2)),
+    "subprocess": int(os.getenv("EXECUTOR_SUBPROCESS_THREADS", 4)),
+    "dns": int(os.getenv("EXECUTOR_DNS_THREADS", 8)),
+}
+EXECUTOR_MAX_QUEUE = int(os.getenv("EXECUTOR_MAX_QUEUE", 64))  # Pending jobs per pool before callers wait
+
+# Tool result cache (in-process LRU + optional SQLite tier shared across workers)
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", 512))
+TOOL_CACHE_SHARED = os.getenv("TOOL_CACHE_SHARED", "false").lower() == "true"
+TOOL_CACHE_DB_PATH = os.getenv("TOOL_CACHE_DB_PATH", str(DATA_ROOT / "tool_cache.db"))
+
+# LLM models, planning steps use the small one when routing is enabled
+MISTRAL_LARGE_MODEL = os.getenv("MISTRAL_LARGE_MODEL", "mistral-large-latest")
+MISTRAL_SMALL_MODEL = os.getenv("MISTRAL_SMALL_MODEL", "mistral-small-latest")
+MODEL_ROUTING_ENABLED = os.getenv("MODEL_ROUTING_ENABLED", "true").lower() == "true"
+MODEL_ESCALATE_AFTER_FAILURES = int(os.getenv("MODEL_ESCALATE_AFTER_FAILURES", 2))  # Rejected tool calls before pinning the large model
+# Opt-in: keep a direct answer of the small model instead of rewriting it with the large one (fewer calls, weaker answers)
+MODEL_KEEP_SMALL_ANSWERS = os.getenv("MODEL_KEEP_SMALL_ANSWERS", "false").lower() == "true"
+# Send the tool registry as Mistral `tools` and read structured tool_calls (JSON in the text stays the fallback)
+MISTRAL_FUNCTION_CALLING = os.getenv("MISTRAL_FUNCTION_CALLING", "true").lower() == "true"
+
+# LLM gateway: process-wide Mistral concurrency, retries and circuit breaker
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 3))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", 0.5))  # seconds, doubled per attempt (full jitter)
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", 8))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", 5))  # Consecutive failures before opening
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", 30))
+
+# Chat request budget (seconds), shared by every LLM and tool call of one request
+CHAT_DEADLINE_SECONDS = float(os.getenv("CHAT_DEADLINE_SECONDS", 60))
+
+# Per-source timeouts (seconds) of the pre-fetch stage, a slower source is dropped
+PREFETCH_TIMEOUTS = {
+    "vector": float(os.getenv("PREFETCH_VECTOR_TIMEOUT", 1.5)),
+    "memory_summary": float(os.getenv("PREFETCH_MEMORY_TIMEOUT", 1.0)),
+    "recent_topics": float(os.getenv("PREFETCH_MEMORY_TIMEOUT", 1.0)),
+    "accounts": float(os.getenv("PREFETCH_ACCOUNTS_TIMEOUT", 1.0)),
+    "history": float(os.getenv("PREFETCH_HISTORY_TIMEOUT", 3.0)),
+    "summary": float(os.getenv("PREFETCH_HISTORY_TIMEOUT", 3.0)),
+    "relevant_history": float(os.getenv("PREFETCH_VECTOR_TIMEOUT", 1.5)),
+}
+
+# Token budget of each tool observation pushed into the ReAct context
+OBSERVATION_TOKEN_BUDGETS = {
+    "default": int(os.getenv("OBSERVATION_TOKEN_BUDGET", 1000)),
+    "scrape": int(os.getenv("OBSERVATION_SCRAPE_BUDGET", 1500)),
+    "search": int(os.getenv("OBSERVATION_SEARCH_BUDGET", 800)),
+    "image_search": 600,
+    "video_search": 600,
+}
+OBSERVATION_MAX_INPUT_CHARS = 200_000  # Longer outputs are cut before ranking
+
+# Semantic answer cache (opt-in): reuse final answers of near-identical questions
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "false").lower() == "true"
+ANSWER_CACHE_MIN_SCORE = float(os.getenv("ANSWER_CACHE_MIN_SCORE", 0.92))  # Cosine similarity
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", 86400))  # Upper bound, tools used may shorten it
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 1000))
+
+# Vector memory persistence: append-only log, fsynced in batches, compacted into a snapshot in the background
+VECTOR_LOG_FSYNC_INTERVAL = float(os.getenv("VECTOR_LOG_FSYNC_INTERVAL", 1.0))  # Seconds between background fsyncs
+VECTOR_LOG_FSYNC_BATCH = int(os.getenv("VECTOR_LOG_FSYNC_BATCH", 32))  # Unsynced records forcing an immediate fsync
+VECTOR_SNAPSHOT_EVERY = int(os.getenv("VECTOR_SNAPSHOT_EVERY", 500))  # Logged records before a snapshot/compaction
+
+# Local fast path: trivial intents (time, date, arithmetic, events, weather) answered without the LLM
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+FAST_PATH_MIN_CONFIDENCE = float(os.getenv("FAST_PATH_MIN_CONFIDENCE", 0.85))  # Loose keyword matches need embedding agreement
+FAST_PATH_TIMEZONE = os.getenv("FAST_PATH_TIMEZONE", "")  # e.g. "Europe/Paris", empty = server local time like get_time
+
+# Tool library pruning: only the tools relevant to the request (+ always-on ones) go into the prompt
+TOOL_PRUNING_ENABLED = os.getenv("TOOL_PRUNING_ENABLED", "true").lower() == "true"
+TOOL_PRUNING_TOP_K = int(os.getenv("TOOL_PRUNING_TOP_K", 3))
+TOOL_PRUNING_MIN_SCORE = float(os.getenv("TOOL_PRUNING_MIN_SCORE", 0.2))  # Cosine similarity to the tool description
+TOOL_PRUNING_ALWAYS = [t for t in os.getenv("TOOL_PRUNING_ALWAYS", "search,scrape,sandbox").split(",") if t]
+
+# Token counts memoized by content hash (history, observations, prompts)
+TOKEN_COUNT_CACHE_SIZE = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", 8192))
+
+# Tokenizer for context budgets: "mistral" (the model's tokenizer: a local tokenizer.json from
+# MISTRAL_TOKENIZER_PATH, or mistral-common), "tiktoken" (cl100k_base) or "heuristic" (len/4).
+# A backend that cannot load falls back to the next one in that order.
+TOKENIZER_BACKEND = os.getenv("TOKENIZER_BACKEND", "tiktoken")
+MISTRAL_TOKENIZER_PATH = os.getenv("MISTRAL_TOKENIZER_PATH", "")
+TOKENIZER_THREADS = int(os.getenv("TOKENIZER_THREADS", 4))  # count_many batch encoding
+TOKENIZER_DRIFT_WARN = float(os.getenv("TOKENIZER_DRIFT_WARN", 0.15))  # Warn when Mistral's usage differs by more than this
+
+# Budget profile per model: context size used (not the model's full window), completion tokens
+# reserved out of it, and the share left to volatile system info (memories, state).
+# Models without an entry of their own (keyed by model name) use "default".
+MODEL_BUDGETS = {
+    "default": {"max_tokens": int(os.getenv("CONTEXT_MAX_TOKENS", 32000)), "reserved_output": 2000, "system_share": 0.2},
+}
+
+# Chat history loaded per turn: the most recent messages fitting the token budget
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", 8000))
+HISTORY_MAX_MESSAGES = int(os.getenv("HISTORY_MAX_MESSAGES", 200))  # Hard cap for sessions of tiny messages
+
+# Older messages semantically close to the question, added next to the recent history
+RELEVANT_HISTORY_ENABLED = os.getenv("RELEVANT_HISTORY_ENABLED", "true").lower() == "true"
+RELEVANT_HISTORY_TOP_K = int(os.getenv("RELEVANT_HISTORY_TOP_K", 4))
+RELEVANT_HISTORY_MIN_SCORE = float(os.getenv("RELEVANT_HISTORY_MIN_SCORE", 0.35))  # Cosine similarity to the question
+RELEVANT_HISTORY_SHARE = float(os.getenv("RELEVANT_HISTORY_SHARE", 0.25))  # Part of the history budget they may use
+MESSAGE_INDEX_SESSIONS = int(os.getenv("MESSAGE_INDEX_SESSIONS", 64))  # Session embedding matrices kept in memory
+
+# Rolling summaries of the history left out of the context, refreshed by a background worker
+SUMMARY_ENABLED = os.getenv("SUMMARY_ENABLED", "true").lower() == "true"
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", MISTRAL_SMALL_MODEL)
+SUMMARY_MIN_EVICTED_TOKENS = int(os.getenv("SUMMARY_MIN_EVICTED_TOKENS", 1500))  # Evicted, not yet summarized tokens before a refresh
+SUMMARY_BATCH_TOKENS = int(os.getenv("SUMMARY_BATCH_TOKENS", 6000))  # Evicted history folded in per LLM call
+SUMMARY_BATCH_SESSIONS = int(os.getenv("SUMMARY_BATCH_SESSIONS", 4))  # Sessions refreshed concurrently per worker wake-up
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", 400))
+SUMMARY_TIMEOUT = float(os.getenv("SUMMARY_TIMEOUT", 60.0))
+
+# Per-turn span traces kept in memory for /api/traces/{session_id}
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", 100))
+
 # Service URLs (Docker-aware)
 PLAYWRIGHT_SERVICE_URL = os.getenv("PLAYWRIGHT_SERVICE_URL", "http://playwright-service:3001")
 BACKEND_API_URL = os.getenv("BACKEND_API_URL", "http://127.0.0.1:8000")
@@ -17,12 +17,41 @@ async def lifespan(app: FastAPI):
     startup_checks()
 
     # Create DB tables
-    from app.core.database import Base, engine
+    from app.core.database import Base, engine, add_missing_columns, add_missing_indexes
     from app.models.chat import ChatSession, ChatMessage
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    add_missing_indexes()
+
+    # Shared outbound HTTP clients
+    from app.core.http_clients import HttpClientRegistry
+    await HttpClientRegistry.start()
+
+    # Tokenizer + static system prompt segments (counted once)
+    from app.services.ai_service import AIService
+    AIService.get_context_manager()
+
+    # Tool description embeddings for per-request tool pruning
+    from app.services.tool_selector import ToolSelector
+    from app.core.executors import run_blocking
+    await run_blocking("cpu", ToolSelector.warmup, AIService.get_vector_memory())
+
+    # Background refresh of the per-session rolling summaries
+    from app.services.summary_service import ConversationSummarizer
+    await ConversationSummarizer.start()
     
     yield
-    # Shutdown steps here if needed
+
+    # Shutdown
+    await ConversationSummarizer.stop()
+    vector_memory = AIService.get_vector_memory()
+    if vector_memory:
+        vector_memory.close()
+    await HttpClientRegistry.close()
+    from app.services.tool_cache import ToolResultCache
+    ToolResultCache.close()
+    from app.core.executors import shutdown_executors
+    shutdown_executors()
 
 # Initialize FastAPI with lifespan
 app = FastAPI(title="TERMINAL_OS Backend", version="2.0.0", lifespan=lifespan)
@@ -47,7 +76,7 @@ def root():
     return {"status": "Minimal Mode", "ok": True}
 
 # Import and include routers
-from app.routers import ai, sandbox, accounts, memory, calendar, crypto, notes, realtime, vision
+from app.routers import ai, sandbox, accounts, memory, calendar, crypto, notes, realtime, vision, metrics, traces
 
 app.include_router(ai.router, prefix="/api", tags=["ai"])
 app.include_router(sandbox.router, prefix="/api/sandbox", tags=["sandbox"])
@@ -58,6 +87,8 @@ app.include_router(crypto.router, prefix="/api/crypto", tags=["crypto"])
 app.include_router(notes.router, prefix="/api", tags=["notes"])
 app.include_router(realtime.router, prefix="/api", tags=["realtime"])
 app.include_router(vision.router, prefix="/api/vision", tags=["vision"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["metrics"])
+app.include_router(traces.router, prefix="/api/traces", tags=["traces"])
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import time
+
+from app.core.executors import ExecutorPool
+
+
+def test_cancelled_waiters_do_not_leak_slots():
+    async def scenario():
+        pool = ExecutorPool("test", max_workers=1, max_queue=0)
+        gate = threading.Event()
+        running = asyncio.create_task(pool.run(gate.wait))
+        await asyncio.sleep(0.05)
+
+        # Backlog full: these wait for admission and are cancelled (prefetch timeout)
+        for _ in range(3):
+            try:
+                await asyncio.wait_for(pool.run(time.sleep, 0), timeout=0.05)
+            except asyncio.TimeoutError:
+                pass
+
+        gate.set()
+        await running
+        # Capacity is back: a new job is admitted right away
+        assert await asyncio.wait_for(pool.run(lambda: 42), timeout=1) == 42
+        pool.shutdown()
+        return pool.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert metrics["queued"] == 0 and metrics["active"] == 0
+    assert metrics["completed"] == 2
+
+
+def test_slot_held_until_cancelled_job_returns():
+    async def scenario():
+        pool = ExecutorPool("test", max_workers=1, max_queue=0)
+        gate = threading.Event()
+        try:
+            await asyncio.wait_for(pool.run(gate.wait), timeout=0.05)
+        except asyncio.TimeoutError:
+            pass
+        # The job still runs in its thread: no new job may start
+        waiting = asyncio.create_task(pool.run(lambda: "next"))
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        gate.set()
+        assert await asyncio.wait_for(waiting, timeout=1) == "next"
+        pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_errors_counted_and_raised():
+    async def scenario():
+        pool = ExecutorPool("test", max_workers=2, max_queue=0)
+        try:
+            await pool.run(lambda: 1 / 0)
+        except ZeroDivisionError:
+            pass
+        else:
+            raise AssertionError("error not propagated")
+        pool.shutdown()
+        return pool.metrics()
+
+    assert asyncio.run(scenario())["failed"] == 1
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models.chat import ChatMessage, ChatSession
+from app.services.history_service import HistoryService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([ChatSession(id="s"), ChatSession(id="other")])
+    session.commit()
+    yield session
+    session.close()
+
+
+def add(db, session_id, *counts, content="x"):
+    for count in counts:
+        db.add(ChatMessage(session_id=session_id, role="user", content=content, token_count=count))
+    db.commit()
+
+
+def token_counts(messages):
+    return [m.token_count for m in messages]
+
+
+def test_newest_messages_within_budget_chronological(db):
+    add(db, "s", 100, 200, 300, 400)
+    add(db, "other", 1, 1)
+    assert token_counts(HistoryService.get_history_within_budget(db, "s", budget=750)) == [300, 400]
+    assert token_counts(HistoryService.get_history_within_budget(db, "s", budget=1000)) == [100, 200, 300, 400]
+
+
+def test_oversized_newest_message_leaves_nothing(db):
+    add(db, "s", 100, 5000)
+    assert HistoryService.get_history_within_budget(db, "s", budget=1000) == []
+
+
+def test_message_limit(db):
+    add(db, "s", 10, 10, 10, 10)
+    assert len(HistoryService.get_history_within_budget(db, "s", budget=1000, max_messages=3)) == 3
+
+
+def test_rows_without_token_count_cost_len_over_4(db):
+    add(db, "s", None, content="y" * 400)  # 100 tokens
+    add(db, "s", 50)
+    assert len(HistoryService.get_history_within_budget(db, "s", budget=149)) == 1
+    assert len(HistoryService.get_history_within_budget(db, "s", budget=150)) == 2
+
+
+def test_messages_between_keep_the_one_crossing_the_budget(db):
+    add(db, "s", 100, 300, 200, 50)
+    ids = [m.id for m in db.query(ChatMessage).filter(ChatMessage.session_id == "s").order_by(ChatMessage.id)]
+    between = HistoryService.get_messages_between(db, "s", ids[0], ids[-1], budget=250)
+    assert token_counts(between) == [300]
+
+
+def test_token_count_set_at_write_time(db):
+    message = HistoryService.add_message(db, "s", "user", "bonjour " * 40)
+    assert message.token_count > 0 and message.embedding is None
+    assert token_counts(HistoryService.get_history_within_budget(db, "s")) == [message.token_count]
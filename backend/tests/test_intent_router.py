@@ -0,0 +1,58 @@
+import pytest
+
+from app.services.intent_router import IntentRouter
+
+
+def intent(message):
+    match = IntentRouter.classify(message)
+    return match and (match[0], match[2])
+
+
+@pytest.mark.parametrize("message, city", [
+    ("météo à Paris", "paris"),
+    ("quel temps fait-il à Saint-Étienne ?", "saint-etienne"),
+])
+def test_weather_city(message, city):
+    assert intent(message) == ("weather", {"city": city})
+
+
+@pytest.mark.parametrize("message", [
+    "météo à Lyon demain",
+    "météo de la semaine",
+    "la météo à Lyon ce week-end",
+    "what's the weather in Paris tomorrow",
+])
+def test_weather_with_time_words_goes_to_the_llm(message):
+    assert intent(message) is None
+
+
+@pytest.mark.parametrize("message", [
+    "Quelle heure est-il à Tokyo ?",
+    "What time is it in London?",
+    "À quelle heure ferme la poste ?",
+    "quelle heure est-il en UTC",
+])
+def test_time_with_place_or_zone_goes_to_the_llm(message):
+    assert intent(message) is None
+
+
+def test_local_time():
+    assert intent("Quelle heure est-il ?") == ("time", {})
+    assert IntentRouter.classify("Tu sais quelle heure il est ?")[0] == "time"
+
+
+@pytest.mark.parametrize("message", ["2024-2025", "12/05/2024", "06-12-34-56"])
+def test_bare_ranges_and_dates_are_not_calculations(message):
+    assert intent(message) is None
+
+
+@pytest.mark.parametrize("message, expression, value", [
+    ("combien font 2024-2025 ?", "2024-2025", -1),
+    ("2024 - 2025 =", "2024 - 2025", -1),
+    ("calcule 10/4", "10/4", 2.5),
+    ("2+2", "2+2", 4),
+    ("3 x 4", "3 * 4", 12),
+])
+def test_calculations(message, expression, value):
+    assert intent(message) == ("calc", {"expression": expression})
+    assert IntentRouter.evaluate(expression) == value
@@ -0,0 +1,130 @@
+import asyncio
+from email.utils import formatdate
+import time
+
+import httpx
+import pytest
+
+from app.core import llm_gateway
+from app.core.deadline import Deadline
+from app.core.llm_gateway import CircuitOpenError, LLMGateway
+
+URL = "https://api.mistral.ai/v1/chat/completions"
+
+
+@pytest.fixture(autouse=True)
+def fresh_gateway(monkeypatch):
+    monkeypatch.setattr(LLMGateway, "_active", 0)
+    monkeypatch.setattr(LLMGateway, "_waiters", type(LLMGateway._waiters)())
+    monkeypatch.setattr(LLMGateway, "_failures", 0)
+    monkeypatch.setattr(LLMGateway, "_opened_at", None)
+    monkeypatch.setattr(LLMGateway, "_probe_in_flight", False)
+    monkeypatch.setattr(LLMGateway, "_counters", dict.fromkeys(LLMGateway._counters, 0))
+    monkeypatch.setattr(llm_gateway, "LLM_BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(llm_gateway, "LLM_BREAKER_THRESHOLD", 3)
+    monkeypatch.setattr(llm_gateway, "LLM_BREAKER_COOLDOWN", 30)
+
+
+def scripted(*responses):
+    """Client answering with the given (status, headers) pairs, the last one repeated"""
+    calls = []
+
+    def handler(request):
+        status, headers = responses[min(len(calls), len(responses) - 1)]
+        calls.append(status)
+        return httpx.Response(status, headers=headers, json={})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler)), calls
+
+
+async def post(client, deadline=None):
+    async with LLMGateway.request(client, URL, session_id="s", deadline=deadline, json={}) as response:
+        return response.status_code
+
+
+def test_retry_after_seconds_not_capped():
+    response = httpx.Response(429, headers={"Retry-After": "20"})
+    assert LLMGateway._retry_delay(response, 0) == 20.0
+
+
+def test_retry_after_http_date():
+    response = httpx.Response(503, headers={"Retry-After": formatdate(time.time() + 60, usegmt=True)})
+    assert 55 <= LLMGateway._retry_delay(response, 0) <= 60
+
+
+def test_backoff_without_retry_after_is_jittered_and_capped():
+    delays = [LLMGateway._retry_delay(None, 10) for _ in range(50)]
+    assert all(0 <= d <= llm_gateway.LLM_BACKOFF_MAX for d in delays)
+
+
+def test_retry_after_honoured_within_deadline():
+    async def scenario():
+        client, calls = scripted((429, {"Retry-After": "0.05"}), (200, {}))
+        started = time.monotonic()
+        status = await post(client, Deadline(5))
+        return status, calls, time.monotonic() - started
+
+    status, calls, elapsed = asyncio.run(scenario())
+    assert status == 200 and calls == [429, 200]
+    assert elapsed >= 0.05
+
+
+def test_retry_after_beyond_deadline_fails_fast():
+    async def scenario():
+        client, calls = scripted((429, {"Retry-After": "120"}), (200, {}))
+        started = time.monotonic()
+        status = await post(client, Deadline(5))
+        return status, calls, time.monotonic() - started
+
+    status, calls, elapsed = asyncio.run(scenario())
+    assert status == 429 and calls == [429]
+    assert elapsed < 1
+
+
+def test_rate_limits_do_not_open_the_circuit(monkeypatch):
+    monkeypatch.setattr(llm_gateway, "LLM_MAX_RETRIES", 0)
+
+    async def scenario():
+        client, _ = scripted((429, {"Retry-After": "0"}))
+        return [await post(client) for _ in range(5)]
+
+    assert asyncio.run(scenario()) == [429] * 5
+    assert LLMGateway._opened_at is None and LLMGateway._failures == 0
+
+
+def test_breaker_opens_then_half_open_probe_closes_it(monkeypatch):
+    monkeypatch.setattr(llm_gateway, "LLM_MAX_RETRIES", 0)
+
+    async def scenario():
+        failing, _ = scripted((503, {}))
+        for _ in range(3):
+            assert await post(failing) == 503
+        assert LLMGateway._opened_at is not None
+
+        healthy, calls = scripted((200, {}))
+        with pytest.raises(CircuitOpenError):
+            await post(healthy)
+        assert calls == []
+
+        # Cooldown over: one probe goes through and closes the circuit
+        LLMGateway._opened_at -= llm_gateway.LLM_BREAKER_COOLDOWN
+        assert await post(healthy) == 200
+        return calls
+
+    assert asyncio.run(scenario()) == [200]
+    assert LLMGateway._opened_at is None and LLMGateway._failures == 0
+
+
+def test_failed_probe_reopens_the_circuit(monkeypatch):
+    monkeypatch.setattr(llm_gateway, "LLM_MAX_RETRIES", 0)
+
+    async def scenario():
+        failing, _ = scripted((503, {}))
+        for _ in range(3):
+            await post(failing)
+        LLMGateway._opened_at -= llm_gateway.LLM_BREAKER_COOLDOWN
+        assert await post(failing) == 503
+        with pytest.raises(CircuitOpenError):
+            await post(failing)
+
+    asyncio.run(scenario())
@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models.chat import ChatMessage, ChatSession
+from app.services import message_index
+from app.services.message_index import MessageIndex
+
+
+def vector(*values):
+    return message_index.normalize(np.array(values, dtype="float32"))
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    session = factory()
+    session.add(ChatSession(id="s"))
+    session.add(ChatMessage(id=1, session_id="s", role="user", content="old", embedding=vector(1, 0).tobytes()))
+    session.commit()
+    monkeypatch.setattr(message_index, "SessionLocal", factory)
+    monkeypatch.setattr(MessageIndex, "_sessions", OrderedDict())
+    monkeypatch.setattr(MessageIndex, "_loading", {})
+    yield session, factory
+    session.close()
+
+
+def test_message_added_during_load_is_indexed(db, monkeypatch):
+    session, factory = db
+
+    @contextmanager
+    def loading():
+        with factory() as s:
+            yield s
+        # Written and embedded after the load read the DB, before it is cached
+        session.add(ChatMessage(id=2, session_id="s", role="assistant", content="new", embedding=vector(0, 1).tobytes()))
+        session.commit()
+        MessageIndex.add("s", 2, vector(0, 1))
+
+    monkeypatch.setattr(message_index, "SessionLocal", loading)
+    ids, matrix = MessageIndex._session_matrix("s")
+    assert ids.tolist() == [1, 2] and matrix.shape == (2, 2)
+    assert MessageIndex._loading == {}
+
+
+def test_load_merges_with_a_concurrent_cache_entry(db, monkeypatch):
+    _, factory = db
+
+    @contextmanager
+    def loading():
+        with factory() as s:
+            yield s
+        # Another load finished first and a new message was appended to it
+        MessageIndex._sessions["s"] = (np.array([1, 3], dtype="int64"), np.vstack([vector(1, 0), vector(1, 1)]))
+
+    monkeypatch.setattr(message_index, "SessionLocal", loading)
+    ids, _ = MessageIndex._session_matrix("s")
+    assert ids.tolist() == [1, 3]
+    MessageIndex.add("s", 3, vector(1, 1))
+    assert MessageIndex._session_matrix("s")[0].tolist() == [1, 3]
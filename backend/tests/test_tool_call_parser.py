@@ -0,0 +1,96 @@
+from app.services.tool_call_parser import IncrementalJSONScanner, NativeToolCalls
+
+
+def feed_chunks(scanner, text, size=5):
+    calls = []
+    for i in range(0, len(text), size):
+        calls += scanner.feed(text[i:i + size])
+    return calls + scanner.close()
+
+
+def visible(scanner):
+    return scanner.buffer if scanner.first_open is None else scanner.buffer[:scanner.first_open]
+
+
+def test_single_call_split_across_chunks():
+    scanner = IncrementalJSONScanner()
+    calls = feed_chunks(scanner, 'Je cherche. {"tool": "search", "query": "a {b} \\"c\\""}')
+    assert calls == [{"tool": "search", "query": 'a {b} "c"'}]
+    assert visible(scanner) == "Je cherche. "
+
+
+def test_array_of_calls_reported_when_closed():
+    scanner = IncrementalJSONScanner()
+    assert scanner.feed('[{"tool": "search", "query": "x"}, ') == []
+    assert scanner.in_array
+    assert scanner.feed('{"tool": "image_search", "query": "y"}]') == [
+        {"tool": "search", "query": "x"},
+        {"tool": "image_search", "query": "y"},
+    ]
+    assert not scanner.in_array
+
+
+def test_prose_braces_and_json_examples_are_not_calls():
+    text = "Final Answer: En Python, un dict vide s'écrit {} et une liste [1, 2] ; exemple : {\"a\": 1}. Voilà."
+    scanner = IncrementalJSONScanner()
+    assert feed_chunks(scanner, text) == []
+    assert visible(scanner) == text
+    assert not scanner.in_object and not scanner.in_array
+
+
+def test_unmatched_bracket_does_not_hold_back_text():
+    scanner = IncrementalJSONScanner()
+    scanner.feed("Voir la note [")
+    scanner.feed("1 pour le détail, puis la suite")
+    assert not scanner.in_array
+    assert visible(scanner) == "Voir la note [1 pour le détail, puis la suite"
+
+
+def test_array_of_plain_objects_is_not_a_call():
+    scanner = IncrementalJSONScanner()
+    assert feed_chunks(scanner, 'Final Answer: [{"name": "a"}, {"tool": "search"}]') == []
+    assert scanner.first_open is None
+
+
+def test_call_after_prose_json_is_still_found():
+    scanner = IncrementalJSONScanner()
+    calls = feed_chunks(scanner, 'Format {"x": 1}. {"action": "create", "title": "t"}')
+    assert calls == [{"action": "create", "title": "t"}]
+    assert visible(scanner) == 'Format {"x": 1}. '
+
+
+def test_broken_tool_call_counted_as_failure():
+    scanner = IncrementalJSONScanner()
+    assert feed_chunks(scanner, '{"tool": "sandbox", "code": "print(1)",}') == []
+    assert scanner.failed == 1
+
+
+def test_truncated_tool_call():
+    scanner = IncrementalJSONScanner()
+    scanner.feed('{"tool": "scrape", "url": "http')
+    assert scanner.truncated
+
+
+def test_unclosed_array_of_calls_returned_by_close():
+    scanner = IncrementalJSONScanner()
+    assert scanner.feed('[{"tool": "search", "query": "x"}') == []
+    assert scanner.close() == [{"tool": "search", "query": "x"}]
+
+
+def test_native_tool_calls_merged_by_index():
+    native = NativeToolCalls()
+    native.feed([{"index": 0, "id": "a", "function": {"name": "search", "arguments": '{"que'}}])
+    native.feed([{"index": 1, "function": {"name": "get_time", "arguments": {}}}])
+    native.feed([{"index": 0, "function": {"arguments": 'ry": "btc"}'}}])
+    calls, failed = native.parse()
+    assert calls == [{"query": "btc", "tool": "search"}, {"tool": "get_time"}]
+    assert failed == 0
+
+
+def test_native_tool_calls_bad_arguments():
+    native = NativeToolCalls()
+    native.feed([{"index": 0, "function": {"name": "search", "arguments": '{"query": '}}])
+    native.feed([{"index": 1, "function": {"arguments": "{}"}}])
+    calls, failed = native.parse()
+    assert calls == []
+    assert failed == 2
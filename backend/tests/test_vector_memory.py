@@ -0,0 +1,133 @@
+import os
+import types
+import zlib
+
+import numpy as np
+import pytest
+
+from app.services import vector_memory as vm
+
+
+class FakeModel:
+    """Deterministic 384-d vectors, far apart for different texts"""
+    def __init__(self, name):
+        pass
+
+    def encode(self, texts):
+        return np.stack([np.random.default_rng(zlib.crc32(t.encode())).standard_normal(384) for t in texts]).astype("float32")
+
+
+class FakeIndex:
+    def __init__(self, dimension):
+        self.vectors = np.empty((0, dimension), dtype="float32")
+
+    @property
+    def ntotal(self):
+        return len(self.vectors)
+
+    def add(self, vectors):
+        self.vectors = np.vstack([self.vectors, vectors])
+
+    def search(self, query, k):
+        distances = ((self.vectors - query) ** 2).sum(axis=1)
+        order = np.argsort(distances)[:k]
+        return distances[order][np.newaxis, :], order[np.newaxis, :]
+
+    def reconstruct_n(self, start, n):
+        return self.vectors[start:start + n].copy()
+
+
+@pytest.fixture
+def memory_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(vm, "VECTOR_LIBS_AVAILABLE", True)
+    monkeypatch.setattr(vm, "SentenceTransformer", FakeModel, raising=False)
+    monkeypatch.setattr(vm, "faiss", types.SimpleNamespace(IndexFlatL2=FakeIndex), raising=False)
+    return str(tmp_path)
+
+
+def open_memory(path):
+    return vm.VectorMemory(cache_dir=path)
+
+
+def fill(path, texts):
+    memory = open_memory(path)
+    for text in texts:
+        memory.add_memory(text)
+    memory.close()
+
+
+def log_file(path):
+    (name,) = [n for n in os.listdir(path) if n.endswith(vm.LOG_SUFFIX)]
+    return os.path.join(path, name)
+
+
+def test_log_replay(memory_dir):
+    fill(memory_dir, ["first memory", "second memory", "third memory"])
+    memory = open_memory(memory_dir)
+    assert [m["text"] for m in memory.memories] == ["first memory", "second memory", "third memory"]
+    assert memory.index.ntotal == 3 and memory.persistence_stats()["replayed"] == 3
+    assert memory.search("second memory", top_k=1)[0]["text"] == "second memory"
+    memory.close()
+
+
+def test_torn_last_record_is_dropped(memory_dir):
+    fill(memory_dir, ["first memory", "second memory"])
+    path = log_file(memory_dir)
+    intact = os.path.getsize(path)
+    with open(path, "ab") as f:
+        # Crash mid-write: header and half of the body
+        f.write(vm.LOG_HEADER.pack(0, 40, 384 * 4) + b'{"text": "third')
+
+    memory = open_memory(memory_dir)
+    assert [m["text"] for m in memory.memories] == ["first memory", "second memory"]
+    assert memory.persistence_stats()["torn_records"] == 1
+    assert os.path.getsize(path) == intact
+
+    # New records go after the cut and replay cleanly
+    memory.add_memory("third memory, again")
+    memory.close()
+    memory = open_memory(memory_dir)
+    assert len(memory.memories) == 3 and memory.persistence_stats()["torn_records"] == 0
+    memory.close()
+
+
+def test_corrupt_last_record_is_dropped(memory_dir):
+    fill(memory_dir, ["first memory", "second memory"])
+    path = log_file(memory_dir)
+    with open(path, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last[0] ^ 0xFF]))
+
+    memory = open_memory(memory_dir)
+    assert [m["text"] for m in memory.memories] == ["first memory"]
+    memory.close()
+
+
+def test_snapshot_then_log(memory_dir):
+    memory = open_memory(memory_dir)
+    memory.add_memory("before the snapshot")
+    memory._snapshot()
+    memory.add_memory("after the snapshot")
+    memory.close()
+    assert os.path.exists(os.path.join(memory_dir, vm.SNAPSHOT_FILE))
+    assert os.path.basename(log_file(memory_dir)) == f"{vm.LOG_PREFIX}1{vm.LOG_SUFFIX}"
+
+    memory = open_memory(memory_dir)
+    assert [m["text"] for m in memory.memories] == ["before the snapshot", "after the snapshot"]
+    assert memory.persistence_stats()["replayed"] == 1
+    memory.close()
+
+
+def test_add_memory_encodes_once(memory_dir, monkeypatch):
+    memory = open_memory(memory_dir)
+    memory.add_memory("first memory")
+    calls = []
+    encode = memory.model.encode
+    monkeypatch.setattr(memory.model, "encode", lambda texts: calls.append(texts) or encode(texts))
+    memory.add_memory("second memory")
+    memory.add_memory("second memory")  # Duplicate: searched, not stored
+    assert calls == [["second memory"], ["second memory"]]
+    assert [m["text"] for m in memory.memories] == ["first memory", "second memory"]
+    memory.close()
@@ -36,6 +36,7 @@ function App() {
   })
   const [pendingImage, setPendingImage] = useState(null) // Server response after upload (legacy/fallback)
   const [pendingFile, setPendingFile] = useState(null)   // RAW file waiting to be sent
+  const [pendingReply, setPendingReply] = useState('')   // Streamed tokens of the reply in progress
   const [previewUrl, setPreviewUrl] = useState(null)     // Local preview URL
   const fileInputRef = useRef(null)
 
@@ -51,6 +52,11 @@ function App() {
     }
   }
 
+  // Follow the reply while it streams
+  useEffect(() => {
+    if (pendingReply) scrollToBottom()
+  }, [pendingReply])
+
   const fetchNotes = async () => {
     try {
       const response = await fetch('/api/notes')
@@ -89,6 +95,7 @@ function App() {
       addToHistory('system', '🛑 SYSTEM INTERRUPT: Task stopped by user.');
       setIsLoading(false);
       setCurrentActivity(null);
+      setPendingReply('');
     }
   };
 
@@ -468,6 +475,7 @@ function App() {
       const reader = response.body.getReader()
       const decoder = new TextDecoder()
       let buffer = ''
+      let stepDone = false // Set by 'thought': the text of that step is complete
 
       while (true) {
         const { done, value } = await reader.read()
@@ -504,10 +512,17 @@ function App() {
       function processEvent(event) {
         if (event.type === 'info') {
           setCurrentActivity(event.content)
+        } else if (event.type === 'token') {
+          // The first token after a finished step starts a new reply
+          const fresh = stepDone
+          stepDone = false
+          setPendingReply(prev => fresh ? event.content : prev + event.content)
         } else if (event.type === 'thought') {
+          stepDone = true
           const shortThought = event.content.split('\n')[0].substring(0, 50)
           setCurrentActivity(shortThought + "...")
         } else if (event.type === 'step_start') {
+          setPendingReply('') // The streamed text was the plan for this tool call
           if (event.tool === 'SCRAPE') {
             const url = event.input.length > 30 ? event.input.substring(0, 30) + "..." : event.input
             setCurrentActivity(`Analysing site: ${url}`)
@@ -526,10 +541,13 @@ function App() {
             status: event.status
           })
         } else if (event.type === 'final') {
+          setPendingReply('')
           addToHistory('output', event.content)
         } else if (event.type === 'error') {
+          setPendingReply('')
           addToHistory('system', event.content)
         }
+        // 'model' and 'timing' events are diagnostics, not shown
 
         if (event.type === 'step_end' && event.tool === 'MANAGE_WALLET') {
           try {
@@ -552,6 +570,7 @@ function App() {
     } finally {
       setIsLoading(false)
       setCurrentActivity(null)
+      setPendingReply('')
       abortControllerRef.current = null;
     }
   }
@@ -806,6 +825,17 @@ function App() {
                   return items
                 })()}
 
+                {pendingReply && (
+                  <div className="console-line output">
+                    <span>
+                      <ReactMarkdown
+                        children={pendingReply.includes('Final Answer:') ? pendingReply.split('Final Answer:').pop().trimStart() : pendingReply}
+                        remarkPlugins={[remarkGfm]}
+                      />
+                    </span>
+                  </div>
+                )}
+
                 {isLoading && (
                   <div className="live-activity-box">
                     <div className="box-header">